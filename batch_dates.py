@@ -0,0 +1,57 @@
+"""
+Vectorized parsing of the date strings found on a batch of pages.
+
+The date scan of HTMLDateExtractor matches DATE_PATTERNS in every page, and the same
+strings ("2024-01-15", "Jan 15, 2024") repeat across thousands of pages. Instead of
+handing each of them to dateutil/dateparser, HTMLDateExtractor.extract_many collects the
+candidates of a chunk of pages, and parse_date_strings() parses the unique ones with
+pandas.to_datetime, one call per DATE_PATTERNS shape and explicit format. Strings that
+do not fit a format (e.g. "Sept. 5, 2024", impossible dates, years outside the
+datetime64[ns] range) are left out, and the extractor parses them one by one as before.
+
+The formats only accept what dateutil (the extractor's first parser) reads the same way,
+so a page gets the same dates from extract_many as from extract_from_html.
+"""
+import re
+from datetime import date
+from typing import Dict, Iterable
+import pandas as pd
+
+
+# The shape of a (normalized) DATE_PATTERNS match, and the formats tried for it in order
+DATE_STRING_FORMATS = [
+    (re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}'), ('%Y-%m-%dT%H:%M:%S',)),
+    (re.compile(r'\d{4}-\d{2}-\d{2}'), ('%Y-%m-%d',)),
+    (re.compile(r'[A-Za-z]+ \d{1,2} \d{4}'), ('%b %d %Y', '%B %d %Y')),
+    (re.compile(r'\d{1,2} [A-Za-z]+ \d{4}'), ('%d %b %Y', '%d %B %Y')),
+]
+
+
+def parse_date_strings(strings: Iterable[str]) -> Dict[str, date]:
+    """
+    Parse many date strings at once.
+
+    Args:
+        strings: Date strings, e.g. the DATE_PATTERNS matches of a chunk of pages (duplicates are fine)
+
+    Returns:
+        string -> date for every string one of DATE_STRING_FORMATS parsed; the others are missing
+    """
+    series = pd.Series(sorted(set(strings)), dtype=object)
+    if series.empty:
+        return {}
+    # "Jan. 15, 2024" -> "Jan 15 2024"
+    normalized = series.str.replace(r'[.,]', ' ', regex=True).str.split().str.join(' ')
+    parsed: Dict[str, date] = {}
+    remaining = pd.Series(True, index=series.index)
+    for shape, formats in DATE_STRING_FORMATS:
+        todo = normalized.str.fullmatch(shape.pattern).fillna(False).astype(bool) & remaining
+        for fmt in formats:
+            if not todo.any():
+                break
+            converted = pd.to_datetime(normalized[todo], format=fmt, errors='coerce')
+            found = converted.notna().reindex(series.index, fill_value=False)
+            parsed.update(zip(series[found], converted[converted.notna()].dt.date))
+            todo &= ~found
+            remaining &= ~found
+    return parsed
@@ -0,0 +1,74 @@
+'''
+Differential check of the vectorized date parsing (batch_dates.py) against the per-string
+parser of HTMLDateExtractor: every string parse_date_strings() parses must get the same date.
+Run with pytest, or directly: python batch_dates_test.py
+'''
+import re
+from batch_dates import DATE_STRING_FORMATS, parse_date_strings
+from html_date_extractor import HTMLDateExtractor
+
+
+YEARS = (1677, 1999, 2000, 2024, 2262, 2263)
+MONTH_NAMES = (
+    'Jan', 'January', 'Feb', 'February', 'Mar', 'March', 'Apr', 'April', 'May', 'Jun', 'June',
+    'Jul', 'July', 'Aug', 'August', 'Sep', 'Sept', 'September', 'Oct', 'October', 'Nov', 'November',
+    'Dec', 'December', 'Decembre', 'jan', 'MARCH'
+)
+
+
+def _date_strings():
+    """DATE_PATTERNS matches of every shape, including impossible days/months and day/month swaps."""
+    text = []
+    for year in YEARS:
+        for month in range(0, 14):
+            for day in range(0, 33):
+                text.append(f"{year}-{month:02d}-{day:02d}")
+                text.append(f"{year}-{month:02d}-{day:02d}T08:30:00")
+                # The month in the day's place
+                text.append(f"{year}-{day:02d}-{month:02d}")
+        for name in MONTH_NAMES:
+            for day in range(0, 33):
+                text += [f"{name} {day}, {year}", f"{name}. {day} {year}", f"{name} {day:02d} {year}"]
+                text += [f"{day} {name} {year}", f"{day:02d} {name}. {year}"]
+    strings = set()
+    for pattern in HTMLDateExtractor.DATE_PATTERNS:
+        for line in text:
+            strings.update(re.findall(pattern, line, re.IGNORECASE))
+    return strings
+
+
+def test_vectorized_formats_agree_with_the_per_string_parser():
+    extractor = HTMLDateExtractor(disable_logger=True, parsed_date_cache_size=0)
+    strings = _date_strings()
+    parsed = parse_date_strings(strings)
+    assert len(strings) > 15000 and len(parsed) > 5000, (len(strings), len(parsed))
+
+    mismatches = {s: (value, extractor._parse_date_uncached(s)) for s, value in parsed.items()}
+    mismatches = {s: pair for s, pair in mismatches.items() if pair[0] != pair[1]}
+    assert not mismatches, sorted(mismatches.items())[:20]
+
+    # Every format shape is exercised
+    normalized = [' '.join(re.sub(r'[.,]', ' ', s).split()) for s in parsed]
+    for shape, formats in DATE_STRING_FORMATS:
+        assert any(shape.fullmatch(s) for s in normalized), formats
+
+
+def test_impossible_and_ambiguous_dates_are_left_to_the_per_string_parser():
+    parsed = parse_date_strings([
+        "2024-02-30", "2024-13-01", "2024-00-10", "31 Feb 2024", "Feb 30, 2024", "1500-01-01",
+        "2024-04-03", "03 April 2024", "April 03 2024", "Sept. 5, 2024",
+    ])
+    for impossible in ("2024-02-30", "2024-13-01", "2024-00-10", "31 Feb 2024", "Feb 30, 2024"):
+        assert impossible not in parsed, impossible
+    # Outside the datetime64[ns] range, pandas < 3 leaves it out; newer versions parse it correctly
+    assert parsed.get("1500-01-01") is None or parsed["1500-01-01"].isoformat() == "1500-01-01"
+    # Day and month are never swapped
+    assert parsed["2024-04-03"].isoformat() == "2024-04-03"
+    assert parsed["03 April 2024"].isoformat() == "2024-04-03"
+    assert parsed["April 03 2024"].isoformat() == "2024-04-03"
+
+
+if __name__ == "__main__":
+    test_vectorized_formats_agree_with_the_per_string_parser()
+    test_impossible_and_ambiguous_dates_are_left_to_the_per_string_parser()
+    print("✅ batch date parsing checks passed")
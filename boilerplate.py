@@ -0,0 +1,249 @@
+"""
+BoilerplateMaskCache: Learns the template regions of each site so the date scan can skip them.
+
+Footers, navigation menus, "related articles" rails and copyright lines repeat on
+every page of a site. Their dates are never the page's own, but they end up in the
+candidate dates of the date scan, and so in dates_found and last_date_found.
+
+For every block element in <body> we compute a structural fingerprint: the tag path
+from <body> (with class names) plus the element's normalized text. A fingerprint
+that shows up on enough pages of the same domain is a template region, and the
+generic date scan of later pages of that domain skips its subtree. The structured
+strategies (JSON-LD, meta tags, <time>, CSS selectors) always see the whole page.
+
+Date-bearing elements are never fingerprinted, nor are the blocks that contain one:
+<time> and <meta> elements, elements with a datetime attribute, a date-like itemprop
+or class ("date", "publish", "updated", "modified"), and short text that parses as a
+date on its own. Articles published on the same day share their byline text, and it
+must not become a "template".
+
+A page counts once per domain however often it is extracted: the cache keeps a hash of
+every URL it learned from, so reruns, resumed runs and duplicate URLs don't turn a
+page's own blocks into "template" regions.
+
+The learned counts are persisted as JSON so they carry over between runs. Several
+processes can share one file: save() merges this process's new observations into
+the file under a file lock and picks up what the others learned. Fingerprints seen on
+a single page are only pruned from the file by an explicit save(compact=True) at the
+end of a run, so a template that interleaved domains haven't shown twice yet survives
+the periodic saves.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import multiprocessing.util
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+from dateutil import parser as date_parser
+from lxml import etree
+
+
+logger = logging.getLogger(__name__)
+
+
+def domain_of(url: str) -> str:
+    """The domain a page's template is shared across ("https://www.x.org/a" -> "x.org")."""
+    netloc = urlparse(url).netloc.lower()
+    return netloc[4:] if netloc.startswith('www.') else netloc
+
+
+class BoilerplateMaskCache:
+    """Per-domain counts of block fingerprints, and the masks derived from them."""
+
+    # Elements that can make up a template region
+    BLOCK_TAGS = {
+        'header', 'footer', 'nav', 'aside', 'div', 'section', 'ul', 'ol',
+        'p', 'table', 'form', 'span', 'li'
+    }
+
+    # Longer text is page content, not a template region
+    MAX_TEXT_LENGTH = 2000
+
+    # Elements that carry a page's own date; they and their ancestors are never fingerprinted
+    DATE_BEARING_XPATH = (
+        "//body//*[self::time or self::meta or @datetime"
+        " or contains(translate(@itemprop, 'DATE', 'date'), 'date')"
+        " or contains(translate(@class, 'DATE', 'date'), 'date')"
+        " or contains(@class, 'publish') or contains(@class, 'updated') or contains(@class, 'modified')]"
+    )
+
+    # Text up to this long that parses as a date on its own is a date element
+    MAX_DATE_TEXT_LENGTH = 40
+
+    def __init__(self, path: Optional[str] = None, min_pages: int = 3, min_share: float = 0.5, autosave_every: int = 25):
+        """
+        Initialize the cache.
+
+        Args:
+            path: JSON file the masks are loaded from and saved to (None: in-memory only)
+            min_pages: A fingerprint must be seen on at least this many pages of a domain to be masked
+            min_share: ... and on at least this share of the domain's observed pages
+            autosave_every: Save after this many observed pages (0: only on explicit save())
+        """
+        self.path = path
+        self.min_pages = min_pages
+        self.min_share = min_share
+        self.autosave_every = autosave_every
+        self._lock = threading.Lock()
+
+        self.pages: Dict[str, int] = defaultdict(int)
+        self.counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        # Hashes of the URLs each domain's counts were learned from
+        self.urls: Dict[str, Set[str]] = defaultdict(set)
+        # Observations not yet merged into the file: domain -> URL hash -> fingerprints
+        self._new_pages: Dict[str, Dict[str, List[str]]] = defaultdict(dict)
+        self._unsaved = 0
+
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._set_state(json.load(f))
+
+    def rules_snapshot(self) -> Dict:
+        """The settings that decide which regions are masked (part of the extractor's rules, see provenance.py)."""
+        return {
+            'BLOCK_TAGS': sorted(self.BLOCK_TAGS),
+            'MAX_TEXT_LENGTH': self.MAX_TEXT_LENGTH,
+            'DATE_BEARING_XPATH': self.DATE_BEARING_XPATH,
+            'MAX_DATE_TEXT_LENGTH': self.MAX_DATE_TEXT_LENGTH,
+            'min_pages': self.min_pages,
+            'min_share': self.min_share,
+        }
+
+    def _set_state(self, state: Dict):
+        self.pages = defaultdict(int, {domain: entry['pages'] for domain, entry in state.items()})
+        self.counts = defaultdict(lambda: defaultdict(int), {
+            domain: defaultdict(int, entry['counts']) for domain, entry in state.items()
+        })
+        self.urls = defaultdict(set, {domain: set(entry.get('urls', [])) for domain, entry in state.items()})
+
+    @classmethod
+    def _is_date_text(cls, text: str) -> bool:
+        if len(text) > cls.MAX_DATE_TEXT_LENGTH or not any(c.isdigit() for c in text):
+            return False
+        try:
+            date_parser.parse(text)
+            return True
+        except (ValueError, OverflowError):
+            return False
+
+    def _fingerprints(self, tree: etree._Element) -> List[Tuple[etree._Element, str]]:
+        """Fingerprints of the block elements under <body> without a date element, in document order."""
+        body = tree.find('.//body')
+        if body is None:
+            return []
+        date_bearing = set()
+        for elem in tree.xpath(self.DATE_BEARING_XPATH):
+            date_bearing.add(elem)
+            date_bearing.update(elem.iterancestors())
+
+        result = []
+        stack = [(body, 'body')]
+        while stack:
+            elem, path = stack.pop()
+            children = []
+            for child in elem:
+                if not isinstance(child.tag, str):
+                    continue  # Comments and processing instructions
+                classes = '.'.join(sorted((child.get('class') or '').split()))
+                child_path = f"{path}/{child.tag}.{classes}" if classes else f"{path}/{child.tag}"
+                if child.tag in self.BLOCK_TAGS and child not in date_bearing:
+                    text = ' '.join(child.text_content().split())
+                    if text and len(text) <= self.MAX_TEXT_LENGTH and not self._is_date_text(text):
+                        digest = hashlib.sha1(f"{child_path}|{text}".encode('utf-8')).hexdigest()[:16]
+                        result.append((child, digest))
+                children.append((child, child_path))
+            stack.extend(reversed(children))
+        return result
+
+    def _is_masked(self, domain: str, fingerprint: str) -> bool:
+        count = self.counts[domain].get(fingerprint, 0)
+        return count >= self.min_pages and count >= self.min_share * self.pages[domain]
+
+    def learn_and_find(self, url: str, tree: etree._Element) -> List[etree._Element]:
+        """
+        Record the page's fingerprints for its domain, then find its template regions.
+
+        A URL the domain already learned from is not counted again.
+
+        Args:
+            url: URL of the page
+            tree: The parsed page (not modified)
+
+        Returns:
+            The outermost template regions of the page, for the date scan to skip
+        """
+        domain = domain_of(url)
+        url_hash = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        fingerprints = self._fingerprints(tree)
+
+        with self._lock:
+            if url_hash not in self.urls[domain]:
+                unique = sorted({fp for _, fp in fingerprints})
+                self.urls[domain].add(url_hash)
+                self.pages[domain] += 1
+                for fingerprint in unique:
+                    self.counts[domain][fingerprint] += 1
+                self._new_pages[domain][url_hash] = unique
+                self._unsaved += 1
+            masked = [elem for elem, fp in fingerprints if self._is_masked(domain, fp)]
+            autosave = self.path and self.autosave_every and self._unsaved >= self.autosave_every
+
+        # Only the outermost masked elements; their masked descendants are inside them
+        masked_set = set(masked)
+        regions = [elem for elem in masked if not any(a in masked_set for a in elem.iterancestors())]
+
+        if autosave:
+            self.save()
+        return regions
+
+    def save_at_exit(self):
+        """Save the unsaved observations when the process exits (atexit handlers don't run in pool workers)."""
+        multiprocessing.util.Finalize(None, self.save, exitpriority=10)
+
+    def save(self, compact: bool = False):
+        """
+        Merge the new observations into the JSON file and load what other processes saved.
+
+        Args:
+            compact: Also prune the fingerprints seen on one page only; do this once a run is done
+        """
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._lock, open(self.path + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            state = {}
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            for domain, pages in self._new_pages.items():
+                entry = state.setdefault(domain, {'pages': 0, 'counts': {}})
+                known = set(entry.get('urls', []))
+                for url_hash, fingerprints in pages.items():
+                    if url_hash in known:
+                        continue  # Another process learned from this page first
+                    known.add(url_hash)
+                    entry['pages'] += 1
+                    for fingerprint in fingerprints:
+                        entry['counts'][fingerprint] = entry['counts'].get(fingerprint, 0) + 1
+                entry['urls'] = sorted(known)
+            if compact:
+                # Fingerprints seen once are page content; keep the file from growing with them
+                for entry in state.values():
+                    if entry['pages'] >= self.min_pages:
+                        entry['counts'] = {fp: c for fp, c in entry['counts'].items() if c > 1}
+
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp, self.path)
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+            self._set_state(state)
+            self._new_pages.clear()
+            self._unsaved = 0
+        logger.debug(f"Saved boilerplate masks for {len(state)} domains to {self.path}")
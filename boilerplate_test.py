@@ -0,0 +1,84 @@
+'''
+Regression checks for the learned boilerplate masks (boilerplate.py).
+Run with pytest, or directly: python boilerplate_test.py
+'''
+import os
+import tempfile
+from boilerplate import BoilerplateMaskCache
+from html_date_extractor import HTMLDateExtractor
+
+
+FOOTER = '<footer class="site-footer"><p>© Example News, updated 2019-01-01</p></footer>'
+
+
+def _page(n: int) -> str:
+    return (
+        f'<html><body><article><h1>Story {n}</h1>'
+        f'<div class="post-date">2024-03-{n:02d}</div><p>Text of story {n}.</p></article>'
+        f'{FOOTER}</body></html>'
+    )
+
+
+def test_repeated_extraction_is_stable():
+    """Extracting the same page again (reruns, --resume, duplicate URLs) must not mask its own date."""
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "boilerplate_masks.json")
+        url = "https://www.example.com/news/1"
+        results = []
+        for _ in range(2):
+            # A fresh extractor per round reloads the saved masks, like a rerun of the batch
+            extractor = HTMLDateExtractor(disable_logger=True, use_htmldate=False, boilerplate_cache_path=path)
+            for _ in range(3):
+                results.append(extractor.extract_from_html(_page(1), url=url).published_date)
+            extractor.boilerplate_cache.save()
+        assert all(date is not None and date.isoformat().startswith("2024-03-01") for date in results), results
+        assert extractor.boilerplate_cache.pages["example.com"] == 1
+
+
+def test_template_is_masked_across_pages():
+    """The footer shared by the pages of a domain is masked; each page keeps its own date."""
+    extractor = HTMLDateExtractor(disable_logger=True, use_htmldate=False)
+    extractor.boilerplate_cache = BoilerplateMaskCache()  # In-memory only
+    for n in range(1, 6):
+        result = extractor.extract_from_html(_page(n), url=f"https://www.example.com/news/{n}")
+        assert result.published_date.isoformat().startswith(f"2024-03-{n:02d}")
+    assert all(date.year == 2024 for date in result.dates_found), result.dates_found
+
+
+
+def test_same_day_articles_keep_their_date():
+    """Articles of a site published on the same day share their date element; it is never a template."""
+    extractor = HTMLDateExtractor(disable_logger=True, use_htmldate=False)
+    extractor.boilerplate_cache = BoilerplateMaskCache()
+    for n in range(1, 6):
+        page = (
+            f'<html><body><article><h1>Story {n}</h1>'
+            f'<div class="byline"><span>By Jane Roe</span> <time class="published">March 5, 2024</time></div>'
+            f'<p>Text of story {n}.</p></article>{FOOTER}</body></html>'
+        )
+        result = extractor.extract_from_html(page, url=f"https://www.example.com/news/{n}")
+        assert result.published_date is not None and result.published_date.isoformat().startswith("2024-03-05"), n
+        assert "2024-03-05" in [date.isoformat()[:10] for date in result.dates_found], result.dates_found
+
+
+def test_structured_strategies_see_template_regions():
+    """A date inside a learned template region is skipped by the date scan only, not by the cascade."""
+    extractor = HTMLDateExtractor(disable_logger=True, use_htmldate=False)
+    extractor.boilerplate_cache = BoilerplateMaskCache()
+    for n in range(1, 6):
+        page = (
+            f'<html><head><meta property="article:published_time" content="2024-03-{n:02d}"></head>'
+            f'<body><p>Text of story {n}.</p>{FOOTER}</body></html>'
+        )
+        result = extractor.extract_from_html(page, url=f"https://www.example.com/news/{n}")
+        assert result.published_date.isoformat().startswith(f"2024-03-{n:02d}")
+    # The footer's 2019 date is masked from the scan from the third page on
+    assert [date.isoformat()[:10] for date in result.dates_found] == ["2024-03-05"], result.dates_found
+
+
+if __name__ == "__main__":
+    test_repeated_extraction_is_stable()
+    test_template_is_masked_across_pages()
+    test_same_day_articles_keep_their_date()
+    test_structured_strategies_see_template_regions()
+    print("✅ boilerplate checks passed")
@@ -0,0 +1,255 @@
+"""
+BatchCheckpoint: Durable progress of a batch run, so a crashed run can be resumed.
+
+A checkpoint directory contains:
+    progress.json         - input offset (every item before it is done), the flushed
+                            output segments and how many records of each are durable
+    segment-00000.jsonl   - flushed output records, one JSON object per line:
+                            {"offset": 12, "question_id": 7403, "url": "...", "record": {...}}
+    pending_llm.jsonl     - heuristic results of pages waiting for the LLM fallback
+
+The completed input offsets are the ones stored in the durable part of the segments,
+so a page only counts as done once its output is on disk. Completion is tracked by
+position rather than by (question id, url): a pair that appears again later in the
+input is written again on resume, exactly like in an uninterrupted run. Pages in
+pending_llm.jsonl are re-queued straight to the LLM stage on resume, so their
+heuristic extraction is never redone.
+"""
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Set
+from shared import DateResult, date_result_to_dict, date_result_from_dict
+
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_FILE = "progress.json"
+PENDING_LLM_FILE = "pending_llm.jsonl"
+
+
+class BatchCheckpoint:
+    """
+    Records the progress of a batch run in a checkpoint directory.
+
+    All methods are thread-safe; the pipeline calls them from its reader,
+    heuristic and writer stages.
+    """
+
+    def __init__(self, directory: str, resume: bool = False, flush_every: int = 100, segment_size: int = 5000):
+        """
+        Open (or create) a checkpoint directory.
+
+        Args:
+            directory: The checkpoint directory
+            resume: Continue from the existing progress. Otherwise any previous progress is discarded.
+            flush_every: Number of records after which the open segment is flushed to disk
+            segment_size: Number of records after which a new segment is started
+        """
+        self.directory = directory
+        self.flush_every = flush_every
+        self.segment_size = segment_size
+        self._lock = threading.Lock()
+
+        self.input_offset = 0
+        self.segments: List[Dict[str, Any]] = []  # [{"name": ..., "records": <durable count>}]
+        self.completed: Set[int] = set()  # Offsets whose record is durable
+        self.pending_llm: Dict[int, Dict[str, Any]] = {}  # offset -> {"question_id", "url", "result"}
+        self._done_offsets: Set[int] = set()
+        self._segment_file = None
+        self._unflushed = 0
+        self._pending_done: List[int] = []
+
+        os.makedirs(directory, exist_ok=True)
+        if resume:
+            self._load()
+        else:
+            self._clear()
+        self._pending_file = open(self._path(PENDING_LLM_FILE), 'a', encoding='utf-8')
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _clear(self):
+        for name in os.listdir(self.directory):
+            if name == PROGRESS_FILE or name == PENDING_LLM_FILE or (name.startswith('segment-') and name.endswith('.jsonl')):
+                os.remove(self._path(name))
+
+    def _load(self):
+        if not os.path.exists(self._path(PROGRESS_FILE)):
+            logger.info(f"No checkpoint in {self.directory}, starting from scratch")
+            return
+
+        with open(self._path(PROGRESS_FILE), 'r', encoding='utf-8') as f:
+            progress = json.load(f)
+        self.input_offset = progress['input_offset']
+        self.segments = progress['segments']
+
+        for entry in self._iter_segment_entries():
+            self.completed.add(entry['offset'])
+            if entry['offset'] >= self.input_offset:
+                self._done_offsets.add(entry['offset'])
+
+        if os.path.exists(self._path(PENDING_LLM_FILE)):
+            with open(self._path(PENDING_LLM_FILE), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash
+                        continue
+                    if entry['offset'] not in self.completed:
+                        self.pending_llm[entry['offset']] = entry
+            self._rewrite_pending()
+
+        logger.info(
+            f"Resuming from {self.directory}: {len(self.completed)} pages done, "
+            f"{len(self.pending_llm)} waiting for the LLM fallback, input offset {self.input_offset}"
+        )
+
+    def _rewrite_pending(self):
+        """Compact pending_llm.jsonl down to the entries that are still pending."""
+        tmp = self._path(PENDING_LLM_FILE + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for entry in self.pending_llm.values():
+                f.write(json.dumps(entry) + '\n')
+        os.replace(tmp, self._path(PENDING_LLM_FILE))
+
+    def _iter_segment_entries(self) -> Iterator[Dict[str, Any]]:
+        """Yield the durable entries of all segments."""
+        for segment in self.segments:
+            with open(self._path(segment['name']), 'r', encoding='utf-8') as f:
+                for i, line in enumerate(f):
+                    if i >= segment['records']:
+                        break
+                    yield json.loads(line)
+
+    # ===== Progress =====
+
+    def is_completed(self, offset: int) -> bool:
+        """Whether the record of the item at offset is durable."""
+        with self._lock:
+            return offset in self.completed
+
+    def pending_result(self, offset: int) -> Optional[DateResult]:
+        """The stored heuristic result if the item at offset is waiting for the LLM fallback."""
+        with self._lock:
+            entry = self.pending_llm.get(offset)
+        return date_result_from_dict(entry['result']) if entry else None
+
+    def mark_skipped(self, offset: int):
+        """Mark an input offset as done without output (e.g. an unsuccessful fetch)."""
+        with self._lock:
+            self._mark_done(offset)
+
+    def _mark_done(self, offset: int):
+        self._done_offsets.add(offset)
+        while self.input_offset in self._done_offsets:
+            self._done_offsets.remove(self.input_offset)
+            self.input_offset += 1
+
+    def add_pending(self, offset: int, question_id: Any, url: str, result: DateResult):
+        """Persist a heuristic result that still needs the LLM fallback."""
+        entry = {
+            'offset': offset,
+            'question_id': question_id,
+            'url': url,
+            'result': date_result_to_dict(result)
+        }
+        with self._lock:
+            self.pending_llm[offset] = entry
+            self._pending_file.write(json.dumps(entry) + '\n')
+            self._pending_file.flush()
+
+    def complete(self, offset: int, question_id: Any, url: str, record: Dict[str, Any]):
+        """Append an output record; the page counts as done once the record is flushed."""
+        with self._lock:
+            if self._segment_file is None:
+                self._open_segment()
+            self._segment_file.write(json.dumps({
+                'offset': offset,
+                'question_id': question_id,
+                'url': url,
+                'record': record
+            }, ensure_ascii=False) + '\n')
+            self._unflushed += 1
+            self._pending_done.append(offset)
+            if self._unflushed >= self.flush_every:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _open_segment(self):
+        name = f"segment-{len(self.segments):05d}.jsonl"
+        self.segments.append({'name': name, 'records': 0})
+        self._segment_file = open(self._path(name), 'w', encoding='utf-8')
+        self._unflushed = 0
+        self._pending_done = []
+
+    def _flush(self):
+        if self._segment_file is None:
+            self._write_progress()
+            return
+        self._segment_file.flush()
+        os.fsync(self._segment_file.fileno())
+
+        segment = self.segments[-1]
+        segment['records'] += self._unflushed
+        for offset in self._pending_done:
+            self.completed.add(offset)
+            self.pending_llm.pop(offset, None)
+            self._mark_done(offset)
+        self._unflushed = 0
+        self._pending_done = []
+        self._write_progress()
+
+        if segment['records'] >= self.segment_size:
+            self._segment_file.close()
+            self._segment_file = None
+
+    def _write_progress(self):
+        tmp = self._path(PROGRESS_FILE + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                'input_offset': self.input_offset,
+                'completed': len(self.completed),
+                'segments': self.segments
+            }, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path(PROGRESS_FILE))
+
+    def close(self):
+        """Flush everything and compact the pending LLM queue."""
+        with self._lock:
+            self._flush()
+            if self._segment_file is not None:
+                self._segment_file.close()
+                self._segment_file = None
+            self._pending_file.close()
+            self._rewrite_pending()
+
+    def records(self) -> List[Dict[str, Any]]:
+        """All flushed output records, in the order they were written."""
+        with self._lock:
+            return [entry['record'] for entry in self._iter_segment_entries()]
+
+
+def read_entries(directory: str) -> List[Dict[str, Any]]:
+    """
+    The durable segment entries ({"offset", "question_id", "url", "record"}) of a checkpoint,
+    read without opening it for writing (e.g. to merge the checkpoints of finished shards).
+    """
+    with open(os.path.join(directory, PROGRESS_FILE), 'r', encoding='utf-8') as f:
+        progress = json.load(f)
+    entries = []
+    for segment in progress['segments']:
+        with open(os.path.join(directory, segment['name']), 'r', encoding='utf-8') as f:
+            for i, line in enumerate(f):
+                if i >= segment['records']:
+                    break
+                entries.append(json.loads(line))
+    return entries
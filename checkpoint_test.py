@@ -0,0 +1,141 @@
+'''
+Checks of the batch checkpoint (checkpoint.py): durable segments, interrupted and resumed
+pipeline runs, and pages left waiting for the LLM fallback.
+Run with pytest, or directly: python checkpoint_test.py
+'''
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from checkpoint import BatchCheckpoint, read_entries
+from llm_stub_server import StubConfig, StubServer
+from pipeline import ExtractionPipeline, PipelineItem
+
+
+EXTRACTOR_KWARGS = {'disable_logger': True, 'use_htmldate': False}
+
+
+def _page(day: int) -> str:
+    return f'<html><body><article><div class="post-date">2024-03-{day:02d}</div><p>Story.</p></article></body></html>'
+
+
+UNDATED_PAGE = '<html><body><article><p>A story without any date.</p></article></body></html>'
+
+
+def _items():
+    """Six pages; the one at offset 4 repeats the (question id, url) of offset 0."""
+    pages = [(7, "https://example.com/a", _page(1)), (7, "https://example.com/b", _page(2)),
+             (8, "https://example.com/c", _page(3)), (8, "https://example.com/d", _page(4)),
+             (7, "https://example.com/a", _page(1)), (9, "https://example.com/e", _page(6))]
+    return [PipelineItem(question_id=q, url=url, html_content=html, offset=i) for i, (q, url, html) in enumerate(pages)]
+
+
+def _run(checkpoint: BatchCheckpoint, items, **kwargs) -> ExtractionPipeline:
+    pipeline = ExtractionPipeline(
+        heuristic_workers=2, extractor_kwargs=EXTRACTOR_KWARGS, checkpoint=checkpoint, worker_mode="thread", **kwargs
+    )
+    pipeline.run(items)
+    return pipeline
+
+
+@contextmanager
+def _stub_endpoint(config: StubConfig):
+    """Serve a stub LLM endpoint from its own event loop thread; yields (stub, base url)."""
+    stub = StubServer(config, seed=0)
+    loop = asyncio.new_event_loop()
+    runner = loop.run_until_complete(stub.start(port=0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield stub, f"http://127.0.0.1:{runner.addresses[0][1]}/v1"
+    finally:
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def test_segments_keep_only_durable_records():
+    with tempfile.TemporaryDirectory() as folder:
+        checkpoint = BatchCheckpoint(folder, flush_every=1, segment_size=2)
+        for offset in range(5):
+            checkpoint.complete(offset, 1, f"https://example.com/{offset}", {'offset': offset})
+        # Written but never flushed, then a torn line from the crash
+        checkpoint.flush_every = 100
+        checkpoint.complete(5, 1, "https://example.com/5", {'offset': 5})
+        checkpoint._segment_file.write('{"offset": 6, "quest')
+        checkpoint._segment_file.flush()
+        assert [segment['records'] for segment in checkpoint.segments] == [2, 2, 1]
+
+        resumed = BatchCheckpoint(folder, resume=True)
+        assert resumed.input_offset == 5 and resumed.completed == set(range(5))
+        assert [record['offset'] for record in resumed.records()] == list(range(5))
+        resumed.complete(5, 1, "https://example.com/5", {'offset': 5})
+        resumed.close()
+        assert [entry['offset'] for entry in read_entries(folder)] == list(range(6))
+
+        # Without resume, the previous progress is discarded
+        assert BatchCheckpoint(folder).records() == []
+        assert not any(name.startswith('segment-') for name in os.listdir(folder))
+
+
+def test_interrupted_run_resumes_and_writes_repeated_pages():
+    items = _items()
+    with tempfile.TemporaryDirectory() as folder:
+        # The first run dies after three pages, without closing its checkpoint
+        _run(BatchCheckpoint(folder, flush_every=1), items[:3])
+
+        checkpoint = BatchCheckpoint(folder, resume=True)
+        assert checkpoint.input_offset == 3
+        pipeline = _run(checkpoint, _items())
+        checkpoint.close()
+        assert pipeline.stats['heuristic'].items == 3
+
+        entries = read_entries(folder)
+        assert sorted(entry['offset'] for entry in entries) == list(range(6))
+        # The repeated page is written at both of its positions, like in an uninterrupted run
+        assert [entry['offset'] for entry in entries if entry['url'] == "https://example.com/a"] == [0, 4]
+        with open(os.path.join(folder, "progress.json"), 'r', encoding='utf-8') as f:
+            assert json.load(f)['input_offset'] == 6
+
+        # Nothing is left to do
+        checkpoint = BatchCheckpoint(folder, resume=True)
+        assert _run(checkpoint, _items()).stats['heuristic'].items == 0
+        checkpoint.close()
+        assert len(read_entries(folder)) == 6
+
+
+def test_pending_llm_fallback_is_retried_without_redoing_heuristics():
+    items = _items()
+    items[3].html_content = UNDATED_PAGE
+    llm_kwargs = {'max_tries': 1, 'structured_output': True}
+    with tempfile.TemporaryDirectory() as folder:
+        with _stub_endpoint(StubConfig(latency="fixed:0", error_rate=1.0)) as (_, url):
+            checkpoint = BatchCheckpoint(folder)
+            _run(checkpoint, items, use_llm_as_fallback=True, llm_kwargs={**llm_kwargs, 'llm_url': url})
+            checkpoint.close()
+        # The failed fallback leaves the page pending, the others are done
+        assert list(checkpoint.pending_llm) == [3]
+        assert checkpoint.input_offset == 3 and checkpoint.completed == {0, 1, 2, 4, 5}
+
+        with _stub_endpoint(StubConfig(latency="fixed:0")) as (stub, url):
+            checkpoint = BatchCheckpoint(folder, resume=True)
+            assert checkpoint.pending_result(3).published_date is None
+            pipeline = _run(checkpoint, _items(), use_llm_as_fallback=True, llm_kwargs={**llm_kwargs, 'llm_url': url})
+            checkpoint.close()
+        # Only the fallback ran again: redone heuristics would have found the date now in the page's html
+        assert pipeline.stats['heuristic'].items == 0 and stub.requests == 1
+        assert not checkpoint.pending_llm and checkpoint.input_offset == 6
+        record = next(entry['record'] for entry in read_entries(folder) if entry['offset'] == 3)
+        assert record['published_date'].startswith("2025-11-14"), record
+        with open(os.path.join(folder, "pending_llm.jsonl"), 'r', encoding='utf-8') as f:
+            assert f.read() == ""
+
+
+if __name__ == "__main__":
+    test_segments_keep_only_durable_records()
+    test_interrupted_run_resumes_and_writes_repeated_pages()
+    test_pending_llm_fallback_is_retried_without_redoing_heuristics()
+    print("✅ checkpoint checks passed")
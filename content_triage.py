@@ -0,0 +1,243 @@
+"""
+Content triage: decide what a fetched payload is before extracting dates from it.
+
+Our content_results also contain PDFs (e.g. the NDU catalog) and plain text. Parsing
+those with lxml, running the selector cascade, htmldate's extensive search and the LLM
+on them is slow and yields garbage dates. sniff_content() looks at magic bytes and
+markup density, so that:
+    HTML          -> the usual strategies
+    PDF           -> read_pdf_metadata(): /CreationDate and /ModDate of the Info
+                     dictionary, and xmp:CreateDate/xmp:ModifyDate of the XMP packet
+    plain text    -> the date scanner only
+    other binary  -> nothing to extract
+
+A payload is HTML if an HTML marker (<html, <head, <meta, ...) appears near its start. Pages
+that open with a long comment or script are searched further. Only then is a payload
+that starts with the PDF header (after whitespace or a BOM) a PDF, so an HTML page that
+mentions "%PDF-" stays HTML.
+
+read_pdf_metadata() never parses the page content. It reads the last trailer at the end
+of the file, jumps to the Info dictionary and the catalog's /Metadata stream through
+the xref table, and only falls back to searching for the object header when the
+offsets do not match (xref streams, payloads decoded to str with a lossy codec). That
+search is limited to the last and first PDF_SCAN_BYTES of the file.
+"""
+import re
+from dataclasses import dataclass
+from datetime import date
+from enum import Enum
+from typing import Dict, Optional, Tuple, Union
+
+
+class ContentKind(Enum):
+    """What a payload turned out to be."""
+    HTML = "html"
+    PDF = "pdf"
+    TEXT = "text"
+    BINARY = "binary"
+
+
+# Magic bytes of binary formats we cannot extract dates from
+_BINARY_MAGIC = (
+    b'\x89PNG', b'\xff\xd8\xff', b'GIF8', b'PK\x03\x04', b'\x1f\x8b', b'RIFF', b'\xd0\xcf\x11\xe0', b'%!PS'
+)
+
+_HTML_MARKERS_RE = re.compile(rb'<(?:!doctype\s+html|html|head|body|meta|title|div|p|article)[\s>/]', re.IGNORECASE)
+_TAG_RE = re.compile(rb'</?[a-zA-Z][^<>]{0,200}>')
+
+SNIFF_BYTES = 8192  # Bytes of the payload looked at by sniff_content
+MARKER_SCAN_BYTES = 1 << 20  # Bytes searched for HTML markers if the payload opens with markup but has none early
+MIN_TAG_DENSITY = 0.05  # Share of the sample inside tags above which a payload without HTML markers counts as markup
+PDF_TAIL_BYTES = 65536  # Bytes at the end of a PDF searched for the trailer
+PDF_SCAN_BYTES = 4 << 20  # Bytes at the end (then the start) of a PDF searched for a misplaced object
+
+
+def _to_bytes(content: Union[str, bytes]) -> bytes:
+    if isinstance(content, bytes):
+        return content
+    # Payloads decoded with latin-1 round-trip exactly; anything else is best effort
+    return content.encode('latin-1', errors='replace')
+
+
+def sniff_content(content: Union[str, bytes]) -> ContentKind:
+    """
+    Classify a payload by its magic bytes and markup density.
+
+    Args:
+        content: The fetched payload, as fetched (bytes) or decoded (str)
+    """
+    head = _to_bytes(content[:SNIFF_BYTES])
+    stripped = head.lstrip(b'\xef\xbb\xbf \t\r\n\x00')
+
+    # Image/archive magic bytes can't start an HTML page, but their compressed data can contain "<p>"
+    if stripped.startswith(_BINARY_MAGIC):
+        return ContentKind.BINARY
+    if _HTML_MARKERS_RE.search(stripped):
+        return ContentKind.HTML
+    if stripped.startswith(b'<') and len(content) > SNIFF_BYTES:
+        # Opens with markup (comments, scripts, an XML declaration) but no marker yet: look further
+        if _HTML_MARKERS_RE.search(_to_bytes(content[SNIFF_BYTES - 64:MARKER_SCAN_BYTES])):
+            return ContentKind.HTML
+    if stripped.startswith(b'%PDF-'):
+        return ContentKind.PDF
+
+    if not stripped:
+        return ContentKind.TEXT
+    # Control characters other than whitespace: some binary format we do not know
+    if sum(b < 9 or 13 < b < 32 for b in stripped[:1024]) > 0.1 * min(len(stripped), 1024):
+        return ContentKind.BINARY
+    markup = sum(len(m) for m in _TAG_RE.findall(stripped))
+    return ContentKind.HTML if markup / len(stripped) >= MIN_TAG_DENSITY else ContentKind.TEXT
+
+
+@dataclass
+class PdfMetadata:
+    """Dates from a PDF's Info dictionary and XMP packet."""
+    created: Optional[date] = None
+    modified: Optional[date] = None
+    created_raw: Optional[str] = None
+    modified_raw: Optional[str] = None
+
+
+_PDF_DATE_RE = re.compile(r'(?:D:)?(\d{4})(\d{2})?(\d{2})?')
+_XMP_DATE_RE = re.compile(r'(\d{4})(?:-(\d{2}))?(?:-(\d{2}))?')
+
+
+def parse_pdf_date(value: Optional[str]) -> Optional[date]:
+    """Parse a PDF date string ("D:20240115093000-05'00'"), missing month/day default to 1."""
+    return _parse_date_parts(_PDF_DATE_RE.match(value.strip()) if value else None)
+
+
+def parse_xmp_date(value: Optional[str]) -> Optional[date]:
+    """Parse an XMP (ISO 8601) date ("2024-01-15T09:30:00-05:00")."""
+    return _parse_date_parts(_XMP_DATE_RE.match(value.strip()) if value else None)
+
+
+def _parse_date_parts(match: Optional[re.Match]) -> Optional[date]:
+    if not match:
+        return None
+    year, month, day = match.group(1), match.group(2) or '01', match.group(3) or '01'
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def _decode_pdf_string(raw: bytes) -> str:
+    """Decode a PDF literal (without the parentheses) or hex string (with the angle brackets)."""
+    if raw.startswith(b'<'):
+        data = bytes.fromhex(re.sub(rb'[^0-9a-fA-F]', b'', raw[1:-1]).decode('ascii'))
+    else:
+        data = re.sub(rb'\\([()\\])', rb'\1', raw)
+    if data.startswith(b'\xfe\xff'):
+        return data[2:].decode('utf-16-be', errors='replace')
+    return data.decode('latin-1')
+
+
+def _dict_string(dictionary: bytes, key: bytes) -> Optional[str]:
+    match = re.search(rb'/' + key + rb'\s*(\((?:\\.|[^\\)])*\)|<[0-9a-fA-F\s]*>)', dictionary, re.DOTALL)
+    if not match:
+        return None
+    raw = match.group(1)
+    return _decode_pdf_string(raw[1:-1] if raw.startswith(b'(') else raw)
+
+
+def _parse_xref_table(data: bytes, offset: int) -> Dict[int, int]:
+    """Object number -> byte offset from the classic xref table at offset ({} if it is not one)."""
+    if data[offset:offset + 4] != b'xref':
+        return {}
+    offsets = {}
+    position = offset + 4
+    section_re = re.compile(rb'\s*(\d+)\s+(\d+)\s*?\r?\n')
+    entry_re = re.compile(rb'(\d{10})\s(\d{5})\s([nf])')
+    while True:
+        section = section_re.match(data, position)
+        if not section:
+            break
+        first, count = int(section.group(1)), int(section.group(2))
+        position = section.end()
+        for i in range(count):
+            entry = entry_re.match(data, position)
+            if not entry:
+                return offsets
+            if entry.group(3) == b'n':
+                offsets.setdefault(first + i, int(entry.group(1)))
+            position = entry.end()
+            while position < len(data) and data[position] in b' \r\n':
+                position += 1
+    return offsets
+
+
+def _object_body(data: bytes, ref: Tuple[int, int], xref: Dict[int, int]) -> Optional[bytes]:
+    """The bytes of an indirect object, up to its 'endobj'."""
+    number, generation = ref
+    header = re.compile(rb'(?<!\d)' + str(number).encode() + rb'\s+' + str(generation).encode() + rb'\s+obj\b')
+    start = None
+    offset = xref.get(number)
+    if offset is not None and header.match(data, offset):
+        start = offset
+    else:
+        # Compressed xref or shifted offsets: the last definition wins (incremental updates).
+        # Objects defined by an update are near the end; otherwise look at the start.
+        tail_start = max(0, len(data) - PDF_SCAN_BYTES)
+        for match in header.finditer(data, tail_start):
+            start = match.start()
+        if start is None and tail_start > 0:
+            for match in header.finditer(data, 0, min(tail_start, PDF_SCAN_BYTES)):
+                start = match.start()
+    if start is None:
+        return None
+    end = data.find(b'endobj', start)
+    return data[start:end if end != -1 else len(data)]
+
+
+def _ref(dictionary: bytes, key: bytes) -> Optional[Tuple[int, int]]:
+    match = re.search(rb'/' + key + rb'\s+(\d+)\s+(\d+)\s+R', dictionary)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def _xmp_value(packet: bytes, name: bytes) -> Optional[str]:
+    # Attribute form (xmp:CreateDate="...") or element form (<xmp:CreateDate>...</xmp:CreateDate>)
+    match = (re.search(rb'xmp:' + name + rb'\s*=\s*"([^"]+)"', packet) or
+             re.search(rb'<xmp:' + name + rb'>([^<]+)</xmp:' + name + rb'>', packet))
+    return match.group(1).decode('utf-8', errors='replace') if match else None
+
+
+def read_pdf_metadata(content: Union[str, bytes]) -> PdfMetadata:
+    """
+    Read the creation and modification date of a PDF from its trailer, Info dictionary and XMP packet.
+
+    The Info dictionary is preferred; the XMP packet fills in what it lacks (PDF 2.0 files
+    may only have XMP). A compressed XMP stream is skipped.
+    """
+    data = _to_bytes(content)
+    tail = data[-PDF_TAIL_BYTES:]
+    metadata = PdfMetadata()
+
+    # The last trailer (or xref stream dictionary) describes the current revision
+    startxref = re.findall(rb'startxref\s+(\d+)', tail)
+    xref = _parse_xref_table(data, int(startxref[-1])) if startxref else {}
+    trailers = list(re.finditer(rb'trailer\s*<<(.*?)>>\s*startxref', tail, re.DOTALL))
+    trailer = trailers[-1].group(1) if trailers else tail
+
+    info_ref = _ref(trailer, b'Info')
+    info = _object_body(data, info_ref, xref) if info_ref else None
+    if info is not None:
+        metadata.created_raw = _dict_string(info, b'CreationDate')
+        metadata.modified_raw = _dict_string(info, b'ModDate')
+        metadata.created = parse_pdf_date(metadata.created_raw)
+        metadata.modified = parse_pdf_date(metadata.modified_raw)
+
+    if metadata.created is None or metadata.modified is None:
+        root_ref = _ref(trailer, b'Root')
+        root = _object_body(data, root_ref, xref) if root_ref else None
+        metadata_ref = _ref(root, b'Metadata') if root is not None else None
+        stream = _object_body(data, metadata_ref, xref) if metadata_ref else None
+        if stream is not None and b'/FlateDecode' not in stream.split(b'stream', 1)[0]:
+            if metadata.created is None:
+                raw = _xmp_value(stream, b'CreateDate')
+                metadata.created, metadata.created_raw = parse_xmp_date(raw), raw
+            if metadata.modified is None:
+                raw = _xmp_value(stream, b'ModifyDate')
+                metadata.modified, metadata.modified_raw = parse_xmp_date(raw), raw
+    return metadata
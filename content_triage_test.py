@@ -0,0 +1,64 @@
+'''
+Checks of the payload triage and the PDF metadata reader (content_triage.py).
+Run with pytest, or directly: python content_triage_test.py
+'''
+from datetime import date
+from content_triage import ContentKind, SNIFF_BYTES, read_pdf_metadata, sniff_content
+
+
+def _pdf(shift: int = 0) -> bytes:
+    """A minimal PDF with an Info dictionary; shift moves the objects away from their xref offsets."""
+    objects = [
+        b"1 0 obj\n<< /Type /Catalog >>\nendobj\n",
+        b"2 0 obj\n<< /CreationDate (D:20240115093000-05'00') /ModDate (D:20240220) >>\nendobj\n",
+    ]
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for obj in objects:
+        offsets.append(len(body))
+        body += obj
+    xref_at = len(body)
+    body += b"xref\n0 3\n0000000000 65535 f \n"
+    body += b"".join(b"%010d 00000 n \n" % (offset + shift) for offset in offsets)
+    body += b"trailer\n<< /Size 3 /Root 1 0 R /Info 2 0 R >>\nstartxref\n%d\n%%%%EOF\n" % xref_at
+    return body
+
+
+def test_html_mentioning_the_pdf_header_is_html():
+    page = "<html><head><title>Viewer %PDF-1.4</title></head><body><p>Jan 5, 2024</p></body></html>"
+    assert sniff_content(page) is ContentKind.HTML
+    assert sniff_content(page.encode('utf-8')) is ContentKind.HTML
+
+
+def test_pdf_header_only_at_the_start():
+    assert sniff_content(_pdf()) is ContentKind.PDF
+    assert sniff_content(b"\xef\xbb\xbf\r\n" + _pdf()) is ContentKind.PDF
+    assert sniff_content(b"Some notes about the %PDF-1.4 format, written in plain text.") is ContentKind.TEXT
+
+
+def test_html_after_long_leading_comment_or_script():
+    comment = "<!-- " + "x" * (2 * SNIFF_BYTES) + " -->"
+    script = "<script>" + "var a = 1;" * SNIFF_BYTES + "</script>"
+    for lead in (comment, script):
+        assert sniff_content(lead + "<html><body><p>Jan 5, 2024</p></body></html>") is ContentKind.HTML
+
+
+def test_binary_and_text():
+    assert sniff_content(b"\x89PNG\r\n\x1a\n" + b"<p>" * 100) is ContentKind.BINARY
+    assert sniff_content("Minutes of the meeting held on 5 March 2024.") is ContentKind.TEXT
+
+
+def test_pdf_metadata_with_and_without_valid_xref():
+    for shift in (0, 7):
+        metadata = read_pdf_metadata(_pdf(shift))
+        assert metadata.created == date(2024, 1, 15), shift
+        assert metadata.modified == date(2024, 2, 20), shift
+
+
+if __name__ == "__main__":
+    test_html_mentioning_the_pdf_header_is_html()
+    test_pdf_header_only_at_the_start()
+    test_html_after_long_leading_comment_or_script()
+    test_binary_and_text()
+    test_pdf_metadata_with_and_without_valid_xref()
+    print("✅ content triage checks passed")
@@ -0,0 +1,263 @@
+"""
+CorpusIndex: Columnar date index over the results of a batch run.
+
+Questions like "which pages for question N have any date after the cutoff" or
+"what is the latest date per URL" are answered with vectorized NumPy operations
+instead of re-reading date_extractor_result.json and looping in Python.
+
+Layout of an index directory (every .npy file is memory-mapped on load):
+    question_ids.npy   int64[n_docs]            (-1 if the record has no question id)
+    published.npy      datetime64[D][n_docs]    (NaT if not found)
+    modified.npy       datetime64[D][n_docs]
+    last.npy           datetime64[D][n_docs]
+    dates.npy          datetime64[D][n_dates]   every all_dates_found entry, grouped by document
+    offsets.npy        int64[n_docs + 1]        dates of document i are dates[offsets[i]:offsets[i + 1]]
+    date_docs.npy      int64[n_dates]           document of each entry in dates
+    urls.json          list of the n_docs urls
+
+Usage:
+    python corpus_index.py build data/extract_results/date_extractor_result.json data/extract_results/date_index
+    python corpus_index.py after data/extract_results/date_index 2024-01-01 --question 7403
+    python corpus_index.py latest data/extract_results/date_index --k 10
+"""
+import argparse
+import json
+import os
+from datetime import date
+from typing import Any, Dict, List, Optional, Union
+import numpy as np
+
+
+NAT = np.datetime64('NaT', 'D')
+DATE_COLUMNS = ('published', 'modified', 'last')
+_ARRAYS = ('question_ids', 'published', 'modified', 'last', 'dates', 'offsets', 'date_docs')
+
+DateLike = Union[str, date, np.datetime64]
+
+
+def _to_day(value: Optional[str]) -> np.datetime64:
+    """Convert "2021-04-26" or "2021-04-26 (method: ..., confidence: ...)" to datetime64[D]."""
+    if not value:
+        return NAT
+    try:
+        return np.datetime64(value[:10], 'D')
+    except ValueError:
+        return NAT
+
+
+class CorpusIndex:
+    """Date columns of every document in a batch run, with vectorized range, cutoff and top-k queries."""
+
+    def __init__(self, urls: List[str], arrays: Dict[str, np.ndarray]):
+        self.urls = urls
+        self.question_ids = arrays['question_ids']
+        self.published = arrays['published']
+        self.modified = arrays['modified']
+        self.last = arrays['last']
+        self.dates = arrays['dates']
+        self.offsets = arrays['offsets']
+        self.date_docs = arrays['date_docs']
+        self._url_index: Optional[Dict[str, List[int]]] = None
+        self._url_codes: Optional[np.ndarray] = None  # Index of each document's URL in _url_names
+        self._url_names: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    # ===== Build / persist =====
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> 'CorpusIndex':
+        """Build the index from result records (the entries of date_extractor_result.json)."""
+        n = len(records)
+        counts = np.fromiter((len(r.get('all_dates_found') or []) for r in records), dtype=np.int64, count=n)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        arrays = {
+            'question_ids': np.fromiter(
+                (r['question_id'] if r.get('question_id') is not None else -1 for r in records),
+                dtype=np.int64, count=n
+            ),
+            'published': np.array([_to_day(r.get('published_date')) for r in records], dtype='datetime64[D]'),
+            'modified': np.array([_to_day(r.get('modified_date')) for r in records], dtype='datetime64[D]'),
+            'last': np.array([_to_day(r.get('last_date_found')) for r in records], dtype='datetime64[D]'),
+            'dates': np.array(
+                [_to_day(d) for r in records for d in (r.get('all_dates_found') or [])], dtype='datetime64[D]'
+            ),
+            'offsets': offsets,
+            'date_docs': np.repeat(np.arange(n, dtype=np.int64), counts),
+        }
+        return cls([r['url'] for r in records], arrays)
+
+    @classmethod
+    def from_result_file(cls, filepath: str) -> 'CorpusIndex':
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return cls.from_records(json.load(f))
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "urls.json"), 'w', encoding='utf-8') as f:
+            json.dump(self.urls, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'CorpusIndex':
+        """Load an index; with mmap=True the columns are memory-mapped instead of read into memory."""
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r' if mmap else None)
+            for name in _ARRAYS
+        }
+        with open(os.path.join(directory, "urls.json"), 'r', encoding='utf-8') as f:
+            urls = json.load(f)
+        return cls(urls, arrays)
+
+    # ===== Queries =====
+    # Every query returns document indices; use urls_of()/records_of() to look them up.
+
+    def _doc_mask(self, question_id: Optional[int]) -> np.ndarray:
+        if question_id is None:
+            return np.ones(len(self), dtype=bool)
+        return self.question_ids == question_id
+
+    def _column(self, column: str) -> np.ndarray:
+        if column not in DATE_COLUMNS:
+            raise ValueError(f"Unknown date column {column!r}, expected one of {DATE_COLUMNS}")
+        return getattr(self, column)
+
+    def docs_with_date_in_range(
+        self, start: Optional[DateLike] = None, end: Optional[DateLike] = None, question_id: Optional[int] = None
+    ) -> np.ndarray:
+        """Documents with any found date in [start, end] (either bound may be open)."""
+        mask = ~np.isnat(self.dates)
+        if start is not None:
+            mask &= self.dates >= np.datetime64(start, 'D')
+        if end is not None:
+            mask &= self.dates <= np.datetime64(end, 'D')
+        docs = np.unique(self.date_docs[mask])
+        if question_id is not None:
+            docs = docs[self.question_ids[docs] == question_id]
+        return docs
+
+    def docs_with_date_after(self, cutoff: DateLike, question_id: Optional[int] = None) -> np.ndarray:
+        """Documents with any found date strictly after the cutoff."""
+        return self.docs_with_date_in_range(np.datetime64(cutoff, 'D') + 1, None, question_id)
+
+    def docs_before_cutoff(
+        self, cutoff: DateLike, column: str = 'last', question_id: Optional[int] = None, include_missing: bool = False
+    ) -> np.ndarray:
+        """
+        Documents whose date column is on or before the cutoff.
+
+        Args:
+            cutoff: The cutoff date
+            column: 'published', 'modified' or 'last'
+            question_id: Only consider documents of this question
+            include_missing: Also return documents without a date in the column
+        """
+        values = self._column(column)
+        missing = np.isnat(values)
+        mask = (values <= np.datetime64(cutoff, 'D')) & ~missing
+        if include_missing:
+            mask |= missing
+        return np.flatnonzero(mask & self._doc_mask(question_id))
+
+    def top_k_latest(self, k: int, column: str = 'last', question_id: Optional[int] = None) -> np.ndarray:
+        """The k documents with the latest date in the column, latest first."""
+        values = self._column(column)
+        if k <= 0:
+            return np.array([], dtype=np.int64)
+        candidates = np.flatnonzero(~np.isnat(values) & self._doc_mask(question_id))
+        if len(candidates) > k:
+            # Unordered top k first, then sort only those
+            keys = values[candidates].astype(np.int64)
+            candidates = candidates[np.argpartition(-keys, k - 1)[:k]]
+        return candidates[np.argsort(values[candidates])[::-1]]
+
+    def _docs_of_url(self, url: str) -> np.ndarray:
+        if self._url_index is None:
+            self._url_index = {}
+            for i, u in enumerate(self.urls):
+                self._url_index.setdefault(u, []).append(i)
+        return np.array(self._url_index.get(url, []), dtype=np.int64)
+
+    def latest_date(self, url: str, question_id: Optional[int] = None) -> Optional[np.datetime64]:
+        """The latest found date of a URL (across questions unless one is given)."""
+        docs = self._docs_of_url(url)
+        if question_id is not None:
+            docs = docs[self.question_ids[docs] == question_id]
+        values = self.last[docs]
+        values = values[~np.isnat(values)]
+        return values.max() if len(values) else None
+
+    def latest_per_url(self) -> Dict[str, np.datetime64]:
+        """The latest found date of every URL that has one."""
+        if self._url_codes is None:
+            names: Dict[str, int] = {}
+            self._url_codes = np.fromiter(
+                (names.setdefault(u, len(names)) for u in self.urls), dtype=np.int64, count=len(self.urls)
+            )
+            self._url_names = list(names)
+        docs = np.flatnonzero(~np.isnat(self.last))
+        codes = self._url_codes[docs]
+        last = self.last[docs]
+        # By URL, latest date first; the first document of each URL has its latest date
+        order = np.lexsort((-last.astype(np.int64), codes))
+        url_codes, first = np.unique(codes[order], return_index=True)
+        return dict(zip((self._url_names[code] for code in url_codes), last[order[first]]))
+
+    def dates_of(self, doc: int) -> np.ndarray:
+        return self.dates[self.offsets[doc]:self.offsets[doc + 1]]
+
+    def urls_of(self, docs: np.ndarray) -> List[str]:
+        return [self.urls[i] for i in docs]
+
+    def records_of(self, docs: np.ndarray) -> List[Dict[str, Any]]:
+        """Plain dicts for printing or dumping the documents of a query."""
+        def day(value):
+            return None if np.isnat(value) else str(value)
+        return [
+            {
+                'question_id': int(self.question_ids[i]) if self.question_ids[i] >= 0 else None,
+                'url': self.urls[i],
+                'published_date': day(self.published[i]),
+                'modified_date': day(self.modified[i]),
+                'last_date_found': day(self.last[i]),
+            }
+            for i in docs
+        ]
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Build or query a corpus date index.")
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Build an index from a result file")
+    build_parser.add_argument('result_file')
+    build_parser.add_argument('index_dir')
+
+    after_parser = subparsers.add_parser('after', help="Pages with any date after the cutoff")
+    after_parser.add_argument('index_dir')
+    after_parser.add_argument('cutoff')
+    after_parser.add_argument('--question', type=int)
+
+    latest_parser = subparsers.add_parser('latest', help="Pages with the latest dates")
+    latest_parser.add_argument('index_dir')
+    latest_parser.add_argument('--k', type=int, default=10)
+    latest_parser.add_argument('--column', default='last', choices=DATE_COLUMNS)
+    latest_parser.add_argument('--question', type=int)
+
+    args = arg_parser.parse_args()
+    if args.command == 'build':
+        index = CorpusIndex.from_result_file(args.result_file)
+        index.save(args.index_dir)
+        print(f"✅ Indexed {len(index)} pages and {len(index.dates)} dates into '{args.index_dir}'")
+    elif args.command == 'after':
+        index = CorpusIndex.load(args.index_dir)
+        docs = index.docs_with_date_after(args.cutoff, question_id=args.question)
+        print(json.dumps(index.records_of(docs), indent=2))
+    elif args.command == 'latest':
+        index = CorpusIndex.load(args.index_dir)
+        docs = index.top_k_latest(args.k, column=args.column, question_id=args.question)
+        print(json.dumps(index.records_of(docs), indent=2))
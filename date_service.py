@@ -0,0 +1,487 @@
+"""
+DateExtractionService: HTMLDateExtractor as a long-running HTTP service.
+
+Services that need page dates call this one instead of importing the extractor and
+paying its import and warm-up cost themselves. The caches (parsed dates, dateparser
+parsers, boilerplate masks) stay warm across requests.
+
+Endpoints:
+    POST /extract   one page   {"html": "...", "url": "...", "id": ...}
+                    or a batch {"pages": [{"html": ..., "url": ..., "id": ...}, ...], "use_llm_as_fallback": false}
+                    as JSON or msgpack (Content-Type: application/msgpack); the answer uses the same format
+    GET  /health    liveness
+    GET  /metrics   request counts, queue depth, batch sizes and per-strategy latency
+
+Pages from concurrent requests are queued and handed to the worker pool in batches
+of up to max_batch_size, so a burst of single-page requests costs one executor
+round trip per batch instead of one per page. A batch is split across the workers
+unless enough pages are queued to keep them all busy, and a page that fails only
+fails its own request (or its own entry of a batch request). If a worker process dies,
+the pages of its batch get an error and the pool is replaced, so later requests are served.
+
+Usage:
+    python date_service.py serve --port 8085 --workers 4
+    python date_service.py bench --url http://localhost:8085 --concurrency 32 --requests 2000 --format msgpack
+"""
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import math
+import random
+import time
+from collections import Counter, deque
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+import msgpack
+import numpy as np
+from aiohttp import web
+from boilerplate import BoilerplateMaskCache
+from html_date_extractor import HTMLDateExtractor
+from llm_date_extractor import LLMDateExtractor, MAX_CONCURRENT_REQ
+from shared import DateResult, date_result_to_dict
+
+
+logger = logging.getLogger(__name__)
+
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+
+class PageExtractionError(RuntimeError):
+    """Raised for (and returned by workers for) a page whose extraction failed."""
+
+
+# (html, url) of one page, and what a worker returns for it: (result or error, timings)
+Page = Tuple[str, Optional[str]]
+PageOutcome = Tuple[Union[DateResult, PageExtractionError], Dict[str, float]]
+
+
+def _extract_batch(extractor: HTMLDateExtractor, pages: List[Page]) -> List[PageOutcome]:
+    # The date strings shared by the pages of the batch are parsed once (see HTMLDateExtractor.extract_many)
+    timings: List[Dict[str, float]] = [{} for _ in pages]
+    try:
+        results: List[Union[DateResult, PageExtractionError]] = extractor.extract_many(
+            [html_content for html_content, _ in pages], urls=[url for _, url in pages], timings=timings
+        )
+    except Exception as e:
+        # Redo the pages one by one, so only the page that fails gets an error
+        logger.warning(f"Batch extraction of {len(pages)} pages failed ({e}), extracting them one by one")
+        results = []
+        for (html_content, url), page_timings in zip(pages, timings):
+            page_timings.clear()
+            try:
+                results.append(extractor.extract_from_html(html_content, url=url, timings=page_timings))
+            except Exception as e:
+                logger.error(f"Extraction failed for {url}: {e}")
+                results.append(PageExtractionError(f"extraction failed: {e}"))
+    for page_timings in timings:
+        # The steps of one page are interleaved with those of the rest of the batch; their sum is its time
+        page_timings['total'] = sum(page_timings.values())
+    return list(zip(results, timings))
+
+
+# Each worker process of a process-mode service owns one extractor
+_worker_extractor: Optional[HTMLDateExtractor] = None
+
+
+def _init_worker(extractor_kwargs: Dict[str, Any]):
+    global _worker_extractor
+    _worker_extractor = HTMLDateExtractor(**extractor_kwargs)
+    if _worker_extractor.boilerplate_cache is not None:
+        _worker_extractor.boilerplate_cache.save_at_exit()
+
+
+def _extract_batch_in_worker(pages: List[Page]) -> List[PageOutcome]:
+    return _extract_batch(_worker_extractor, pages)
+
+
+class DateExtractionService:
+    """Queues pages from concurrent requests and extracts them in batches on a worker pool."""
+
+    def __init__(
+        self,
+        workers: int = 4,
+        worker_mode: str = "thread",
+        max_batch_size: int = 16,
+        max_batch_wait: float = 0.005,
+        request_timeout: float = 120.0,
+        extractor_kwargs: Optional[Dict[str, Any]] = None,
+        llm_kwargs: Optional[Dict[str, Any]] = None,
+        llm_concurrency: int = MAX_CONCURRENT_REQ
+    ):
+        """
+        Initialize the service.
+
+        Args:
+            workers: Size of the worker pool (and maximum number of batches in flight)
+            worker_mode: "thread" shares one extractor and its caches between the workers;
+                "process" gives every worker process its own extractor
+            max_batch_size: Maximum number of pages handed to a worker at once
+            max_batch_wait: Seconds to wait for more pages before dispatching a partial batch
+            request_timeout: Seconds before a request is answered with 504
+            extractor_kwargs: Keyword arguments for HTMLDateExtractor
+            llm_kwargs: Keyword arguments for LLMDateExtractor, used for use_llm_as_fallback requests
+            llm_concurrency: Maximum number of in-flight LLM fallbacks
+        """
+        if worker_mode not in ("process", "thread"):
+            raise ValueError(f"Unknown worker_mode {worker_mode!r}, expected 'process' or 'thread'")
+        self.workers = workers
+        self.worker_mode = worker_mode
+        self.max_batch_size = max_batch_size
+        self.max_batch_wait = max_batch_wait
+        self.request_timeout = request_timeout
+        self.extractor_kwargs = extractor_kwargs or {'disable_logger': True}
+        self.llm_kwargs = llm_kwargs or {}
+        self.llm_concurrency = llm_concurrency
+
+        self.extractor: Optional[HTMLDateExtractor] = None
+        self.executor: Optional[Executor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_slots: Optional[asyncio.Semaphore] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._llm_extractor: Optional[LLMDateExtractor] = None
+        self._llm_semaphore: Optional[asyncio.Semaphore] = None
+
+        # Metrics
+        self.started_at = time.time()
+        self.counters = Counter()
+        self.batches_in_flight = 0
+        self.batch_sizes: Deque[int] = deque(maxlen=1000)
+        self.latencies: Dict[str, Deque[float]] = {}
+
+        self.app = web.Application(client_max_size=256 * 1024 ** 2)
+        self.app.router.add_post('/extract', self.handle_extract)
+        self.app.router.add_get('/health', self.handle_health)
+        self.app.router.add_get('/metrics', self.handle_metrics)
+        self.app.on_startup.append(self._on_startup)
+        self.app.on_cleanup.append(self._on_cleanup)
+
+    # ===== Lifecycle =====
+
+    def _new_executor(self) -> Executor:
+        if self.worker_mode == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='date-service')
+        return ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(self.extractor_kwargs,)
+        )
+
+    async def _on_startup(self, app: web.Application):
+        if self.worker_mode == "thread":
+            self.extractor = HTMLDateExtractor(**self.extractor_kwargs)
+        self.executor = self._new_executor()
+        self._queue = asyncio.Queue()
+        self._batch_slots = asyncio.Semaphore(self.workers)
+        self._llm_semaphore = asyncio.Semaphore(self.llm_concurrency)
+        self._batcher = asyncio.create_task(self._batch_loop())
+        logger.info(f"Date service started with {self.workers} {self.worker_mode} workers")
+
+    async def _on_cleanup(self, app: web.Application):
+        if self._batcher is not None:
+            self._batcher.cancel()
+        if self._llm_extractor is not None:
+            await self._llm_extractor.__aexit__(None, None, None)
+        if self.executor is not None:
+            # Process workers save their boilerplate masks as they exit
+            self.executor.shutdown(wait=self.worker_mode == "process", cancel_futures=True)
+        if self.extractor is not None and self.extractor.boilerplate_cache is not None:
+            self.extractor.boilerplate_cache.save(compact=True)
+        elif self.extractor_kwargs.get('boilerplate_cache_path'):
+            BoilerplateMaskCache(self.extractor_kwargs['boilerplate_cache_path']).save(compact=True)
+
+    # ===== Batching =====
+
+    async def extract(self, html_content: str, url: Optional[str] = None) -> DateResult:
+        """Queue one page for the next batch and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((html_content, url), future))
+        return await future
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # Collect what arrives within max_batch_wait, up to max_batch_size pages
+            deadline = loop.time() + self.max_batch_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0 and self._queue.empty():
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), max(remaining, 0)))
+                except asyncio.TimeoutError:
+                    break
+            # Drop pages whose request already gave up
+            batch = [(page, future) for page, future in batch if not future.done()]
+            # A batch runs on one worker: spread it over the workers unless the queue keeps them busy anyway
+            size = max(1, math.ceil((len(batch) + self._queue.qsize()) / self.workers))
+            for i in range(0, len(batch), size):
+                await self._batch_slots.acquire()
+                asyncio.create_task(self._run_batch(batch[i:i + size]))
+
+    async def _run_batch(self, batch: List[Tuple[Page, asyncio.Future]]):
+        loop = asyncio.get_running_loop()
+        pages = [page for page, _ in batch]
+        executor = self.executor
+        self.batches_in_flight += 1
+        self.batch_sizes.append(len(pages))
+        try:
+            if self.worker_mode == "thread":
+                call = functools.partial(_extract_batch, self.extractor, pages)
+            else:
+                call = functools.partial(_extract_batch_in_worker, pages)
+            outcomes = await loop.run_in_executor(executor, call)
+        except Exception as e:
+            # The worker itself failed (e.g. a process crashed): every page of the batch gets an error
+            logger.error(f"Batch of {len(pages)} pages failed: {e!r}")
+            self.counters['batch_errors'] += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(PageExtractionError(f"worker failed: {e!r}"))
+            # A broken pool fails every later submit; the first batch to see it replaces it
+            if isinstance(e, BrokenExecutor) and self.executor is executor:
+                logger.warning("Worker pool is broken, starting a new one")
+                self.counters['pool_restarts'] += 1
+                self.executor = self._new_executor()
+                executor.shutdown(wait=False, cancel_futures=True)
+            return
+        finally:
+            self.batches_in_flight -= 1
+            self._batch_slots.release()
+
+        for (_, future), (result, timings) in zip(batch, outcomes):
+            for name, seconds in timings.items():
+                self._record_latency(name, seconds)
+            if future.done():
+                continue
+            if isinstance(result, PageExtractionError):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _record_latency(self, name: str, seconds: float):
+        if name not in self.latencies:
+            self.latencies[name] = deque(maxlen=5000)
+        self.latencies[name].append(seconds)
+
+    async def _llm_fallback(self, html_content: str, result: DateResult) -> DateResult:
+        if not HTMLDateExtractor.needs_llm_fallback(result):
+            return result
+        if self._llm_extractor is None:
+            self._llm_extractor = await LLMDateExtractor(**self.llm_kwargs).__aenter__()
+        start = time.perf_counter()
+        async with self._llm_semaphore:
+            llm_result = await self._llm_extractor.extract_dates(html_content=html_content)
+        self._record_latency('llm', time.perf_counter() - start)
+        return HTMLDateExtractor.merge_llm_result(result, llm_result)
+
+    # ===== HTTP =====
+
+    @staticmethod
+    def _is_msgpack(content_type: str) -> bool:
+        return content_type.split(';')[0].strip().lower() in MSGPACK_TYPES
+
+    def _respond(self, body: Any, use_msgpack: bool, status: int = 200) -> web.Response:
+        if use_msgpack:
+            return web.Response(body=msgpack.packb(body, use_bin_type=True), status=status,
+                                content_type='application/msgpack')
+        return web.json_response(body, status=status)
+
+    async def handle_extract(self, request: web.Request) -> web.Response:
+        start = time.perf_counter()
+        use_msgpack = self._is_msgpack(request.content_type)
+        try:
+            raw = await request.read()
+            payload = msgpack.unpackb(raw, raw=False) if use_msgpack else json.loads(raw)
+            is_batch = 'pages' in payload
+            pages = payload['pages'] if is_batch else [payload]
+            use_llm = bool(payload.get('use_llm_as_fallback', False))
+            for page in pages:
+                if not isinstance(page.get('html'), str):
+                    raise ValueError("every page needs an 'html' string")
+        except Exception as e:
+            self.counters['bad_requests'] += 1
+            return self._respond({'error': f"invalid request: {e}"}, use_msgpack, status=400)
+
+        self.counters['requests'] += 1
+        self.counters['pages'] += len(pages)
+
+        async def one(page: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                result = await self.extract(page['html'], page.get('url'))
+            except PageExtractionError as e:
+                self.counters['page_errors'] += 1
+                if not is_batch:
+                    raise
+                return {'id': page.get('id'), 'url': page.get('url'), 'error': str(e)}
+            if use_llm:
+                result = await self._llm_fallback(page['html'], result)
+            return {'id': page.get('id'), 'url': page.get('url'), **date_result_to_dict(result)}
+
+        try:
+            results = await asyncio.wait_for(asyncio.gather(*(one(page) for page in pages)), self.request_timeout)
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            return self._respond({'error': f"timed out after {self.request_timeout}s"}, use_msgpack, status=504)
+        except Exception as e:
+            self.counters['errors'] += 1
+            return self._respond({'error': str(e)}, use_msgpack, status=500)
+        finally:
+            self._record_latency('request', time.perf_counter() - start)
+
+        return self._respond({'results': results} if is_batch else results[0], use_msgpack)
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        healthy = self._batcher is not None and not self._batcher.done()
+        return web.json_response(
+            {'status': 'ok' if healthy else 'down', 'uptime_seconds': round(time.time() - self.started_at, 1)},
+            status=200 if healthy else 503
+        )
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        latency = {}
+        for name, values in sorted(self.latencies.items()):
+            p50, p95, p99 = np.percentile(values, [50, 95, 99]) if values else (0.0, 0.0, 0.0)
+            latency[name] = {
+                'count': len(values),
+                'mean_ms': round(1000 * float(np.mean(values)), 3) if values else 0.0,
+                'p50_ms': round(1000 * float(p50), 3),
+                'p95_ms': round(1000 * float(p95), 3),
+                'p99_ms': round(1000 * float(p99), 3),
+            }
+        metrics = {
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'worker_mode': self.worker_mode,
+            'workers': self.workers,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'batches_in_flight': self.batches_in_flight,
+            'avg_batch_size': round(float(np.mean(self.batch_sizes)), 2) if self.batch_sizes else 0.0,
+            **self.counters,
+            # Per step/strategy over the most recent pages, plus 'total' per page and 'request' per request
+            'latency': latency,
+        }
+        if self.extractor is not None:
+            metrics['prescreen'] = dict(self.extractor.prescreen_stats)
+            if self.extractor._parsed_dates is not None:
+                metrics['parsed_date_cache'] = {
+                    'hits': self.extractor._parsed_dates.hits, 'misses': self.extractor._parsed_dates.misses
+                }
+        return web.json_response(metrics)
+
+
+# ===== Benchmark client =====
+
+def _bench_pages(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Synthetic article pages with a date in a random place."""
+    rnd = random.Random(seed)
+    pages = []
+    for i in range(n):
+        y, m, d = rnd.randint(2015, 2025), rnd.randint(1, 12), rnd.randint(1, 28)
+        where = i % 3
+        head = f'<meta property="article:published_time" content="{y}-{m:02d}-{d:02d}T08:00:00Z">' if where == 0 else ''
+        byline = f'<time datetime="{y}-{m:02d}-{d:02d}">{d}/{m}/{y}</time>' if where == 1 else ''
+        paragraphs = ''.join(f"<p>Paragraph {k} of article {i}, see the {2000 + k} report.</p>" for k in range(40))
+        pages.append({
+            'id': i,
+            'url': f"https://site{i % 7}.example/article/{i}",
+            'html': f"<html lang='en'><head>{head}</head><body><article>{byline}{paragraphs}</article>"
+                    f"<footer>© {y} site{i % 7}</footer></body></html>"
+        })
+    return pages
+
+
+async def run_benchmark(
+    url: str, n_requests: int, concurrency: int, batch_size: int = 1, use_msgpack: bool = False
+) -> Dict[str, Any]:
+    """
+    Send n_requests requests of batch_size pages each with at most `concurrency` in flight.
+
+    Returns:
+        Pages per second and request latency percentiles in milliseconds
+    """
+    import aiohttp
+
+    pages = _bench_pages(n_requests * batch_size)
+    content_type = MSGPACK_TYPES[0] if use_msgpack else 'application/json'
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    async with aiohttp.ClientSession() as session:
+        async def one(i: int):
+            nonlocal failures
+            chunk = pages[i * batch_size:(i + 1) * batch_size]
+            payload = {'pages': chunk} if batch_size > 1 else chunk[0]
+            body = msgpack.packb(payload, use_bin_type=True) if use_msgpack else json.dumps(payload).encode('utf-8')
+            async with semaphore:
+                t0 = time.perf_counter()
+                try:
+                    async with session.post(f"{url}/extract", data=body, headers={'Content-Type': content_type}) as resp:
+                        await resp.read()
+                        if resp.status != 200:
+                            failures += 1
+                except aiohttp.ClientError:
+                    failures += 1
+                latencies.append(time.perf_counter() - t0)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n_requests)))
+        elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'requests': n_requests,
+        'batch_size': batch_size,
+        'concurrency': concurrency,
+        'format': 'msgpack' if use_msgpack else 'json',
+        'failures': failures,
+        'seconds': round(elapsed, 3),
+        'pages_per_second': round(n_requests * batch_size / elapsed, 2),
+        'p50_ms': round(1000 * float(p50), 2),
+        'p95_ms': round(1000 * float(p95), 2),
+        'p99_ms': round(1000 * float(p99), 2),
+    }
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Date extraction HTTP service and its benchmark client.")
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="Run the service")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8085)
+    serve_parser.add_argument('--workers', type=int, default=4)
+    serve_parser.add_argument('--worker-mode', choices=['thread', 'process'], default='thread')
+    serve_parser.add_argument('--max-batch-size', type=int, default=16)
+    serve_parser.add_argument('--max-batch-wait-ms', type=float, default=5.0)
+    serve_parser.add_argument('--boilerplate-cache', help="JSON file of learned per-domain template masks")
+    serve_parser.add_argument('--lean-parse', action='store_true',
+                              help="Drop style, svg and non-JSON-LD scripts at parse time (see HTMLDateExtractor)")
+
+    bench_parser = subparsers.add_parser('bench', help="Measure the throughput and latency of a running service")
+    bench_parser.add_argument('--url', default='http://127.0.0.1:8085')
+    bench_parser.add_argument('--requests', type=int, default=1000)
+    bench_parser.add_argument('--concurrency', type=int, default=32)
+    bench_parser.add_argument('--batch-size', type=int, default=1, help="Pages per request")
+    bench_parser.add_argument('--format', choices=['json', 'msgpack'], default='json')
+
+    args = arg_parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.command == 'serve':
+        extractor_kwargs = {'disable_logger': True}
+        if args.boilerplate_cache:
+            extractor_kwargs['boilerplate_cache_path'] = args.boilerplate_cache
+        if args.lean_parse:
+            extractor_kwargs['lean_parse'] = True
+        service = DateExtractionService(
+            workers=args.workers,
+            worker_mode=args.worker_mode,
+            max_batch_size=args.max_batch_size,
+            max_batch_wait=args.max_batch_wait_ms / 1000,
+            extractor_kwargs=extractor_kwargs
+        )
+        web.run_app(service.app, host=args.host, port=args.port, access_log=None)
+    else:
+        report = asyncio.run(run_benchmark(
+            args.url, args.requests, args.concurrency, args.batch_size, use_msgpack=args.format == 'msgpack'
+        ))
+        print(json.dumps(report, indent=2))
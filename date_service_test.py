@@ -0,0 +1,66 @@
+'''
+Checks of the date extraction service (date_service.py): batch requests and worker failures.
+Run with pytest, or directly: python date_service_test.py
+'''
+import asyncio
+from aiohttp.test_utils import TestClient, TestServer
+from date_service import DateExtractionService
+
+
+def _pages(n: int):
+    return [
+        {'id': i, 'url': f"https://example.com/{i}",
+         'html': f'<html><head><meta property="article:published_time" content="2024-03-{i + 1:02d}"></head>'
+                 f'<body><p>Story {i}.</p></body></html>'}
+        for i in range(n)
+    ]
+
+
+async def _with_service(service: DateExtractionService, test):
+    client = TestClient(TestServer(service.app))
+    await client.start_server()
+    try:
+        return await test(client)
+    finally:
+        await client.close()
+
+
+def test_batch_request():
+    async def test(client):
+        response = await client.post('/extract', json={'pages': _pages(5)})
+        assert response.status == 200
+        results = (await response.json())['results']
+        assert [result['id'] for result in results] == list(range(5))
+        assert [result['published_date'][:10] for result in results] == [f"2024-03-{i + 1:02d}" for i in range(5)]
+
+    asyncio.run(_with_service(DateExtractionService(workers=2), test))
+
+
+def test_worker_crash_fails_its_pages_and_the_pool_is_replaced():
+    service = DateExtractionService(workers=1, worker_mode="process", max_batch_size=4)
+
+    async def test(client):
+        assert (await client.post('/extract', json=_pages(1)[0])).status == 200
+        broken = service.executor
+        for process in list(broken._processes.values()):
+            process.kill()
+
+        response = await client.post('/extract', json={'pages': _pages(4)})
+        # Every page of the batch reports the failure, the request itself succeeds
+        assert response.status == 200
+        results = (await response.json())['results']
+        assert [result['id'] for result in results] == list(range(4))
+        assert all(result['error'].startswith("worker failed") for result in results), results
+
+        assert service.executor is not broken and service.counters['pool_restarts'] == 1
+        response = await client.post('/extract', json={'pages': _pages(4)})
+        results = (await response.json())['results']
+        assert all(result['published_date'] for result in results), results
+
+    asyncio.run(_with_service(service, test))
+
+
+if __name__ == "__main__":
+    test_batch_request()
+    test_worker_crash_fails_its_pages_and_the_pool_is_replaced()
+    print("✅ date service checks passed")
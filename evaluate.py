@@ -0,0 +1,248 @@
+"""
+Strategy ablation: what each extractor configuration costs and how accurate it is.
+
+Runs HTMLDateExtractor under a grid of configurations (htmldate on/off, LLM fallback
+on/off, one cascade strategy disabled at a time, smaller/larger budgets) plus plain
+htmldate.find_date as a baseline. Every configuration extracts the pages of INPUT_FILE that
+have an entry in the ground truth, and is scored per field against it. Configurations
+run in parallel, one process each.
+
+Ground truth dates may be partial ("2024", "2020-12"): a prediction matches if it
+falls in that year or month. A field without a ground truth date is correct only if
+nothing was predicted.
+
+    python evaluate.py grid --workers 4 --output data/extract_results/ablation.json
+    python evaluate.py grid --llm                                  # also with the LLM fallback
+    python evaluate.py score data/extract_results/date_extractor_result.json data/extract_results/htmldate_result.json
+
+The grid report marks the configurations on the cost/accuracy Pareto frontier with '*':
+no other configuration is both at least as accurate and cheaper. Time per page is
+measured inside each process, so use --workers 1 when the timings matter more than the
+wall time of the whole grid.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+from html_date_extractor import HTMLDateExtractor
+from pipeline import iter_content_results
+from shared import ExtractionMethod
+
+
+GROUND_TRUTH_FILE = "data/question1_ground_truth.json"
+INPUT_FILE = "data/first_content_sample.json"
+FIELDS = ('published_date', 'modified_date')
+
+
+@dataclass
+class EvalConfig:
+    """One configuration of the grid."""
+    name: str
+    extractor_kwargs: Dict[str, Any] = field(default_factory=dict)
+    use_llm_as_fallback: bool = False
+    # Run plain htmldate.find_date with these keyword arguments instead of HTMLDateExtractor
+    htmldate_kwargs: Optional[Dict[str, Any]] = None
+
+
+def default_grid(include_llm: bool = False) -> List[EvalConfig]:
+    """The full extractor, its ablations and budgets, and the htmldate baselines."""
+    configs = [
+        EvalConfig('full'),
+        EvalConfig('no htmldate', {'use_htmldate': False}),
+        EvalConfig('htmldate fast search', {'htmldate_extensive_search': False}),
+        EvalConfig('candidate budget 40', {'max_candidate_length': 40}),
+        EvalConfig('candidate budget 400', {'max_candidate_length': 400}),
+        EvalConfig('no triage', {'triage': False}),
+        EvalConfig('lean parse', {'lean_parse': True}),
+    ]
+    for method in HTMLDateExtractor.CASCADE_STRATEGIES:
+        if method is not ExtractionMethod.HTMLDATE_LIB:
+            configs.append(EvalConfig(f'without {method.value}', {'disabled_strategies': [method.value]}))
+    configs += [
+        EvalConfig('baseline htmldate', htmldate_kwargs={'extensive_search': True}),
+        EvalConfig('baseline htmldate fast', htmldate_kwargs={'extensive_search': False}),
+    ]
+    if include_llm:
+        configs += [
+            EvalConfig('full + LLM', use_llm_as_fallback=True),
+            EvalConfig('no htmldate + LLM', {'use_htmldate': False}, use_llm_as_fallback=True),
+        ]
+    return configs
+
+
+def load_ground_truth(path: str = GROUND_TRUTH_FILE) -> Dict[str, Dict[str, Optional[str]]]:
+    """url -> {field: ISO date or prefix, or None}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return {entry['url']: {name: entry.get(name) for name in FIELDS} for entry in json.load(f)}
+
+
+def load_pages(input_file: str, ground_truth: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """The fetched (url, content) of every ground truth page found in input_file."""
+    with open(input_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    pages = {}
+    for item in iter_content_results(data):
+        if item.success and item.url in ground_truth and item.url not in pages:
+            pages[item.url] = item.html_content
+    return list(pages.items())
+
+
+def normalize_date(value: Any) -> Optional[str]:
+    """The ISO date of a predicted field; result files append "(method: ..., confidence: ...)"."""
+    if value is None:
+        return None
+    value = str(value).split(' ', 1)[0].strip()
+    return value if value and value != 'None' else None
+
+
+def field_correct(predicted: Optional[str], truth: Optional[str]) -> bool:
+    if not truth:
+        return predicted is None
+    return predicted is not None and predicted.startswith(truth)
+
+
+def score(predictions: Dict[str, Dict[str, Any]], ground_truth: Dict[str, Dict[str, Optional[str]]]) -> Dict[str, Any]:
+    """
+    Per-field accuracy of predictions over the ground truth pages they cover.
+
+    Args:
+        predictions: url -> {field: predicted date}
+        ground_truth: See load_ground_truth
+
+    Returns:
+        {"pages": n, "missing": ground truth pages without a prediction, "<field>": accuracy, ..., "accuracy": mean}
+    """
+    urls = [url for url in ground_truth if url in predictions]
+    report: Dict[str, Any] = {'pages': len(urls), 'missing': len(ground_truth) - len(urls)}
+    for name in FIELDS:
+        correct = sum(
+            field_correct(normalize_date(predictions[url].get(name)), ground_truth[url][name]) for url in urls
+        )
+        report[name] = round(correct / len(urls), 4) if urls else None
+    report['accuracy'] = round(statistics.mean(report[name] for name in FIELDS), 4) if urls else None
+    return report
+
+
+def run_config(config: EvalConfig, pages: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """
+    Extract every page with one configuration.
+
+    Returns:
+        {"predictions": url -> {field: date}, "seconds": [per page]}
+    """
+    predictions = {}
+    seconds = []
+    if config.htmldate_kwargs is not None:
+        from htmldate import find_date
+
+        for url, content in pages:
+            start = time.perf_counter()
+            predictions[url] = {
+                name: find_date(content, original_date=(name == 'published_date'),
+                                outputformat='%Y-%m-%d', **config.htmldate_kwargs)
+                for name in FIELDS
+            }
+            seconds.append(time.perf_counter() - start)
+        return {'predictions': predictions, 'seconds': seconds}
+
+    extractor = HTMLDateExtractor(disable_logger=True, **config.extractor_kwargs)
+    for url, content in pages:
+        start = time.perf_counter()
+        result = extractor.extract_from_html(content, use_llm_as_fallback=config.use_llm_as_fallback, url=url)
+        seconds.append(time.perf_counter() - start)
+        predictions[url] = {
+            'published_date': result.published_date.isoformat() if result.published_date else None,
+            'modified_date': result.modified_date.isoformat() if result.modified_date else None,
+        }
+    return {'predictions': predictions, 'seconds': seconds}
+
+
+def pareto_frontier(rows: List[Dict[str, Any]], cost: str = 'seconds_per_page', gain: str = 'accuracy') -> Set[str]:
+    """Names of the rows no other row beats on both cost and gain."""
+    frontier = set()
+    best = None
+    for row in sorted(rows, key=lambda r: (r[cost], -r[gain])):
+        if best is None or row[gain] > best:
+            frontier.add(row['name'])
+            best = row[gain]
+    return frontier
+
+
+def evaluate(
+    configs: List[EvalConfig],
+    pages: List[Tuple[str, str]],
+    ground_truth: Dict[str, Dict[str, Optional[str]]],
+    workers: int = 4
+) -> List[Dict[str, Any]]:
+    """
+    Run and score every configuration, one process each.
+
+    Returns:
+        One row per configuration: its name, per-field accuracy, mean and p95 seconds per
+        page, and whether it is on the Pareto frontier
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(run_config, configs, [pages] * len(configs)))
+
+    rows = []
+    for config, outcome in zip(configs, outcomes):
+        seconds = sorted(outcome['seconds'])
+        row = {'name': config.name, **score(outcome['predictions'], ground_truth)}
+        row['seconds_per_page'] = round(statistics.mean(seconds), 4) if seconds else 0.0
+        row['p95_seconds'] = round(seconds[min(len(seconds) - 1, int(0.95 * len(seconds)))], 4) if seconds else 0.0
+        row['config'] = asdict(config)
+        rows.append(row)
+    frontier = pareto_frontier(rows)
+    for row in rows:
+        row['pareto'] = row['name'] in frontier
+    return rows
+
+
+def print_report(rows: List[Dict[str, Any]]):
+    print(f"{'':2}{'configuration':<34}{'published':>10}{'modified':>10}{'accuracy':>10}{'s/page':>10}{'p95 s':>10}")
+    for row in sorted(rows, key=lambda r: r['seconds_per_page']):
+        print(f"{'*' if row['pareto'] else ' ':2}{row['name']:<34}{row['published_date']:>10.3f}{row['modified_date']:>10.3f}"
+              f"{row['accuracy']:>10.3f}{row['seconds_per_page']:>10.4f}{row['p95_seconds']:>10.4f}")
+    print("* on the cost/accuracy Pareto frontier")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Measure accuracy and cost of extractor configurations.")
+    arg_parser.add_argument('--ground-truth', default=GROUND_TRUTH_FILE)
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+
+    grid_parser = subparsers.add_parser('grid', help="Run the configuration grid on the ground truth pages")
+    grid_parser.add_argument('--input', default=INPUT_FILE, help="Fetched pages, in the batch run's input format")
+    grid_parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    grid_parser.add_argument('--llm', action='store_true', help="Also run configurations with the LLM fallback")
+    grid_parser.add_argument('--only', nargs='+', metavar='NAME', help="Only run these configurations")
+    grid_parser.add_argument('--output', help="Write the rows (with per-config settings) to this JSON file")
+
+    score_parser = subparsers.add_parser('score', help="Score existing result files")
+    score_parser.add_argument('result_files', nargs='+')
+
+    args = arg_parser.parse_args()
+    ground_truth = load_ground_truth(args.ground_truth)
+
+    if args.command == 'score':
+        for path in args.result_files:
+            with open(path, 'r', encoding='utf-8') as f:
+                predictions = {record['url']: record for record in json.load(f)}
+            print(path, score(predictions, ground_truth))
+    else:
+        configs = default_grid(include_llm=args.llm)
+        if args.only:
+            configs = [config for config in configs if config.name in args.only]
+        pages = load_pages(args.input, ground_truth)
+        print(f"{len(pages)}/{len(ground_truth)} ground truth pages found in '{args.input}', "
+              f"{len(configs)} configurations")
+        rows = evaluate(configs, pages, ground_truth, workers=args.workers)
+        print_report(rows)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(rows, f, ensure_ascii=False, indent=2)
+            print(f"✅ Wrote the report to '{args.output}'")
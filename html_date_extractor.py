@@ -29,18 +29,95 @@ Our ndjson file content:
 }
 """
 import asyncio
+import functools
 import logging
+import os
 import re
+import threading
+import time
 import dateparser
+from collections import Counter, OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dateparser.date import DateDataParser
 from datetime import datetime
-from typing import Optional, Dict, Tuple, List
-from dataclasses import dataclass, field
+from typing import Any, Optional, Dict, Tuple, List, Set, Union, Iterable, Sequence
+from dataclasses import dataclass, field, replace
 from lxml import html, etree
+from lxml.cssselect import CSSSelector
 from dateutil import parser
-from llm_date_extractor import LLMDateExtractor
+from boilerplate import BoilerplateMaskCache
+from content_triage import ContentKind, read_pdf_metadata, sniff_content
+from slow_capture import SlowDocumentCapture
+from llm_date_extractor import LLMDateExtractor, MAX_CONCURRENT_REQ
+from provenance import rules_version
 from shared import DateResult, ExtractionMethod
 
 
+# Guards the setup of the shared 'DateExtractor' logger
+_LOGGING_LOCK = threading.Lock()
+
+
+class _ParsedDateCache:
+    """Thread-safe LRU cache of _parse_date results, including strings that did not parse."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: 'OrderedDict[Tuple[str, Optional[Tuple[str, ...]]], Optional[datetime]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, Optional[Tuple[str, ...]]]) -> Tuple[bool, Optional[datetime]]:
+        """(found, value) for the key."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, self._data[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Tuple[str, Optional[Tuple[str, ...]]], value: Optional[datetime]):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+@dataclass
+class _DocumentContext:
+    """Per-document state passed through the extraction strategies."""
+    languages: Optional[Tuple[str, ...]] = None  # Language hints of the page, None to auto-detect
+    timings: Optional[Dict[str, float]] = None  # Seconds per step/strategy, None to not measure
+    preparsed: Optional[Dict[str, datetime]] = None  # Date strings already parsed for the batch (extract_many)
+    matched_rule: Optional[str] = None  # Set by a strategy to the selector/meta name/JSON-LD key that found the date
+
+    @contextmanager
+    def timed(self, name: str):
+        """Add the time spent in the block to timings[name] (if timings are measured)."""
+        if self.timings is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+
+@dataclass
+class _PreparedDocument:
+    """A page between the two phases of the heuristics (see extract_many)."""
+    ctx: _DocumentContext
+    url: Optional[str] = None
+    html_content: Optional[Union[str, bytes]] = None  # Raw payload if the page was routed away from HTML
+    tree: Optional[etree._Element] = None
+    candidates: Set[str] = field(default_factory=set)  # DATE_PATTERNS matches of the date scan
+    result: Optional[DateResult] = None  # Set if the first phase already finished the page (non-HTML, parse error)
+    seconds: float = 0.0  # Time spent in the first phase
+
 
 class HTMLDateExtractor:
     """
@@ -48,6 +125,12 @@ class HTMLDateExtractor:
     
     Implements a multi-strategy approach with fallbacks to handle various
     HTML structures and date formats commonly found in web articles.
+
+    One instance can be shared by many threads: per-document state lives in a
+    _DocumentContext, the shared caches (parsed dates, dateparser parsers, boilerplate
+    masks, prescreen stats) are guarded by locks, and compiled CSS selectors are kept
+    per thread. lxml releases the GIL while parsing and evaluating XPath, so a thread
+    pool gets real parallelism without a copy of the extractor per process.
     """
     
     # Common date-related meta tag names
@@ -82,17 +165,111 @@ class HTMLDateExtractor:
         r'\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{4}',
     ]
     
-    def __init__(self, log_level: int = logging.INFO, use_htmldate: bool = True, disable_logger: bool = False):
+    # Element text longer than this is not parsed as a whole; only a DATE_PATTERNS match inside it is
+    MAX_CANDIDATE_LENGTH = 100
+    
+    # Cheap gate for short element text: a year, a numeric day/month/year, or an English month name
+    DATE_LIKE_RE = re.compile(
+        r'\d{4}|\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4}|'
+        r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2}\b',
+        re.IGNORECASE
+    )
+    
+    DATEPARSER_SETTINGS = {'STRICT_PARSING': False, 'RETURN_AS_TIMEZONE_AWARE': False}
+
+    # The strategies of the published/modified cascade, in the order they are tried
+    CASCADE_STRATEGIES = (
+        ExtractionMethod.JSON_LD,
+        ExtractionMethod.OPEN_GRAPH,
+        ExtractionMethod.HTML5_TIME,
+        ExtractionMethod.META_TAGS,
+        ExtractionMethod.CSS_SELECTORS,
+        ExtractionMethod.HTMLDATE_LIB,
+    )
+    
+    def __init__(
+        self,
+        log_level: int = logging.INFO,
+        use_htmldate: bool = True,
+        disable_logger: bool = False,
+        boilerplate_cache_path: Optional[str] = None,
+        slow_capture_dir: Optional[str] = None,
+        slow_threshold_seconds: float = 2.0,
+        executor: Optional[Executor] = None,
+        llm_kwargs: Optional[Dict[str, Any]] = None,
+        llm_concurrency: int = MAX_CONCURRENT_REQ,
+        parsed_date_cache_size: int = 50000,
+        triage: bool = True,
+        disabled_strategies: Optional[Iterable[str]] = None,
+        max_candidate_length: Optional[int] = None,
+        htmldate_extensive_search: bool = True,
+        lean_parse: bool = False
+    ):
         """
         Initialize the DateExtractor.
         
         Args:
             log_level: Logging level (default: logging.INFO)
             use_htmldate: Whether to use htmldate library as fallback (default: True)
+            boilerplate_cache_path: JSON file of the learned per-domain template masks.
+                If given, template regions of a page's site are skipped when scanning for dates
+                (requires the page url in extract_from_html).
+            slow_capture_dir: If given, pages whose extraction takes at least slow_threshold_seconds
+                are saved there with their per-strategy timings (replay them with slow_capture.py)
+            slow_threshold_seconds: See slow_capture_dir
+            executor: Thread pool that runs the heuristics of aextract_from_html/aextract_many
+                (default: the event loop's default executor)
+            llm_kwargs: Keyword arguments for the LLMDateExtractor shared by the async API
+            llm_concurrency: Maximum number of in-flight LLM fallbacks of the async API
+            parsed_date_cache_size: Number of _parse_date results kept, shared by all threads (0: no cache)
+            triage: Sniff the payload first; PDFs only get their metadata read, plain text only
+                the date scan, and other binary payloads are skipped (see content_triage.py)
+            disabled_strategies: ExtractionMethod values of cascade strategies to skip (e.g. ["CSS selectors"]),
+                for measuring what each strategy contributes (see evaluate.py)
+            max_candidate_length: Override MAX_CANDIDATE_LENGTH, the budget for element text parsed as a whole
+            htmldate_extensive_search: Let htmldate scan the whole page text when its markup yields no date
+                (slow on pages without date metadata)
+            lean_parse: Parse with a tuned parser (no comments, huge_tree) and drop <style>, <svg> and
+                all <script> but JSON-LD from the tree. Smaller trees make every later XPath and
+                text_content() faster, but dates inside inline scripts are no longer found.
         """
-        self.logger = self._setup_logging(log_level)
-        self.logger.disabled = disable_logger 
+        self.logger = self._setup_logging(log_level, disable_logger)
         self.use_htmldate = use_htmldate
+        self.triage = triage
+        self.disabled_strategies = frozenset(disabled_strategies or ())
+        unknown = self.disabled_strategies - {method.value for method in self.CASCADE_STRATEGIES}
+        if unknown:
+            raise ValueError(f"Unknown strategies {sorted(unknown)}, expected some of "
+                             f"{[method.value for method in self.CASCADE_STRATEGIES]}")
+        if max_candidate_length is not None:
+            self.MAX_CANDIDATE_LENGTH = max_candidate_length
+        self.htmldate_extensive_search = htmldate_extensive_search
+        self.lean_parse = lean_parse
+        # dateparser parsers restricted to a page's languages, keyed by the sorted language tuple
+        self._date_parsers: Dict[Tuple[str, ...], Optional[DateDataParser]] = {}
+        self._date_parsers_lock = threading.Lock()
+        # Results of _parse_date by (string, languages); the same strings repeat across pages
+        self._parsed_dates = _ParsedDateCache(parsed_date_cache_size) if parsed_date_cache_size > 0 else None
+        # Compiled CSS selectors, one set per thread
+        self._local = threading.local()
+        # All DATE_PATTERNS in one regex, used to cut a date out of long element text
+        self._date_patterns_re = re.compile(
+            '|'.join(f'(?:{pattern})' for pattern in self.DATE_PATTERNS), re.IGNORECASE
+        )
+        # How element-text candidates fared in _prescreen_candidate
+        self.prescreen_stats = Counter()
+        self._stats_lock = threading.Lock()
+        self.boilerplate_cache = BoilerplateMaskCache(boilerplate_cache_path) if boilerplate_cache_path else None
+        # Stamped on every result, so a rule change can tell which results it may affect
+        self.rules_version = rules_version(self.rules_snapshot())
+        self.slow_capture = SlowDocumentCapture(slow_capture_dir, slow_threshold_seconds) if slow_capture_dir else None
+        # Async API: heuristics run on the executor, LLM fallbacks share one session per event loop
+        self.executor = executor
+        self.llm_kwargs = llm_kwargs or {}
+        self.llm_concurrency = llm_concurrency
+        self._llm_extractor: Optional[LLMDateExtractor] = None
+        self._llm_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._llm_semaphore: Optional[asyncio.Semaphore] = None
         
         if use_htmldate:
             try:
@@ -105,18 +282,28 @@ class HTMLDateExtractor:
                     "htmldate library not available. Install with: pip install htmldate"
                 )
     
-    def _setup_logging(self, log_level: int) -> logging.Logger:
+    def _setup_logging(self, log_level: int, disable_logger: bool = False) -> logging.Logger:
         """
         Set up logging configuration.
         
+        The 'DateExtractor' logger is shared by all instances, so it is configured
+        under a lock; extractors created concurrently never add duplicate handlers.
+        
         Args:
             log_level: The logging level
+            disable_logger: Disable the logger
             
         Returns:
             Configured logger instance
         """
+        with _LOGGING_LOCK:
+            return self._configure_logger(log_level, disable_logger)
+
+    @staticmethod
+    def _configure_logger(log_level: int, disable_logger: bool) -> logging.Logger:
         logger = logging.getLogger('DateExtractor')
         logger.setLevel(log_level)
+        logger.disabled = disable_logger
         
         # Avoid duplicate handlers
         if not logger.handlers:
@@ -124,7 +311,8 @@ class HTMLDateExtractor:
             console_handler = logging.StreamHandler()
             console_handler.setLevel(log_level)
             
-            # File handler
+            # File handler (the logging/ folder is not part of the repository)
+            os.makedirs('logging', exist_ok=True)
             file_handler = logging.FileHandler('logging/date_extractor.log')
             file_handler.setLevel(logging.DEBUG)
             
@@ -168,23 +356,86 @@ class HTMLDateExtractor:
                 mud_confidence="low"
             )
     
-    def extract_from_html(self, html_content: str, use_llm_as_fallback: bool = False) -> DateResult:
+    def extract_from_html(
+        self,
+        html_content: Union[str, bytes],
+        use_llm_as_fallback: bool = False,
+        url: Optional[str] = None,
+        timings: Optional[Dict[str, float]] = None
+    ) -> DateResult:
         """
         Extract dates from HTML content using multiple strategies.
         
         Args:
-            html_content: The HTML content as string
-            source: Source identifier for logging
+            html_content: The HTML content as string (or the fetched bytes). PDFs and plain text
+                are recognized and routed to their own extractors.
+            use_llm_as_fallback: Ask the LLM if no strategy finds a published or modified date
+                (never for PDFs, plain text and other non-HTML payloads)
+            url: URL of the page, used to learn and skip its site's template regions
+            timings: If given, filled with the seconds spent in each step and strategy
             
         Returns:
             DateResult containing extracted dates and metadata
         """
+        result = self._extract_heuristics(html_content, url, timings)
+
+        # Fallback to use LLM to extract pubslished and modified dates if they're both None
+        if use_llm_as_fallback and self.needs_llm_fallback(result):
+            llm_result = self._run_coroutine(lambda: self._extract_with_llm(html_content=html_content))
+            result = self.merge_llm_result(result, llm_result)
+
+        return result
+
+    @staticmethod
+    def _run_coroutine(make_coroutine):
+        """
+        Run a coroutine to completion from synchronous code.
+
+        Inside a running event loop (an aiohttp handler, Jupyter) asyncio.run is not allowed,
+        so the coroutine gets its own loop in a helper thread. Async callers should use
+        aextract_from_html instead, which does not block their loop.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(make_coroutine())
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(lambda: asyncio.run(make_coroutine())).result()
+
+    def _extract_heuristics(
+        self, html_content: Union[str, bytes], url: Optional[str] = None, timings: Optional[Dict[str, float]] = None
+    ) -> DateResult:
+        """Run every heuristic strategy (everything in extract_from_html but the LLM fallback)."""
+        return self._finish_document(self._prepare_document(html_content, url, timings))
+
+    def _prepare_document(
+        self, html_content: Union[str, bytes], url: Optional[str] = None, timings: Optional[Dict[str, float]] = None
+    ) -> '_PreparedDocument':
+        """First phase of the heuristics: triage, parse, mask template regions and find the date-scan candidates."""
+        start_time = time.perf_counter()
+        if timings is None and self.slow_capture is not None:
+            timings = {}
+        ctx = _DocumentContext(timings=timings)
+        document = _PreparedDocument(ctx=ctx, url=url)
+
+        if self.triage:
+            with ctx.timed('triage'):
+                kind = sniff_content(html_content)
+            if kind is not ContentKind.HTML:
+                self.logger.info(f"Routing {url or 'payload'} as {kind.value}")
+                document.result = self._extract_non_html(kind, html_content, ctx)
+                document.html_content = html_content
+                document.seconds = time.perf_counter() - start_time
+                return document
+        if isinstance(html_content, bytes):
+            html_content = html_content.decode('utf-8', errors='replace')
         
         try:
-            tree = html.fromstring(html_content)
+            with ctx.timed('parse'):
+                tree = self._parse_lean(html_content) if self.lean_parse else html.fromstring(html_content)
         except Exception as e:
             self.logger.error(f"Failed to parse HTML: {e}")
-            return DateResult(
+            document.result = DateResult(
                 published_date=None,
                 modified_date=None,
                 published_method=ExtractionMethod.NOT_FOUND.value,
@@ -192,16 +443,51 @@ class HTMLDateExtractor:
                 pub_confidence="low",
                 mod_confidence="low"
             )
+            return document
         
+        # The date scan skips footers, menus and other regions repeated across the site's pages
+        template_regions = []
+        if url and self.boilerplate_cache is not None:
+            with ctx.timed('boilerplate'):
+                template_regions = self.boilerplate_cache.learn_and_find(url, tree)
+            if template_regions:
+                self.logger.debug(f"Masked {len(template_regions)} template regions of {url}")
+
+        # Read the page language once so dateparser does not have to detect it per string
+        with ctx.timed('languages'):
+            ctx.languages = self._detect_languages(tree)
+
+        with ctx.timed('all dates'):
+            document.candidates = self._find_date_candidates(self._date_scan_source(tree, template_regions))
+
+        document.html_content = html_content
+        document.tree = tree
+        document.seconds = time.perf_counter() - start_time
+        return document
+
+    def _finish_document(self, document: '_PreparedDocument') -> DateResult:
+        """Second phase of the heuristics: the published/modified cascade and the dates of the scan candidates."""
+        if document.result is not None:
+            document.result.rules_version = self.rules_version
+            # Pages routed away from the cascade (PDF, plain text) only have the first phase
+            if document.html_content is not None:
+                self._capture_if_slow(document, document.seconds)
+            return document.result
+        start_time = time.perf_counter()
+        ctx, tree, html_content = document.ctx, document.tree, document.html_content
+
         # Try extraction strategies in order of reliability
-        published_date, pub_method, pub_raw = self._extract_published_date(tree, html_content)
-        modified_date, mod_method, mod_raw = self._extract_modified_date(tree, html_content)
+        published_date, pub_method, pub_raw = self._extract_published_date(tree, html_content, ctx)
+        pub_rule, ctx.matched_rule = ctx.matched_rule, None
+        modified_date, mod_method, mod_raw = self._extract_modified_date(tree, html_content, ctx)
+        mod_rule, ctx.matched_rule = ctx.matched_rule, None
         
         # Determine confidence level
         pub_confidence = self._calculate_confidence(pub_method)
         mod_confidence = self._calculate_confidence(mod_method)
 
-        all_dates = self._extract_all_dates(tree)
+        with ctx.timed('all dates'):
+            all_dates = self._resolve_date_candidates(document.candidates, ctx)
         if published_date and published_date not in all_dates:
             all_dates.append(published_date)
         if modified_date and modified_date not in all_dates:
@@ -220,17 +506,7 @@ class HTMLDateExtractor:
         else:
             self.logger.debug("Modified date not found (may not exist)")
 
-        # Fallback to use LLM to extract pubslished and modified dates if they're both None
-        # published_date, modified_date = None, None
-        if not published_date and not modified_date and use_llm_as_fallback:
-            llm_result = asyncio.run(self._extract_with_llm(html_content=html_content))
-            published_date, pub_method = llm_result.published_date, llm_result.published_method
-            modified_date, mod_method = llm_result.modified_date, llm_result.modified_method
-            pub_confidence, mod_confidence = llm_result.pub_confidence, llm_result.mod_confidence
-            pub_raw, mod_raw = "", ""
-
-        
-        return DateResult(
+        result = DateResult(
             published_date=published_date,
             modified_date=modified_date,
             published_method=pub_method,
@@ -240,35 +516,315 @@ class HTMLDateExtractor:
             last_date_found=last_date,
             dates_found=all_dates,
             pub_confidence=pub_confidence,
-            mod_confidence=mod_confidence
+            mod_confidence=mod_confidence,
+            published_rule=pub_rule,
+            modified_rule=mod_rule,
+            rules_version=self.rules_version
+        )
+
+        self._capture_if_slow(document, document.seconds + time.perf_counter() - start_time)
+        return result
+
+    def _capture_if_slow(self, document: '_PreparedDocument', elapsed: float):
+        """Keep pages that took too long for profiling (see slow_capture.py)."""
+        if self.slow_capture is not None and elapsed >= self.slow_capture.threshold_seconds:
+            self.logger.warning(f"Slow extraction ({elapsed:.2f}s) of {document.url}, capturing it")
+            self.slow_capture.capture(
+                document.html_content, url=document.url, total_seconds=elapsed, timings=document.ctx.timings,
+                extractor_kwargs=self.extraction_kwargs()
+            )
+
+    def extract_many(
+        self,
+        html_contents: List[Union[str, bytes]],
+        urls: Optional[List[Optional[str]]] = None,
+        chunk_size: int = 64,
+        timings: Optional[List[Dict[str, float]]] = None
+    ) -> List[DateResult]:
+        """
+        Run the heuristics on many pages, parsing the date strings they share once.
+
+        Pages are processed in chunks: every page of a chunk is parsed and its date-scan
+        candidates collected, the unique candidates of the chunk are parsed at once with
+        vectorized formats (batch_dates.py), and then each page is finished on its already
+        parsed tree. Candidates no format fits are parsed one by one as in extract_from_html,
+        which gives the same results. No LLM fallback; use aextract_many or the pipeline for it.
+
+        Args:
+            html_contents: The pages (str or fetched bytes)
+            urls: URL of each page (for the boilerplate masks)
+            chunk_size: Pages whose trees are held in memory at once
+            timings: If given, one dict per page, filled as in extract_from_html
+
+        Returns:
+            The DateResult of each page, in order
+        """
+        from batch_dates import parse_date_strings
+
+        urls = urls if urls is not None else [None] * len(html_contents)
+        results = []
+        for start in range(0, len(html_contents), chunk_size):
+            stop = min(start + chunk_size, len(html_contents))
+            documents = [
+                self._prepare_document(html_contents[i], urls[i], timings[i] if timings is not None else None)
+                for i in range(start, stop)
+            ]
+            candidates = set()
+            for document in documents:
+                candidates.update(document.candidates)
+            preparsed = parse_date_strings(candidates)
+            for document in documents:
+                document.ctx.preparsed = preparsed
+                results.append(self._finish_document(document))
+        return results
+
+    # ===== Async API =====
+
+    async def aextract_from_html(
+        self,
+        html_content: str,
+        use_llm_as_fallback: bool = False,
+        url: Optional[str] = None,
+        timings: Optional[Dict[str, float]] = None,
+        timeout: Optional[float] = None
+    ) -> DateResult:
+        """
+        Async version of extract_from_html that does not block the event loop.
+
+        The heuristics run on the executor; the LLM fallback is awaited on a session shared
+        by all calls on this loop (close it with aclose()).
+
+        Args:
+            html_content: The HTML content as string
+            use_llm_as_fallback: Ask the LLM if no strategy finds a published or modified date
+            url: URL of the page, used to learn and skip its site's template regions
+            timings: If given, filled with the seconds spent in each step and strategy
+            timeout: Seconds after which asyncio.TimeoutError is raised (None: no limit).
+                A cancelled or timed-out call stops waiting at once, but heuristics already
+                running on the executor finish in the background.
+
+        Returns:
+            DateResult containing extracted dates and metadata
+        """
+        if timeout is None:
+            return await self._aextract(html_content, use_llm_as_fallback, url, timings)
+        return await asyncio.wait_for(self._aextract(html_content, use_llm_as_fallback, url, timings), timeout)
+
+    async def _aextract(
+        self, html_content: str, use_llm_as_fallback: bool, url: Optional[str], timings: Optional[Dict[str, float]]
+    ) -> DateResult:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            self.executor, functools.partial(self._extract_heuristics, html_content, url, timings)
+        )
+        if use_llm_as_fallback and self.needs_llm_fallback(result):
+            llm_extractor = await self._get_llm_extractor()
+            async with self._llm_semaphore:
+                llm_result = await llm_extractor.extract_dates(html_content=html_content)
+            result = self.merge_llm_result(result, llm_result)
+        return result
+
+    async def aextract_many(
+        self,
+        html_contents: List[str],
+        urls: Optional[List[Optional[str]]] = None,
+        use_llm_as_fallback: bool = False,
+        timeout: Optional[float] = None,
+        concurrency: int = 8,
+        return_exceptions: bool = False
+    ) -> List[Any]:
+        """
+        Extract dates from many pages concurrently.
+
+        Args:
+            html_contents: The HTML content of every page
+            urls: URL of every page (optional)
+            use_llm_as_fallback: Ask the LLM for pages where no strategy finds a date
+            timeout: Per-page timeout in seconds (None: no limit)
+            concurrency: Maximum number of pages in the heuristics at once
+            return_exceptions: Return the exception (e.g. asyncio.TimeoutError) of a failed page
+                in its place instead of raising it, like asyncio.gather
+
+        Returns:
+            One DateResult per page, in input order
+        """
+        urls = urls or [None] * len(html_contents)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(html_content: str, url: Optional[str]) -> DateResult:
+            async with semaphore:
+                return await self.aextract_from_html(
+                    html_content, use_llm_as_fallback=use_llm_as_fallback, url=url, timeout=timeout
+                )
+
+        return await asyncio.gather(
+            *(one(html_content, url) for html_content, url in zip(html_contents, urls)),
+            return_exceptions=return_exceptions
+        )
+
+    async def _get_llm_extractor(self) -> LLMDateExtractor:
+        """The LLMDateExtractor shared by the async API, opened on first use in the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._llm_extractor is not None and self._llm_loop is not loop:
+            # A session cannot be used from another loop; the old loop owns the old session
+            self.logger.warning("Event loop changed, opening a new LLM session")
+            self._llm_extractor = None
+        if self._llm_extractor is None:
+            self._llm_extractor = await LLMDateExtractor(**self.llm_kwargs).__aenter__()
+            self._llm_loop = loop
+            self._llm_semaphore = asyncio.Semaphore(self.llm_concurrency)
+        return self._llm_extractor
+
+    async def aclose(self):
+        """Close the LLM session of the async API."""
+        if self._llm_extractor is not None:
+            await self._llm_extractor.__aexit__(None, None, None)
+            self._llm_extractor = None
+            self._llm_loop = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    def _extract_non_html(
+        self, kind: ContentKind, content: Union[str, bytes], ctx: '_DocumentContext'
+    ) -> DateResult:
+        """Extract dates from a payload the triage did not classify as HTML."""
+        if kind is ContentKind.PDF:
+            with ctx.timed(ExtractionMethod.PDF_METADATA.value):
+                metadata = read_pdf_metadata(content)
+            dates = sorted({d for d in (metadata.created, metadata.modified) if d})
+            return DateResult(
+                published_date=metadata.created,
+                modified_date=metadata.modified,
+                published_method=self._route_method(ExtractionMethod.PDF_METADATA, metadata.created),
+                modified_method=self._route_method(ExtractionMethod.PDF_METADATA, metadata.modified),
+                published_raw=metadata.created_raw,
+                modified_raw=metadata.modified_raw,
+                last_date_found=dates[-1] if dates else None,
+                dates_found=dates,
+                pub_confidence=self._calculate_confidence(ExtractionMethod.PDF_METADATA.value if metadata.created else None),
+                mod_confidence=self._calculate_confidence(ExtractionMethod.PDF_METADATA.value if metadata.modified else None)
+            )
+
+        if kind is ContentKind.TEXT:
+            text = content.decode('utf-8', errors='replace') if isinstance(content, bytes) else content
+            with ctx.timed('all dates'):
+                dates = sorted(self._scan_text_dates(text, ctx))
+            return DateResult(
+                published_date=None,
+                modified_date=None,
+                published_method=self._route_method(ExtractionMethod.TEXT_SCAN, None),
+                modified_method=self._route_method(ExtractionMethod.TEXT_SCAN, None),
+                last_date_found=dates[-1] if dates else None,
+                dates_found=dates,
+                pub_confidence="not found",
+                mod_confidence="not found"
+            )
+
+        return DateResult(
+            published_date=None,
+            modified_date=None,
+            published_method=ExtractionMethod.UNSUPPORTED_CONTENT.value,
+            modified_method=ExtractionMethod.UNSUPPORTED_CONTENT.value,
+            pub_confidence="not found",
+            mod_confidence="not found"
+        )
+
+    @staticmethod
+    def _route_method(route: ExtractionMethod, found: Optional[datetime]) -> str:
+        """"PDF metadata", or "PDF metadata (not found)" when the route found no date."""
+        return route.value if found else f"{route.value} ({ExtractionMethod.NOT_FOUND.value})"
+
+    @staticmethod
+    def needs_llm_fallback(result: DateResult) -> bool:
+        """Whether the heuristics failed to find both the published and modified date of an HTML page."""
+        non_html_routes = (
+            ExtractionMethod.PDF_METADATA.value,
+            ExtractionMethod.TEXT_SCAN.value,
+            ExtractionMethod.UNSUPPORTED_CONTENT.value
+        )
+        if (result.published_method or '').startswith(non_html_routes):
+            return False
+        return not result.published_date and not result.modified_date
+
+    @staticmethod
+    def merge_llm_result(result: DateResult, llm_result: DateResult) -> DateResult:
+        """
+        Replace the published/modified fields of a heuristic result with the LLM's answer.
+
+        The dates scanned from the page (dates_found, last_date_found) are kept.
+        """
+        return replace(
+            result,
+            published_date=llm_result.published_date,
+            modified_date=llm_result.modified_date,
+            published_method=llm_result.published_method,
+            modified_method=llm_result.modified_method,
+            published_raw="",
+            modified_raw="",
+            pub_confidence=llm_result.pub_confidence,
+            mod_confidence=llm_result.mod_confidence,
+            published_rule=None,
+            modified_rule=None
         )
     
-    def _extract_all_dates(self, tree: etree._Element) -> List[datetime]:
+    def _date_scan_source(self, tree: etree._Element, skipped: Sequence[etree._Element] = ()) -> str:
+        """The text searched for dates: the visible text and the meta tag values, outside the skipped subtrees."""
         # Combine all text nodes adn meta tag content
         all_text = []
 
         # Get visible text
-        all_text.append(tree.text_content())
+        all_text.append(self._text_outside(tree, skipped) if skipped else tree.text_content())
         
         # Get meta content values (may includes non-visible dates)
+        skipped_set = set(skipped)
         for meta in tree.xpath("//meta"):
+            if skipped_set and any(ancestor in skipped_set for ancestor in meta.iterancestors()):
+                continue
             if meta.get('content'):
                 all_text.append(meta.get('content'))
             if meta.get('value'):
                 all_text.append(meta.get('value'))
-        source = '\n'.join(all_text)
-    
+        return '\n'.join(all_text)
+
+    @staticmethod
+    def _text_outside(tree: etree._Element, skipped: Sequence[etree._Element]) -> str:
+        """tree.text_content() without the text of the skipped subtrees (their tails are kept)."""
+        skipped_set = set(skipped)
+        parts = []
+        walker = etree.iterwalk(tree, events=('start', 'end', 'comment', 'pi'))
+        for event, elem in walker:
+            if event == 'start':
+                if elem in skipped_set:
+                    walker.skip_subtree()
+                elif elem.text:
+                    parts.append(elem.text)
+            elif elem is not tree and elem.tail:
+                # 'end' of an element, or a comment/processing instruction (only its tail is text)
+                parts.append(elem.tail)
+        return ''.join(parts)
+
+    def _scan_text_dates(self, source: str, ctx: Optional['_DocumentContext'] = None) -> List[datetime]:
+        """Every distinct date matched by DATE_PATTERNS in the text."""
+        return self._resolve_date_candidates(self._find_date_candidates(source), ctx)
+
+    def _find_date_candidates(self, source: str) -> Set[str]:
         # Use regex patterns for date candidates
         candidates = set()
         for pattern in self.DATE_PATTERNS:
             candidates.update(re.findall(pattern, source, re.IGNORECASE))
-        
         self.logger.info(f"Candidate Dates: {candidates}")
+        return candidates
+
+    def _resolve_date_candidates(self, candidates: Set[str], ctx: Optional['_DocumentContext'] = None) -> List[datetime]:
         # Try parsing each candidate; collect unique datetimes in order
         dates = []
         seen = set()
         for cand in candidates:
-            dt = self._parse_date(cand)
+            dt = self._parse_date(cand, ctx)
             if dt:
                 key = dt.isoformat()
                 if key not in seen:
@@ -279,89 +835,113 @@ class HTMLDateExtractor:
         
         
     def _extract_published_date(
-        self, tree: etree._Element, html_content: str
+        self, tree: etree._Element, html_content: str, ctx: Optional['_DocumentContext'] = None
     ) -> Tuple[Optional[datetime], Optional[str], Optional[str]]:
         """Extract published date using multiple strategies."""
+        ctx = ctx or _DocumentContext()
         
         # Strategy 1: JSON-LD structured data (Schema.org)
         # <script type="application/ld+json">
         # //<![CDATA[
         #   {"@context":"http://schema.org", "@type: ..., ..., "dateCreated":"2020-09-16T14:24:00Z","datePublished":"2020-09-16T14:24:00Z","dateModified":"2025-06-03T08:40:58Z", ...
         # //]]>
-        result = self._extract_from_jsonld(tree, 'datePublished')
-        if result[0]:
-            return result
+        if self._strategy_enabled(ExtractionMethod.JSON_LD):
+            with ctx.timed(f"published/{ExtractionMethod.JSON_LD.value}"):
+                result = self._extract_from_jsonld(tree, 'datePublished', ctx)
+            if result[0]:
+                return result
         
         # Strategy 2: Open Graph meta tags
         # <meta property="og:article:modified_time" content="2020-10-29T22:07:06Z"/><meta property="og:updated_time" content="2020-10-29T22:07:06Z"/><meta property="og:article:published_time" content="2020-10-29T22:07:05Z"/>
-        result = self._extract_from_opengraph(tree, self.PUBLISHED_META_NAMES)
-        if result[0]:
-            return result
+        if self._strategy_enabled(ExtractionMethod.OPEN_GRAPH):
+            with ctx.timed(f"published/{ExtractionMethod.OPEN_GRAPH.value}"):
+                result = self._extract_from_opengraph(tree, self.PUBLISHED_META_NAMES, ctx)
+            if result[0]:
+                return result
         
         # Strategy 3: HTML5 time element
-        result = self._extract_from_time_element(tree, self.DATE_SELECTORS)
-        if result[0]:
-            return result
+        if self._strategy_enabled(ExtractionMethod.HTML5_TIME):
+            with ctx.timed(f"published/{ExtractionMethod.HTML5_TIME.value}"):
+                result = self._extract_from_time_element(tree, self.DATE_SELECTORS, ctx)
+            if result[0]:
+                return result
         
         # Strategy 4: Meta tags
         # <meta name="article:published_time" content="2020-10-29T22:07:05Z"/><meta name="article:modified_time" content="2020-10-29T22:07:06Z"/>
-        result = self._extract_from_meta_tags(tree, self.PUBLISHED_META_NAMES)
-        if result[0]:
-            return result
+        if self._strategy_enabled(ExtractionMethod.META_TAGS):
+            with ctx.timed(f"published/{ExtractionMethod.META_TAGS.value}"):
+                result = self._extract_from_meta_tags(tree, self.PUBLISHED_META_NAMES, ctx)
+            if result[0]:
+                return result
         
         # Strategy 5: CSS selectors
-        result = self._extract_from_selectors(tree, self.DATE_SELECTORS)
-        if result[0]:
-            return result
+        if self._strategy_enabled(ExtractionMethod.CSS_SELECTORS):
+            with ctx.timed(f"published/{ExtractionMethod.CSS_SELECTORS.value}"):
+                result = self._extract_from_selectors(tree, self.DATE_SELECTORS, ctx)
+            if result[0]:
+                return result
         
         # Strategy 6: htmldate library fallback
-        if self.use_htmldate and self.htmldate_available:
-            result = self._extract_with_htmldate(html_content, original=True)
+        if self.use_htmldate and self.htmldate_available and self._strategy_enabled(ExtractionMethod.HTMLDATE_LIB):
+            with ctx.timed(f"published/{ExtractionMethod.HTMLDATE_LIB.value}"):
+                result = self._extract_with_htmldate(html_content, original=True)
             if result[0]:
                 return result
         
         return None, ExtractionMethod.NOT_FOUND.value, None
     
     def _extract_modified_date(
-        self, tree: etree._Element, html_content: str
+        self, tree: etree._Element, html_content: str, ctx: Optional['_DocumentContext'] = None
     ) -> Tuple[Optional[datetime], Optional[str], Optional[str]]:
         """Extract modified date using multiple strategies."""
+        ctx = ctx or _DocumentContext()
         
         # Strategy 1: JSON-LD structured data
-        result = self._extract_from_jsonld(tree, 'dateModified')
-        if result[0]:
-            return result
+        if self._strategy_enabled(ExtractionMethod.JSON_LD):
+            with ctx.timed(f"modified/{ExtractionMethod.JSON_LD.value}"):
+                result = self._extract_from_jsonld(tree, 'dateModified', ctx)
+            if result[0]:
+                return result
         
         # Strategy 2: Open Graph meta tags
-        result = self._extract_from_opengraph(tree, self.MODIFIED_META_NAMES)
-        if result[0]:
-            return result
+        if self._strategy_enabled(ExtractionMethod.OPEN_GRAPH):
+            with ctx.timed(f"modified/{ExtractionMethod.OPEN_GRAPH.value}"):
+                result = self._extract_from_opengraph(tree, self.MODIFIED_META_NAMES, ctx)
+            if result[0]:
+                return result
         
         # Strategy 3: HTML5 time element
-        result = self._extract_from_time_element(tree, self.MODIFIED_SELECTORS)
-        if result[0]:
-            return result
+        if self._strategy_enabled(ExtractionMethod.HTML5_TIME):
+            with ctx.timed(f"modified/{ExtractionMethod.HTML5_TIME.value}"):
+                result = self._extract_from_time_element(tree, self.MODIFIED_SELECTORS, ctx)
+            if result[0]:
+                return result
         
         # Strategy 4: Meta tags
-        result = self._extract_from_meta_tags(tree, self.MODIFIED_META_NAMES)
-        if result[0]:
-            return result
+        if self._strategy_enabled(ExtractionMethod.META_TAGS):
+            with ctx.timed(f"modified/{ExtractionMethod.META_TAGS.value}"):
+                result = self._extract_from_meta_tags(tree, self.MODIFIED_META_NAMES, ctx)
+            if result[0]:
+                return result
         
         # Strategy 5: CSS selectors
-        result = self._extract_from_selectors(tree, self.MODIFIED_SELECTORS)
-        if result[0]:
-            return result
+        if self._strategy_enabled(ExtractionMethod.CSS_SELECTORS):
+            with ctx.timed(f"modified/{ExtractionMethod.CSS_SELECTORS.value}"):
+                result = self._extract_from_selectors(tree, self.MODIFIED_SELECTORS, ctx)
+            if result[0]:
+                return result
         
         # Strategy 6: htmldate library fallback
-        if self.use_htmldate and self.htmldate_available:
-            result = self._extract_with_htmldate(html_content, original=False)
+        if self.use_htmldate and self.htmldate_available and self._strategy_enabled(ExtractionMethod.HTMLDATE_LIB):
+            with ctx.timed(f"modified/{ExtractionMethod.HTMLDATE_LIB.value}"):
+                result = self._extract_with_htmldate(html_content, original=False)
             if result[0]:
                 return result
         
         return None, ExtractionMethod.NOT_FOUND.value, None
     
     def _extract_from_jsonld(
-        self, tree: etree._Element, date_field: str
+        self, tree: etree._Element, date_field: str, ctx: Optional['_DocumentContext'] = None
     ) -> Tuple[Optional[datetime], Optional[str], Optional[str]]:
         """Extract date from JSON-LD structured data."""
         import json
@@ -377,8 +957,9 @@ class HTMLDateExtractor:
                     for obj in objects:
                         if date_field in obj:
                             date_str = obj[date_field]
-                            parsed_date = self._parse_date(date_str)
+                            parsed_date = self._parse_date(date_str, ctx)
                             if parsed_date:
+                                self._record_rule(ctx, date_field)
                                 self.logger.debug(f"Found date in JSON-LD: {date_str}")
                                 return parsed_date, ExtractionMethod.JSON_LD.value, date_str
                 except json.JSONDecodeError:
@@ -389,7 +970,7 @@ class HTMLDateExtractor:
         return None, ExtractionMethod.NOT_FOUND.value, None
     
     def _extract_from_opengraph(
-        self, tree: etree._Element, meta_names: list
+        self, tree: etree._Element, meta_names: list, ctx: Optional['_DocumentContext'] = None
     ) -> Tuple[Optional[datetime], Optional[str], Optional[str]]:
         """Extract date from Open Graph meta tags."""
         for name in meta_names:
@@ -397,35 +978,37 @@ class HTMLDateExtractor:
             elements = tree.xpath(f'//meta[@property="{name}"]/@content')
             if elements:
                 date_str = elements[0]
-                parsed_date = self._parse_date(date_str)
+                parsed_date = self._parse_date(date_str, ctx)
                 if parsed_date:
+                    self._record_rule(ctx, name)
                     self.logger.debug(f"Found date in OG property: {date_str}")
                     return parsed_date, ExtractionMethod.OPEN_GRAPH.value, date_str
         
         return None, ExtractionMethod.NOT_FOUND.value, None
     
     def _extract_from_time_element(
-        self, tree: etree._Element, selectors: list
+        self, tree: etree._Element, selectors: list, ctx: Optional['_DocumentContext'] = None
     ) -> Tuple[Optional[datetime], Optional[str], Optional[str]]:
         """Extract date from HTML5 time elements."""
         for selector in selectors:
-            elements = tree.cssselect(selector)
+            elements = self._css(selector)(tree)
             for elem in elements:
                 # Check datetime attribute first
                 date_str = elem.get('datetime')
                 if not date_str:
-                    date_str = elem.text_content().strip()
+                    date_str = self._prescreen_candidate(elem.text_content())
                 
                 if date_str:
-                    parsed_date = self._parse_date(date_str)
+                    parsed_date = self._parse_date(date_str, ctx)
                     if parsed_date:
+                        self._record_rule(ctx, selector)
                         self.logger.debug(f"Found date in time element: {date_str}")
                         return parsed_date, ExtractionMethod.HTML5_TIME.value, date_str
         
         return None, ExtractionMethod.NOT_FOUND.value, None
     
     def _extract_from_meta_tags(
-        self, tree: etree._Element, meta_names: list
+        self, tree: etree._Element, meta_names: list, ctx: Optional['_DocumentContext'] = None
     ) -> Tuple[Optional[datetime], Optional[str], Optional[str]]:
         """Extract date from meta tags."""
         for name in meta_names:
@@ -437,31 +1020,33 @@ class HTMLDateExtractor:
             
             if elements:
                 date_str = elements[0]
-                parsed_date = self._parse_date(date_str)
+                parsed_date = self._parse_date(date_str, ctx)
                 if parsed_date:
+                    self._record_rule(ctx, name)
                     self.logger.debug(f"Found date in meta tag: {date_str}")
                     return parsed_date, ExtractionMethod.META_TAGS.value, date_str
         
         return None, ExtractionMethod.NOT_FOUND.value, None
     
     def _extract_from_selectors(
-        self, tree: etree._Element, selectors: list
+        self, tree: etree._Element, selectors: list, ctx: Optional['_DocumentContext'] = None
     ) -> Tuple[Optional[datetime], Optional[str], Optional[str]]:
         """Extract date using CSS selectors."""
         for selector in selectors:
             try:
-                elements = tree.cssselect(selector)
+                elements = self._css(selector)(tree)
                 for elem in elements:
                     # Try various attributes
                     date_str = (
                         elem.get('datetime') or
                         elem.get('content') or
-                        elem.text_content().strip()
+                        self._prescreen_candidate(elem.text_content())
                     )
                     
                     if date_str:
-                        parsed_date = self._parse_date(date_str)
+                        parsed_date = self._parse_date(date_str, ctx)
                         if parsed_date:
+                            self._record_rule(ctx, selector)
                             self.logger.debug(f"Found date via selector: {date_str}")
                             return parsed_date, ExtractionMethod.CSS_SELECTORS.value, date_str
             except Exception:
@@ -469,6 +1054,100 @@ class HTMLDateExtractor:
         
         return None, ExtractionMethod.NOT_FOUND.value, None
     
+    def _parse_lean(self, html_content: str) -> etree._Element:
+        """Parse with this thread's tuned parser and drop the subtrees no strategy looks at."""
+        lean_parser = getattr(self._local, 'lean_parser', None)
+        if lean_parser is None:
+            # Parsers keep state between documents and must not be used by two threads at once
+            lean_parser = self._local.lean_parser = html.HTMLParser(
+                remove_comments=True, remove_pis=True, huge_tree=True
+            )
+        tree = html.fromstring(html_content, parser=lean_parser)
+        etree.strip_elements(tree, 'style', 'svg', with_tail=False)
+        for script in tree.xpath('//script[not(@type="application/ld+json")]'):
+            script.drop_tree()
+        return tree
+
+    def rules_snapshot(self) -> Dict[str, Any]:
+        """The rules that decide which dates are found, stored next to the results (see provenance.py)."""
+        return {
+            'PUBLISHED_META_NAMES': list(self.PUBLISHED_META_NAMES),
+            'MODIFIED_META_NAMES': list(self.MODIFIED_META_NAMES),
+            'DATE_SELECTORS': list(self.DATE_SELECTORS),
+            'MODIFIED_SELECTORS': list(self.MODIFIED_SELECTORS),
+            'DATE_PATTERNS': list(self.DATE_PATTERNS),
+            'DATE_LIKE_RE': self.DATE_LIKE_RE.pattern,
+            'MAX_CANDIDATE_LENGTH': self.MAX_CANDIDATE_LENGTH,
+            # How HTML pages are parsed, and which regions the date scan skips
+            'LEAN_PARSE': self.lean_parse,
+            'BOILERPLATE_MASKS': self.boilerplate_cache.rules_snapshot() if self.boilerplate_cache is not None else None,
+        }
+
+    def extraction_kwargs(self) -> Dict[str, Any]:
+        """The constructor arguments that change how a page is extracted (kept with captured slow pages)."""
+        return {
+            'use_htmldate': self.use_htmldate,
+            'triage': self.triage,
+            'disabled_strategies': sorted(self.disabled_strategies),
+            'max_candidate_length': self.MAX_CANDIDATE_LENGTH,
+            'htmldate_extensive_search': self.htmldate_extensive_search,
+            'lean_parse': self.lean_parse,
+            'boilerplate_cache_path': self.boilerplate_cache.path if self.boilerplate_cache is not None else None,
+        }
+
+    @staticmethod
+    def _record_rule(ctx: Optional['_DocumentContext'], rule: str):
+        if ctx is not None:
+            ctx.matched_rule = rule
+
+    def _strategy_enabled(self, method: ExtractionMethod) -> bool:
+        return method.value not in self.disabled_strategies
+
+    def _css(self, selector: str) -> CSSSelector:
+        """The compiled selector for this thread (compiled XPath objects are not shared across threads)."""
+        selectors = getattr(self._local, 'selectors', None)
+        if selectors is None:
+            selectors = self._local.selectors = {}
+        compiled = selectors.get(selector)
+        if compiled is None:
+            # The same translator tree.cssselect() uses for HTML documents
+            compiled = selectors[selector] = CSSSelector(selector, translator='html')
+        return compiled
+
+    def _count_prescreen(self, outcome: str):
+        with self._stats_lock:
+            self.prescreen_stats[outcome] += 1
+
+    def _prescreen_candidate(self, text: str) -> Optional[str]:
+        """
+        Screen element text before handing it to the date parsers.
+
+        Selectors like [class*="date"] often match whole sidebars or article containers,
+        and parsing kilobytes of text with dateparser is slow and yields fuzzy dates.
+        Text containing a DATE_PATTERNS match is reduced to that match. Otherwise only
+        short text that looks like a date is passed on.
+
+        Returns:
+            The string to parse, or None if the candidate is rejected
+        """
+        text = text.strip()
+        if not text:
+            return None
+
+        match = self._date_patterns_re.search(text)
+        if match:
+            self._count_prescreen('extracted')
+            return match.group(0)
+
+        if len(text) > self.MAX_CANDIDATE_LENGTH:
+            self._count_prescreen('rejected_too_long')
+            return None
+        if self.DATE_LIKE_RE.search(text):
+            self._count_prescreen('accepted')
+            return text
+        self._count_prescreen('rejected_not_date_like')
+        return None
+    
     def _extract_with_htmldate(
         self, html_content: str, original: bool = True
     ) -> Tuple[Optional[datetime], Optional[str], Optional[str]]:
@@ -479,7 +1158,7 @@ class HTMLDateExtractor:
             date_str = find_date(
                 html_content,
                 original_date=original,
-                extensive_search=True,
+                extensive_search=self.htmldate_extensive_search,
                 outputformat='%Y-%m-%d'
             )
             
@@ -495,22 +1174,38 @@ class HTMLDateExtractor:
 
     async def _extract_with_llm(self, html_content: str) -> DateResult:
         """Using LLM to extract both published date and modified date"""
-        print("===== LLMExtractor Start =====")
-        async with LLMDateExtractor() as extractor:
+        self.logger.debug("LLM extraction started")
+        async with LLMDateExtractor(**self.llm_kwargs) as extractor:
             result = await extractor.extract_dates(html_content=html_content)
             return result
     
-    def _parse_date(self, date_string: str) -> Optional[datetime]:
+    def _parse_date(self, date_string: str, ctx: Optional['_DocumentContext'] = None) -> Optional[datetime]:
         """
         Parse a date string into datetime object.
         
         Tries multiple parsing strategies to handle various formats.
+        If the document declares its language, dateparser only tries those languages.
         """
         if not date_string:
             return None
         
         date_string = date_string.strip()
-        
+        # Parsed for the whole chunk by extract_many
+        if ctx is not None and ctx.preparsed is not None:
+            value = ctx.preparsed.get(date_string)
+            if value is not None:
+                return value
+        if self._parsed_dates is None:
+            return self._parse_date_uncached(date_string, ctx)
+
+        key = (date_string, ctx.languages if ctx else None)
+        found, value = self._parsed_dates.get(key)
+        if not found:
+            value = self._parse_date_uncached(date_string, ctx)
+            self._parsed_dates.put(key, value)
+        return value
+
+    def _parse_date_uncached(self, date_string: str, ctx: Optional['_DocumentContext'] = None) -> Optional[datetime]:
         # Try dateutil parser first (handles ISO formats well)
         try:
             dt = parser.parse(date_string, tzinfos={}, fuzzy=False)
@@ -520,16 +1215,78 @@ class HTMLDateExtractor:
         
         # Try dateparser for more flexible parsing
         try:
-            date = dateparser.parse(
-                date_string,
-                settings={'STRICT_PARSING': False, 'RETURN_AS_TIMEZONE_AWARE': False}
-            )
+            date_parser = self._get_date_parser(ctx.languages) if ctx and ctx.languages else None
+            if date_parser:
+                date = date_parser.get_date_data(date_string).date_obj
+            else:
+                # No usable language hint: let dateparser detect the language
+                date = dateparser.parse(date_string, settings=self.DATEPARSER_SETTINGS)
             if date :
                 return date.date() 
         except Exception:
             pass
         
         return None
+
+    def _detect_languages(self, tree: etree._Element) -> Optional[Tuple[str, ...]]:
+        """
+        Read the page language from <html lang>, og:locale and content-language meta tags.
+
+        Returns:
+            Sorted tuple of language codes (e.g. ('de', 'en')), or None if the page has no hint
+        """
+        hints = []
+        root = tree.getroottree().getroot()
+        hints.append(root.get('lang') or root.get('{http://www.w3.org/XML/1998/namespace}lang'))
+        hints.extend(tree.xpath('//meta[@property="og:locale"]/@content'))
+        for meta in tree.xpath('//meta[@http-equiv]'):
+            if meta.get('http-equiv', '').lower() == 'content-language':
+                hints.append(meta.get('content'))
+        hints.extend(tree.xpath('//meta[@name="language"]/@content'))
+
+        languages = set()
+        for hint in hints:
+            for tag in (hint or '').split(','):
+                # "en_US", "en-us" -> "en"
+                language = tag.strip().replace('_', '-').split('-')[0].lower()
+                if language.isalpha() and 2 <= len(language) <= 3:
+                    languages.add(language)
+        if not languages:
+            return None
+
+        # Dates in metadata and bylines are often English even on non-English pages
+        languages.add('en')
+        return tuple(sorted(languages))
+
+    def _get_date_parser(self, languages: Tuple[str, ...]) -> Optional[DateDataParser]:
+        """
+        Get the dateparser parser restricted to the given languages, reused across documents.
+
+        Languages dateparser does not know are dropped; None if none is left.
+        """
+        with self._date_parsers_lock:
+            if languages in self._date_parsers:
+                return self._date_parsers[languages]
+            date_parser = self._new_date_parser(languages)
+            self._date_parsers[languages] = date_parser
+        return date_parser
+
+    def _new_date_parser(self, languages: Tuple[str, ...]) -> Optional[DateDataParser]:
+        date_parser = None
+        try:
+            date_parser = DateDataParser(languages=list(languages), settings=self.DATEPARSER_SETTINGS)
+        except ValueError:
+            # Some hint is not a language dateparser supports; keep the ones it does
+            supported = []
+            for language in languages:
+                try:
+                    DateDataParser(languages=[language])
+                    supported.append(language)
+                except ValueError:
+                    self.logger.debug(f"dateparser does not support language hint: {language}")
+            if supported:
+                date_parser = DateDataParser(languages=supported, settings=self.DATEPARSER_SETTINGS)
+        return date_parser
     
     def _calculate_confidence(
         self, extract_method: ExtractionMethod
@@ -542,7 +1299,8 @@ class HTMLDateExtractor:
         
         medium_confidence_methods = {
             ExtractionMethod.META_TAGS.value,
-            ExtractionMethod.HTMLDATE_LIB.value
+            ExtractionMethod.HTMLDATE_LIB.value,
+            ExtractionMethod.PDF_METADATA.value
         }
 
         low_confidence_methods = {
@@ -1,8 +1,15 @@
+import argparse
 import json
 import os
 from tqdm import tqdm
 from htmldate import find_date
 from html_date_extractor import HTMLDateExtractor, DateResult
+from checkpoint import BatchCheckpoint
+from corpus_index import CorpusIndex
+from dataclasses import replace
+from pipeline import ExtractionPipeline, iter_content_file
+from provenance import plan_reextraction, save_rules_snapshot, summarize_plan
+from sharding import clear_shard_marker, parse_shard, shard_dir, write_shard_marker
 from typing import List, Dict
 from datetime import date, datetime
 
@@ -12,11 +19,30 @@ def filter_html_before_cutoff(html_content: str, cutoff_date: date) -> DateResul
     
             
 if __name__ == "__main__":
-    extractor = HTMLDateExtractor(disable_logger=True)
-
     INPUT_FILE = "data/first_content_sample.json"
     OUTPUT_FOLDER = "data/extract_results"
     USE_LLM_AS_FALLBACK = False
+    HEURISTIC_WORKERS = 4
+    QUEUE_SIZE = 64
+
+    arg_parser = argparse.ArgumentParser(description="Extract the dates of every page in INPUT_FILE.")
+    arg_parser.add_argument('--resume', action='store_true',
+                            help="Continue the previous run from its checkpoint instead of starting over")
+    arg_parser.add_argument('--checkpoint-dir', default=os.path.join(OUTPUT_FOLDER, "checkpoint"),
+                            help="Where the progress of the run is recorded")
+    arg_parser.add_argument('--capture-slow', type=float, metavar='SECONDS',
+                            help="Save pages whose extraction takes at least SECONDS to SLOW_PAGES_FOLDER")
+    arg_parser.add_argument('--worker-mode', choices=['process', 'thread'], default='process',
+                            help="Run the heuristics in processes (one extractor each) or threads (one shared extractor)")
+    arg_parser.add_argument('--lean-parse', action='store_true',
+                            help="Drop style, svg and non-JSON-LD scripts at parse time (faster, misses dates in inline scripts)")
+    arg_parser.add_argument('--shard', type=parse_shard, metavar='i/N',
+                            help="Only extract shard i of N (0-based) into SHARDS_FOLDER; merge with sharding.py")
+    arg_parser.add_argument('--reextract', action='store_true',
+                            help="Only redo the pages of OUTPUT_FILE whose results the rule changes since their run could change")
+    args = arg_parser.parse_args()
+    if args.reextract and args.shard is not None:
+        arg_parser.error("--reextract works on the merged OUTPUT_FILE, not on shards")
     print(f"USE_LLM_AS_FALLBACK: {USE_LLM_AS_FALLBACK}")
 
     try:
@@ -26,35 +52,100 @@ if __name__ == "__main__":
         print(f"Error creating folder: {e}")
 
     OUTPUT_FILE = os.path.join(OUTPUT_FOLDER, f"date_extractor_result.json")
-    extract_results = []
-
-    # Load html content from the INPUT_FILE
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    # Extract the HTMLS whose extracted last_found_date <= CUTOFF_DATE
-    for d in tqdm(data[0]["content_results"]):
-        url = d['url']
-        html_content = d['text']
-        isValid = d['success']
-
-        date_result = extractor.extract_from_html(html_content, use_llm_as_fallback=USE_LLM_AS_FALLBACK)
-        published_date_str = f"{date_result.published_date.isoformat()} (method: {date_result.published_method}, confidence: {date_result.pub_confidence})" if date_result.published_date else None
-        modified_date_str = f"{date_result.modified_date.isoformat()} (method: {date_result.modified_method}, confidence: {date_result.mod_confidence})" if date_result.modified_date else None
-        if isValid:
-            extract_results.append({
-                'url': url,
-                'published_date': published_date_str,
-                'modified_date': modified_date_str,
-                'last_date_found': date_result.last_date_found.isoformat() if date_result.last_date_found else None,
-                'all_dates_found': [d.isoformat() for d in date_result.dates_found] if date_result.dates_found else None,
-                # 'html_content': html_content
-            })
-    
-    # Write the results to the OUTPUT_FILE
+    INDEX_FOLDER = os.path.join(OUTPUT_FOLDER, "date_index")
+    # One checkpoint per shard of a sharded run; on a filesystem shared by all nodes
+    SHARDS_FOLDER = os.path.join(OUTPUT_FOLDER, "shards")
+    # The extractor rules of each run, by version (see provenance.py)
+    RULES_FOLDER = os.path.join(OUTPUT_FOLDER, "rules")
+    # Learned per-domain template regions, kept across runs
+    BOILERPLATE_CACHE_FILE = os.path.join(OUTPUT_FOLDER, "boilerplate_masks.json")
+    # Replay captured slow pages with: python slow_capture.py data/slow_pages
+    SLOW_PAGES_FOLDER = "data/slow_pages"
+    extractor_kwargs = {'disable_logger': True, 'boilerplate_cache_path': BOILERPLATE_CACHE_FILE}
+    if args.lean_parse:
+        extractor_kwargs['lean_parse'] = True
+    if args.capture_slow is not None:
+        extractor_kwargs.update(slow_capture_dir=SLOW_PAGES_FOLDER, slow_threshold_seconds=args.capture_slow)
+
+    # Results record the version of the rules they were extracted with; keep the rules of every version
+    rules = HTMLDateExtractor(**extractor_kwargs).rules_snapshot()
+    print(f"Extractor rules version: {save_rules_snapshot(rules, RULES_FOLDER)}")
+    # The pages of the INPUT_FILE (its first question) are read and decoded by the pipeline's reader stage
+    items = iter_content_file(INPUT_FILE, max_questions=1)
+
+    # Finished pages are appended to the checkpoint segments as they come out of the pipeline
+    checkpoint_dir = args.checkpoint_dir
+    if args.shard is not None:
+        checkpoint_dir = shard_dir(SHARDS_FOLDER, *args.shard)
+        # Until this run ends, the shard is unfinished
+        clear_shard_marker(checkpoint_dir)
+        print(f"Shard {args.shard[0]}/{args.shard[1]}, checkpoint in '{checkpoint_dir}'")
+    previous_results = None
+    if args.reextract:
+        # Redo only the pages whose outcome the rule changes could affect
+        with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
+            previous_results = json.load(f)
+        stale = plan_reextraction(previous_results, rules, RULES_FOLDER)
+        print(summarize_plan(previous_results, stale))
+        # Older result files have no question ids; their pages are matched by url
+        stale_pages = {(record.get('question_id'), record['url']) for record, _ in stale}
+        items = (
+            replace(item, offset=i)
+            for i, item in enumerate(
+                item for item in items
+                if (item.question_id, item.url) in stale_pages or (None, item.url) in stale_pages
+            )
+        )
+        checkpoint_dir = os.path.join(OUTPUT_FOLDER, "checkpoint-reextract")
+    checkpoint = BatchCheckpoint(checkpoint_dir, resume=args.resume)
+    # The input is streamed, so the number of pages is only known up front when re-extracting
+    progress = tqdm(total=len(stale) if args.reextract else None, initial=len(checkpoint.completed))
+
+    # Read, extract, fall back to the LLM, and write the results in overlapped stages
+    pipeline = ExtractionPipeline(
+        use_llm_as_fallback=USE_LLM_AS_FALLBACK,
+        heuristic_workers=HEURISTIC_WORKERS,
+        queue_size=QUEUE_SIZE,
+        sink=lambda item: progress.update(),
+        extractor_kwargs=extractor_kwargs,
+        checkpoint=checkpoint,
+        worker_mode=args.worker_mode,
+        shard=args.shard
+    )
+    pipeline.run(items)
+    progress.close()
+    checkpoint.close()
+
+    for stage in pipeline.stats_report():
+        print(stage)
+    if checkpoint.pending_llm:
+        print(f"⚠ {len(checkpoint.pending_llm)} pages are still waiting for the LLM fallback, rerun with --resume to retry them")
+
+    if args.shard is not None:
+        # The final OUTPUT_FILE and index are built from all shards at once
+        write_shard_marker(checkpoint_dir, *args.shard, checkpoint)
+        print(f"✅ Shard {args.shard[0]}/{args.shard[1]} wrote {len(checkpoint.completed)} results. When every shard is done, run:")
+        print(f"   python sharding.py merge {SHARDS_FOLDER} --output {OUTPUT_FILE} --index {INDEX_FOLDER}")
+        raise SystemExit(0)
+
+    # Write the results of this and all resumed runs to the OUTPUT_FILE
+    extract_results = checkpoint.records()
+    if previous_results is not None:
+        # The re-extracted pages replace their old results, the other results are kept as they are
+        redone = {(record['question_id'], record['url']): record for record in extract_results}
+        redone_by_url = {record['url']: record for record in extract_results}
+        extract_results = [
+            redone.get((record['question_id'], record['url']), record) if record.get('question_id') is not None
+            else redone_by_url.get(record['url'], record)
+            for record in previous_results
+        ]
     try: 
         with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
             json.dump(extract_results, f, ensure_ascii=False, indent=2)
         print(f"✅ Successfully wrote {len(extract_results)} cutoff results to '{OUTPUT_FILE}'")
     except Exception as e:
-        print(f"❌ An error occurred while writing to file: {e}")
\ No newline at end of file
+        print(f"❌ An error occurred while writing to file: {e}")
+
+    # Columnar index for fast cutoff/range queries over the results
+    CorpusIndex.from_records(extract_results).save(INDEX_FOLDER)
+    print(f"✅ Indexed the results into '{INDEX_FOLDER}'")
\ No newline at end of file
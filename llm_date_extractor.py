@@ -1,12 +1,16 @@
 import asyncio
 import json
+import random
 import aiohttp
 import numpy as np
 import logging
+import os
 import re
 import tiktoken
 import time
-from typing import List, Dict, Any
+from collections import deque
+from datetime import date
+from typing import List, Dict, Any, Optional, Union
 from sklearn.metrics.pairwise import cosine_similarity
 from shared import DateResult, ExtractionMethod
 
@@ -15,7 +19,7 @@ logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-# Service URLs
+# Service URLs (override with the environment variables of the same name, e.g. to point at llm_stub_server.py)
 # LLM_URL = "http://localhost:31970/v1"
 # SERP_URL = "http://localhost:10086"
 # ULSCAR_URL = "http://localhost:23352"
@@ -24,10 +28,10 @@ logger = logging.getLogger(__name__)
 # LLM_URL = "https://oai.frederickpi.com/v1"
 # LLM_URL = "http://ds-serv10.ucsd.edu:18000/v1"
 # EMB_URL = "http://ds-serv11.ucsd.edu:18002/v1"
-LLM_URL = "https://localllm.frederickpi.com/v1"
-EMB_URL = "https://localllm.frederickpi.com/v1"
-SERP_URL = "https://serp.frederickpi.com"
-ULSCAR_URL = "https://ulscar.frederickpi.com"
+LLM_URL = os.environ.get("LLM_URL", "https://localllm.frederickpi.com/v1")
+EMB_URL = os.environ.get("EMB_URL", "https://localllm.frederickpi.com/v1")
+SERP_URL = os.environ.get("SERP_URL", "https://serp.frederickpi.com")
+ULSCAR_URL = os.environ.get("ULSCAR_URL", "https://ulscar.frederickpi.com")
 
 
 # Model names
@@ -41,7 +45,10 @@ MODEL_MAX_LEN = 10000  # Max tokens for the model
 MAX_REPORT_TOKENS = min(4000, MODEL_MAX_LEN - CONTEXT_N_CHUNKS * CHUNK_TOKENS)  # Max tokens for final report
 print(f"Max report tokens: {MAX_REPORT_TOKENS}")
 EMBED_BATCH_SIZE = 128 # backend limit
-MAX_CONCURRENT_REQ = 16 
+MAX_CONCURRENT_REQ = int(os.environ.get("MAX_CONCURRENT_REQ", 16))
+STRUCTURED_MAX_TOKENS = 96  # Max tokens of a structured-output answer
+PACK_TOKEN_BUDGET = 8000  # Max document tokens in one packed request
+PACK_MAX_DOCS = 8  # Max documents in one packed request
 
 def get_tokenizer(model_name: str = "gpt2"):
     """Return a tiktoken encoding; fall back to naive split."""
@@ -82,9 +89,153 @@ def chunk_text(text: str,
     return chunks
 
 
+def build_prompt(html_content: str) -> str:
+    """The extraction prompt; the answer is wrapped in <JSON></JSON> tags."""
+    return f"""
+        Role: 
+        You are an expert HTML parser and data extraction agent. Your task is to analyze raw HTML content and extract the url, published_date, and modified_date.
+        You must also identify the specific source method used for each date field independently.
+
+        Extraction Rules:
+
+        Dates & Method: For both published_date and modified_date individually, search in the following strict priority order. Once you find valid dates in a higher priority source, stop looking and use that source as the extraction_source.
+        - Priority 1: json-ld (Look for datePublished/dateModified in <script type="application/ld+json">).
+        - Priority 2: meta-tags (Look for article:published_time, og:updated_time, etc.).
+        - Priority 3: html-body (Look for visible text like "Posted on", "Last updated", or <time> tags)
+
+        Independence: You may find the published_date in json-ld but the modified_date in html-body. This is acceptable.
+        Formatting: Convert all extracted dates to YYYY-MM-DD.
+
+        Null Values:
+        - If a date is not found, set the date value to null.
+        - If a date is null, set its corresponding _extraction_source to null.
+
+        Output Format Constraints:
+        You must output the result wrapped in <json> and </JSON> tags.
+        You must use double curly braces {{ and }} surrounding the JSON object.
+        Do not include markdown code blocks (like ```json). Just the raw text.
+        Required Output Structure:
+        Plaintext
+
+        <JSON>
+        {{
+            "published_date": "YYYY-MM-DD" or null,
+            "pub_extraction_method": "json-ld" or "meta-tags" or "html-body" or null,
+            "modified_date": "YYYY-MM-DD" or null,
+            "mod_extraction_method": "json-ld" or "meta-tags" or "html-body" or null
+        }}
+        </JSON>
+        Input HTML: [{html_content}]
+        """
+
+
+def build_structured_prompt(html_content: str) -> str:
+    """Shorter extraction prompt for structured output; the answer is a bare JSON object."""
+    return f"""Extract the published and modified date of this web page.
+For each date, use the first source that has it: json-ld (datePublished/dateModified in <script type="application/ld+json">), then meta-tags (article:published_time, og:updated_time, ...), then html-body (visible text like "Posted on", "Last updated", or <time> tags).
+Answer with only this JSON object, dates as YYYY-MM-DD, null when not found (and a null method for a null date):
+{{"published_date": "YYYY-MM-DD" or null, "pub_extraction_method": "json-ld" or "meta-tags" or "html-body" or null, "modified_date": "YYYY-MM-DD" or null, "mod_extraction_method": "json-ld" or "meta-tags" or "html-body" or null}}
+Input HTML: [{html_content}]"""
+
+
+def build_packed_prompt(documents: List[str]) -> str:
+    """Extraction prompt for several documents; the answer is one JSON object keyed by document id."""
+    docs = "\n".join(f'<DOC id="{i}">\n{html_content}\n</DOC>' for i, html_content in enumerate(documents))
+    return f"""Extract the published and modified date of each of the {len(documents)} web pages below. Each page is wrapped in <DOC id="..."></DOC> tags.
+For each date, use the first source that has it: json-ld (datePublished/dateModified in <script type="application/ld+json">), then meta-tags (article:published_time, og:updated_time, ...), then html-body (visible text like "Posted on", "Last updated", or <time> tags).
+Treat every page on its own; never use a date from one page for another.
+Answer with only one JSON object that has an entry for every page id, dates as YYYY-MM-DD, null when not found (and a null method for a null date):
+{{"0": {{"published_date": "YYYY-MM-DD" or null, "pub_extraction_method": "json-ld" or "meta-tags" or "html-body" or null, "modified_date": "YYYY-MM-DD" or null, "mod_extraction_method": "json-ld" or "meta-tags" or "html-body" or null}}, "1": {{...}}, ...}}
+{docs}"""
+
+
+def parse_llm_date(value: Any) -> Optional[date]:
+    """Convert a "YYYY-MM-DD" string from the LLM into a date (None if missing or malformed)."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        return None
+
+
+class LLMExtractionError(RuntimeError):
+    """Raised when every attempt to get a valid answer from the LLM failed."""
+
+
 class LLMDateExtractor:
-    def __init__(self):
+    """
+    Extracts the published and modified date of a page with the LLM.
+
+    Tail-latency controls:
+    * Every request has a timeout, and each extract_dates call has an overall deadline.
+    * Failed tries are retried with exponential backoff and full jitter.
+    * With hedge_percentile set, a duplicate request is sent once the first one has taken
+      longer than that percentile of recent latencies; the first valid answer wins.
+    * structured_output asks for a bare JSON object at temperature 0 with a small
+      max_tokens, which cuts generation time and the number of malformed answers.
+
+    extract_dates_packed sends several pages in one request to amortize the prompt
+    and per-request overhead; pages whose answer is missing or malformed are retried
+    on their own with extract_dates.
+    """
+
+    METHOD_TO_CONFIDENCE = {
+        "json-ld": "high",
+        "meta-tags": "medium",
+        "html-body": "low"
+    }
+
+    def __init__(
+        self,
+        llm_url: str = LLM_URL,
+        request_timeout: float = 60.0,
+        deadline: float = 180.0,
+        max_tries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        structured_output: bool = False,
+        pack_token_budget: int = PACK_TOKEN_BUDGET,
+        pack_max_docs: int = PACK_MAX_DOCS
+    ):
+        """
+        Initialize the extractor.
+
+        Args:
+            llm_url: Base URL of the OpenAI-compatible endpoint
+            request_timeout: Seconds before a single request is abandoned
+            deadline: Seconds before extract_dates gives up, including retries and backoff
+            max_tries: Maximum number of tries per extract_dates call
+            backoff_base: Backoff before the second try; doubles for every further try
+            backoff_max: Upper bound of the backoff
+            hedge_percentile: Send a hedged duplicate request once a request is slower than this
+                percentile (e.g. 95) of the recent latencies. None disables hedging.
+            hedge_min_samples: Number of observed latencies needed before hedging starts
+            structured_output: Ask for a bare JSON object, deterministically and with few tokens
+            pack_token_budget: Max document tokens in one packed request (counted with the gpt2
+                encoding, so leave headroom below the model's context length)
+            pack_max_docs: Max documents in one packed request
+        """
+        if max_tries < 1:
+            raise ValueError(f"max_tries must be at least 1, got {max_tries}")
         self.session = None
+        self.llm_url = llm_url
+        self.request_timeout = request_timeout
+        self.deadline = deadline
+        self.max_tries = max_tries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.structured_output = structured_output
+        self.pack_token_budget = pack_token_budget
+        self.pack_max_docs = pack_max_docs
+        self._encoder = None
+        # Latencies of recent successful requests, for the hedging percentile
+        self.latencies = deque(maxlen=500)
+        self.hedged_requests = 0
         
     async def __aenter__(self):
         self.session = aiohttp.ClientSession()
@@ -94,14 +245,15 @@ class LLMDateExtractor:
         if self.session:
             await self.session.close()
 
-    async def _post(self, url: str, data: Any) -> Dict:  # noqa: ANN401
+    async def _post(self, url: str, data: Any, timeout: Optional[float] = None) -> Dict:  # noqa: ANN401
         """POST JSON and *always* return a dict.
 
         * 2-step parsing lets us print the raw body when the server emits an
           error page so that bug‑hunting is easier.
         * Raises `RuntimeError` for HTTP≥400 or when the body is not JSON.
+        * Raises `asyncio.TimeoutError` if the response takes longer than `timeout` seconds.
         """
-        async with self.session.post(url, json=data) as resp:
+        async with self.session.post(url, json=data, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
             raw = await resp.text()
             if resp.status >= 400:
                 raise RuntimeError(f"{url} → {resp.status}: {raw[:200]}")
@@ -118,16 +270,112 @@ class LLMDateExtractor:
         async with self.session.get(url) as resp:
             return await resp.json()
 
+    def _hedge_delay(self) -> Optional[float]:
+        """Seconds after which a hedged request is sent, None if hedging is off or not warmed up."""
+        if self.hedge_percentile is None or len(self.latencies) < self.hedge_min_samples:
+            return None
+        return float(np.percentile(self.latencies, self.hedge_percentile))
+
+    async def _timed_completion(self, payload: Dict, timeout: float) -> str:
+        """Send one chat completion request and return the message content."""
+        start = time.perf_counter()
+        response = await self._post(f"{self.llm_url}/chat/completions", payload, timeout=timeout)
+        content = response['choices'][0]['message']['content'].strip()
+        self.latencies.append(time.perf_counter() - start)
+        return content
+
+    async def _complete(self, payload: Dict, timeout: float) -> str:
+        """
+        Send a chat completion request, hedged with a duplicate if it is slow.
 
-    async def extract_dates(self, html_content: str) -> DateResult:
+        Returns the content of the first successful response and cancels the other request.
+        """
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is None or hedge_delay >= timeout:
+            return await self._timed_completion(payload, timeout)
+
+        pending = set()
+        error = None
+        try:
+            # Created inside the try, so a cancelled caller never leaves a request running
+            primary = asyncio.create_task(self._timed_completion(payload, timeout))
+            pending = {primary}
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if done:
+                return primary.result()
+
+            self.hedged_requests += 1
+            pending.add(asyncio.create_task(self._timed_completion(payload, timeout - hedge_delay)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _build_payload(self, html_content: str) -> Dict:
+        if not self.structured_output:
+            return {
+                "model": GENERATIVE_MODEL,
+                "messages": [
+                    {"role": "user", "content": build_prompt(html_content)}
+                ],
+                "max_tokens": 500,
+                "temperature": 0.7,
+            }
+        return {
+            "model": GENERATIVE_MODEL,
+            "messages": [
+                {"role": "user", "content": build_structured_prompt(html_content)}
+            ],
+            # The answer is a ~60 token JSON object; no room to ramble or think
+            "max_tokens": STRUCTURED_MAX_TOKENS,
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+            "chat_template_kwargs": {"enable_thinking": False},
+        }
+
+    def _parse_content(self, content: str) -> DateResult:
+        """Turn the model's answer into a DateResult; raises ValueError if it is malformed."""
+        match = re.search(r'<JSON>(.*?)</JSON>', content, re.DOTALL | re.IGNORECASE)
+        if not match:
+            # Structured output is a bare object; tolerate stray text around it
+            match = re.search(r'(\{.*\})', content, re.DOTALL)
+        if not match:
+            raise ValueError("No <JSON> block in the response")
+
+        extract_result = json.loads(match.group(1).strip())
+        if not isinstance(extract_result, Dict):
+            raise ValueError("Invalid JSON format or length")
+        return self._to_date_result(extract_result)
+
+    def _to_date_result(self, extract_result: Dict) -> DateResult:
+        pub_method = extract_result.get('pub_extraction_method') or ExtractionMethod.NOT_FOUND.value
+        mod_method = extract_result.get('mod_extraction_method') or ExtractionMethod.NOT_FOUND.value
+        return DateResult(
+            published_date=parse_llm_date(extract_result.get('published_date')),
+            modified_date=parse_llm_date(extract_result.get('modified_date')),
+            published_method=f"{ExtractionMethod.LLM.value} ({pub_method})",
+            modified_method=f"{ExtractionMethod.LLM.value} ({mod_method})",
+            pub_confidence=self.METHOD_TO_CONFIDENCE.get(pub_method, "not found"),
+            mod_confidence=self.METHOD_TO_CONFIDENCE.get(mod_method, "not found")
+        )
+
+    async def extract_dates(self, html_content: str, raise_on_failure: bool = False) -> DateResult:
         """
         Try to extract published date and modified date with LLM
 
         Args:
             html_content: The raw html
+            raise_on_failure: Raise LLMExtractionError instead of returning a "not found"
+                result when every try failed (e.g. the endpoint is down)
 
         Return: 
-            Dictionry output from the LLM, will be used as json object.
+            DateResult built from the LLM's answer:
             {
                 "published_date": "YYYY-MM-DD" or null,
                 "pub_extraction_method": "json-ld" or "meta-tags" or "html-body" or null,
@@ -135,90 +383,30 @@ class LLMDateExtractor:
                 "mod_extraction_method": "json-ld" or "meta-tags" or "html-body" or null
             }
         """
+        payload = self._build_payload(html_content)
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + self.deadline
         
-        prompt = f"""
-        Role: 
-        You are an expert HTML parser and data extraction agent. Your task is to analyze raw HTML content and extract the url, published_date, and modified_date.
-        You must also identify the specific source method used for each date field independently.
-
-        Extraction Rules:
-
-        Dates & Method: For both published_date and modified_date individually, search in the following strict priority order. Once you find valid dates in a higher priority source, stop looking and use that source as the extraction_source.
-        - Priority 1: json-ld (Look for datePublished/dateModified in <script type="application/ld+json">).
-        - Priority 2: meta-tags (Look for article:published_time, og:updated_time, etc.).
-        - Priority 3: html-body (Look for visible text like "Posted on", "Last updated", or <time> tags)
-
-        Independence: You may find the published_date in json-ld but the modified_date in html-body. This is acceptable.
-        Formatting: Convert all extracted dates to YYYY-MM-DD.
-
-        Null Values:
-        - If a date is not found, set the date value to null.
-        - If a date is null, set its corresponding _extraction_source to null.
-
-        Output Format Constraints:
-        You must output the result wrapped in <json> and </JSON> tags.
-        You must use double curly braces {{ and }} surrounding the JSON object.
-        Do not include markdown code blocks (like ```json). Just the raw text.
-        Required Output Structure:
-        Plaintext
-
-        <JSON>
-        {{
-            "published_date": "YYYY-MM-DD" or null,
-            "pub_extraction_method": "json-ld" or "meta-tags" or "html-body" or null,
-            "modified_date": "YYYY-MM-DD" or null,
-            "mod_extraction_method": "json-ld" or "meta-tags" or "html-body" or null
-        }}
-        </JSON>
-        Input HTML: [{html_content}]
-        """
-        
-        payload = {
-            "model": GENERATIVE_MODEL,
-            "messages": [
-                {"role": "user", "content": prompt}
-            ],
-            "max_tokens": 500,
-            "temperature": 0.7,
-        }
-
-        method_to_confidence = {
-            "json-ld": "high",
-            "meta-tags": "medium",
-            "html-body": "low"
-        }
-        
-        max_tries = 3
-        for _ in range(max_tries):
+        last_error = None
+        for attempt in range(self.max_tries):
+            remaining = deadline_at - loop.time()
+            if remaining <= 0:
+                last_error = asyncio.TimeoutError(f"deadline of {self.deadline}s exceeded")
+                break
             try:
-                response = await self._post(f"{LLM_URL}/chat/completions", payload)
-                # print(f"response: {response}")
-                content = response['choices'][0]['message']['content'].strip()
-
-                # print(f"\ncontent: {content}")
-                # Extract JSON array from the response
-                match = re.search(r'<JSON>(.*?)</JSON>', content, re.DOTALL)
-
-                # print(f"\nmatch: {match}")
-                if match:
-                    json_content = match.group(1).strip()
-                    extract_result = json.loads(json_content)
-
-                    if isinstance(extract_result, Dict):
-                        return DateResult(
-                            published_date=extract_result['published_date'],
-                            modified_date=extract_result['modified_date'],
-                            published_method=f"{ExtractionMethod.LLM.value} ({extract_result['pub_extraction_method']})",
-                            modified_method=f"{ExtractionMethod.LLM.value} ({extract_result['mod_extraction_method']})",
-                            pub_confidence=method_to_confidence[extract_result['pub_extraction_method']],
-                            mod_confidence=method_to_confidence[extract_result['mod_extraction_method']]
-                        )
-                    else:
-                        raise ValueError("Invalid JSON format or length")
-
+                content = await self._complete(payload, timeout=min(self.request_timeout, remaining))
+                return self._parse_content(content)
             except Exception as e:
-                logger.error(f"Error extracting dates: {e}, retrying...")
-        
+                last_error = e
+                logger.error(f"Error extracting dates (try {attempt + 1}/{self.max_tries}): {e!r}")
+
+            if attempt + 1 < self.max_tries:
+                # Exponential backoff with full jitter, never past the deadline
+                backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                await asyncio.sleep(max(0.0, min(backoff, deadline_at - loop.time())))
+
+        if raise_on_failure:
+            raise LLMExtractionError(f"LLM extraction failed after {attempt + 1} tries: {last_error!r}")
         return DateResult(
             published_date=None,
             modified_date=None,
@@ -228,6 +416,134 @@ class LLMDateExtractor:
             mod_confidence="low"
         )
 
+    # ===== Multi-document packing =====
+
+    def _count_tokens(self, text: str) -> int:
+        if self._encoder is None:
+            self._encoder = get_tokenizer("gpt2") or False
+        return len(tokenize(text, self._encoder or None))
+
+    def _make_packs(self, html_contents: List[str]) -> List[List[int]]:
+        """Group document indices into packs that fit the token budget, in input order."""
+        packs, current, current_tokens = [], [], 0
+        for i, html_content in enumerate(html_contents):
+            tokens = self._count_tokens(html_content)
+            if current and (current_tokens + tokens > self.pack_token_budget or len(current) >= self.pack_max_docs):
+                packs.append(current)
+                current, current_tokens = [], 0
+            # A document over the budget on its own still gets a (single-document) request
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            packs.append(current)
+        return packs
+
+    def _build_packed_payload(self, documents: List[str]) -> Dict:
+        answer_tokens = STRUCTURED_MAX_TOKENS * len(documents)
+        if not self.structured_output:
+            return {
+                "model": GENERATIVE_MODEL,
+                "messages": [
+                    {"role": "user", "content": build_packed_prompt(documents)}
+                ],
+                "max_tokens": 500 + answer_tokens,
+                "temperature": 0.7,
+            }
+        return {
+            "model": GENERATIVE_MODEL,
+            "messages": [
+                {"role": "user", "content": build_packed_prompt(documents)}
+            ],
+            "max_tokens": answer_tokens,
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+            "chat_template_kwargs": {"enable_thinking": False},
+        }
+
+    def _parse_packed_content(self, content: str, n_documents: int) -> Dict[int, DateResult]:
+        """
+        Turn the model's answer to a packed request into DateResults by document id.
+
+        Documents whose entry is missing or malformed are left out; raises ValueError
+        only if the answer as a whole is not a JSON object.
+        """
+        match = re.search(r'<JSON>(.*?)</JSON>', content, re.DOTALL | re.IGNORECASE)
+        if not match:
+            match = re.search(r'(\{.*\})', content, re.DOTALL)
+        if not match:
+            raise ValueError("No JSON object in the packed response")
+
+        answers = json.loads(match.group(1).strip())
+        if not isinstance(answers, Dict):
+            raise ValueError("Invalid JSON format of the packed response")
+
+        results = {}
+        for doc_id in range(n_documents):
+            answer = answers.get(str(doc_id))
+            if not isinstance(answer, Dict):
+                continue
+            # A date the model returned but that does not parse counts as malformed
+            if any(answer.get(key) and parse_llm_date(answer[key]) is None
+                   for key in ('published_date', 'modified_date')):
+                continue
+            results[doc_id] = self._to_date_result(answer)
+        return results
+
+    async def _extract_pack(self, documents: List[str]) -> Dict[int, DateResult]:
+        """Send one packed request; returns the results it got (empty if the request failed)."""
+        if len(documents) == 1:
+            return {}
+        try:
+            content = await self._complete(
+                self._build_packed_payload(documents), timeout=min(self.request_timeout, self.deadline)
+            )
+            return self._parse_packed_content(content, len(documents))
+        except Exception as e:
+            logger.error(f"Packed request for {len(documents)} documents failed: {e!r}")
+            return {}
+
+    async def extract_dates_packed(
+        self, html_contents: List[str], return_exceptions: bool = False
+    ) -> List[Union[DateResult, LLMExtractionError]]:
+        """
+        Extract the dates of several pages, packing as many as fit the token budget into each request.
+
+        Args:
+            html_contents: The raw html of every page (pass evidence packs rather than full pages
+                to fit more of them into a request)
+            return_exceptions: For a page whose individual retry failed too, return its
+                LLMExtractionError instead of a "not found" result
+
+        Returns:
+            One result per page, in input order
+        """
+        packs = self._make_packs(html_contents)
+        answers = await asyncio.gather(*(
+            self._extract_pack([html_contents[i] for i in pack]) for pack in packs
+        ))
+
+        results: List[Any] = [None] * len(html_contents)
+        retry = []
+        for pack, answer in zip(packs, answers):
+            for doc_id, i in enumerate(pack):
+                if doc_id in answer:
+                    results[i] = answer[doc_id]
+                else:
+                    retry.append(i)
+
+        if retry:
+            if len(retry) < len(html_contents):
+                logger.info(f"Retrying {len(retry)}/{len(html_contents)} packed documents on their own")
+            retried = await asyncio.gather(
+                *(self.extract_dates(html_contents[i], raise_on_failure=return_exceptions) for i in retry),
+                return_exceptions=return_exceptions
+            )
+            for i, result in zip(retry, retried):
+                if isinstance(result, BaseException) and not isinstance(result, LLMExtractionError):
+                    result = LLMExtractionError(f"LLM extraction failed: {result!r}")
+                results[i] = result
+        return results
+
     def chunk_text(text: str,
                 tokens_per_chunk: int = CHUNK_TOKENS,
                 overlap: int = CHUNK_OVERLAP,
@@ -0,0 +1,241 @@
+'''
+Checks of LLMDateExtractor's retries, backoff, deadline, hedging and multi-document packing
+against the local stub endpoint (llm_stub_server.py).
+Run with pytest, or directly: python llm_date_extractor_test.py
+'''
+import asyncio
+import json
+import re
+import time
+from datetime import date
+import llm_date_extractor
+from llm_date_extractor import LLMDateExtractor, LLMExtractionError
+from llm_stub_server import DEFAULT_ANSWER, StubConfig, StubServer
+from shared import ExtractionMethod
+
+
+PAGE = "<html><head><title>Story</title></head><body><p>Published March 5, 2024</p></body></html>"
+
+
+class _PartialPackStub(StubServer):
+    """Answers packed requests without document "1" and with an unparsable date for document "2"."""
+
+    def _answer_content(self, prompt: str, structured: bool) -> str:
+        doc_ids = re.findall(r'<DOC id="([^"]+)">', prompt)
+        if not doc_ids:
+            return super()._answer_content(prompt, structured)
+        answers = {doc_id: self.answer for doc_id in doc_ids if doc_id != "1"}
+        if "2" in answers:
+            answers["2"] = {**self.answer, "published_date": "sometime last spring"}
+        return json.dumps(answers)
+
+
+async def _with_stub(config: StubConfig, test, stub_class=StubServer, **llm_kwargs):
+    """Run test(stub, llm) against a stub server on a free port."""
+    stub = stub_class(config, seed=0)
+    runner = await stub.start(port=0)
+    port = runner.addresses[0][1]
+    try:
+        async with LLMDateExtractor(llm_url=f"http://127.0.0.1:{port}/v1", **llm_kwargs) as llm:
+            return await test(stub, llm)
+    finally:
+        await runner.cleanup()
+
+
+class _SleepRecorder:
+    """Stands in for the asyncio module in llm_date_extractor and records the backoff sleeps."""
+
+    def __init__(self):
+        self.sleeps = []
+
+    def __getattr__(self, name):
+        return getattr(asyncio, name)
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        await asyncio.sleep(seconds)
+
+
+def test_hedge_fires_after_the_delay_and_the_loser_is_cancelled():
+    started = []
+
+    async def test(stub, llm):
+        latencies = iter([2.0, 0.05])
+        stub._sample_latency = lambda: next(latencies)
+        llm.latencies.extend([0.1] * 5)  # The hedge delay is their median
+        timed_completion = llm._timed_completion
+
+        async def recorded(payload, timeout):
+            started.append((time.perf_counter(), asyncio.current_task()))
+            return await timed_completion(payload, timeout)
+        llm._timed_completion = recorded
+
+        t0 = time.perf_counter()
+        content = await llm._complete(llm._build_payload(PAGE), timeout=5)
+        elapsed = time.perf_counter() - t0
+        await asyncio.sleep(0.01)
+        return content, elapsed, stub.requests, llm.hedged_requests
+
+    content, elapsed, requests, hedged = asyncio.run(
+        _with_stub(StubConfig(latency="fixed:0"), test, hedge_percentile=50, hedge_min_samples=5)
+    )
+    assert "<JSON>" in content
+    assert requests == 2 and hedged == 1
+    assert len(started) == 2
+    (primary_at, primary), (hedge_at, hedge) = started
+    assert 0.09 <= hedge_at - primary_at < 0.5, hedge_at - primary_at
+    assert elapsed < 1.0, elapsed
+    assert primary.cancelled() and hedge.done() and not hedge.cancelled()
+
+
+def test_no_hedge_before_warm_up():
+    async def test(stub, llm):
+        await llm._complete(llm._build_payload(PAGE), timeout=5)
+        return stub.requests, llm.hedged_requests
+
+    assert asyncio.run(_with_stub(StubConfig(latency="fixed:0.01"), test, hedge_percentile=50)) == (1, 0)
+
+
+def test_max_tries_is_respected():
+    async def test(stub, llm):
+        result = await llm.extract_dates(PAGE)
+        try:
+            await llm.extract_dates(PAGE, raise_on_failure=True)
+            raised = False
+        except LLMExtractionError:
+            raised = True
+        return result, raised, stub.requests
+
+    result, raised, requests = asyncio.run(
+        _with_stub(StubConfig(latency="fixed:0", error_rate=1.0), test, max_tries=3, backoff_base=0.001)
+    )
+    assert requests == 6
+    assert raised
+    assert result.published_date is None and ExtractionMethod.NOT_FOUND.value in result.published_method
+
+    try:
+        LLMDateExtractor(max_tries=0)
+        assert False, "max_tries=0 was accepted"
+    except ValueError:
+        pass
+
+
+def test_backoff_sleeps_are_full_jitter():
+    recorder = _SleepRecorder()
+
+    async def test(stub, llm):
+        return await llm.extract_dates(PAGE), stub.requests
+
+    llm_date_extractor.asyncio = recorder
+    try:
+        _, requests = asyncio.run(_with_stub(
+            StubConfig(latency="fixed:0", error_rate=1.0), test,
+            max_tries=6, backoff_base=0.01, backoff_max=0.05
+        ))
+    finally:
+        llm_date_extractor.asyncio = asyncio
+    assert requests == 6
+    # One sleep between tries, in [0, min(backoff_max, backoff_base * 2 ** try)]
+    assert len(recorder.sleeps) == 5, recorder.sleeps
+    for attempt, seconds in enumerate(recorder.sleeps):
+        assert 0 <= seconds <= min(0.05, 0.01 * 2 ** attempt), (attempt, seconds)
+
+
+def test_deadline_aborts_retries():
+    async def test(stub, llm):
+        t0 = time.perf_counter()
+        try:
+            await llm.extract_dates(PAGE, raise_on_failure=True)
+            raised = False
+        except LLMExtractionError:
+            raised = True
+        return raised, time.perf_counter() - t0, stub.requests
+
+    raised, elapsed, requests = asyncio.run(_with_stub(
+        StubConfig(latency="fixed:0.3", error_rate=1.0), test,
+        max_tries=10, deadline=0.5, request_timeout=5, backoff_base=0.001
+    ))
+    assert raised
+    assert elapsed < 0.8, elapsed
+    assert requests <= 2, requests
+
+
+def test_packs_respect_the_token_budget_and_document_limit():
+    llm = LLMDateExtractor(pack_token_budget=100, pack_max_docs=2)
+    llm._count_tokens = len  # One token per character
+    assert llm._make_packs(["a" * 40, "b" * 40, "c" * 40, "d" * 150, "e" * 10]) == [[0, 1], [2], [3], [4]]
+    llm = LLMDateExtractor(pack_token_budget=1000, pack_max_docs=3)
+    llm._count_tokens = len
+    assert llm._make_packs(["x"] * 7) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert llm._make_packs([]) == []
+
+
+def test_packed_answers_are_parsed_by_document():
+    llm = LLMDateExtractor()
+    answer = {
+        "0": {**DEFAULT_ANSWER, "published_date": "2024-03-05"},
+        "2": {**DEFAULT_ANSWER, "published_date": "not a date"},
+        "3": "2024-01-01",
+        "4": {**DEFAULT_ANSWER, "published_date": None},
+    }
+    results = llm._parse_packed_content(f"Here you go:\n<JSON>{json.dumps(answer)}</JSON>", 5)
+    # Missing (1), malformed (2) and non-object (3) answers are left out
+    assert sorted(results) == [0, 4]
+    assert results[0].published_date == date(2024, 3, 5)
+    assert results[4].published_date is None and results[4].modified_date == date(2025, 11, 15)
+    assert sorted(llm._parse_packed_content(json.dumps(answer), 5)) == [0, 4]
+    for content in ("I could not find the dates.", "[1, 2]"):
+        try:
+            llm._parse_packed_content(content, 2)
+            assert False, content
+        except ValueError:
+            pass
+
+
+def _packed_run(config: StubConfig, n_pages: int, stub_class=StubServer, return_exceptions: bool = False):
+    async def test(stub, llm):
+        results = await llm.extract_dates_packed([PAGE] * n_pages, return_exceptions=return_exceptions)
+        return results, stub.requests
+
+    return asyncio.run(_with_stub(
+        config, test, stub_class=stub_class, structured_output=True, pack_max_docs=8, max_tries=2, backoff_base=0.001
+    ))
+
+
+def test_packed_request_answers_every_document():
+    results, requests = _packed_run(StubConfig(latency="fixed:0"), 5)
+    assert requests == 1
+    assert all(result.published_date == date(2025, 11, 14) for result in results)
+
+
+def test_missing_and_malformed_answers_are_retried_on_their_own():
+    results, requests = _packed_run(StubConfig(latency="fixed:0"), 5, stub_class=_PartialPackStub)
+    # One packed request, then documents 1 and 2 one by one
+    assert requests == 3
+    assert all(result.published_date == date(2025, 11, 14) for result in results)
+
+
+def test_failed_pack_falls_back_to_per_document_requests():
+    # Every request fails: the pack, then max_tries per document
+    results, requests = _packed_run(StubConfig(latency="fixed:0", error_rate=1.0), 3, return_exceptions=True)
+    assert requests == 1 + 3 * 2
+    assert all(isinstance(result, LLMExtractionError) for result in results)
+
+    # Every answer is malformed: same requests, and "not found" results without return_exceptions
+    results, requests = _packed_run(StubConfig(latency="fixed:0", malformed_rate=1.0), 3)
+    assert requests == 1 + 3 * 2
+    assert all(result.published_date is None and result.modified_date is None for result in results)
+
+
+if __name__ == "__main__":
+    test_hedge_fires_after_the_delay_and_the_loser_is_cancelled()
+    test_no_hedge_before_warm_up()
+    test_max_tries_is_respected()
+    test_backoff_sleeps_are_full_jitter()
+    test_deadline_aborts_retries()
+    test_packs_respect_the_token_budget_and_document_limit()
+    test_packed_answers_are_parsed_by_document()
+    test_packed_request_answers_every_document()
+    test_missing_and_malformed_answers_are_retried_on_their_own()
+    test_failed_pack_falls_back_to_per_document_requests()
+    print("✅ LLM extractor checks passed")
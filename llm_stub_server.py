@@ -0,0 +1,338 @@
+"""
+Local OpenAI-compatible stub of the LLM and embedding endpoints, and a benchmark driver for the LLM fallback.
+
+The stub answers /v1/chat/completions and /v1/embeddings like our self-hosted Qwen
+endpoints, with configurable latency, errors and concurrency, so the async LLM path
+can be tested and tuned offline:
+
+    python llm_stub_server.py serve --port 18000 --latency lognormal:0.8:0.5 --error-rate 0.02 --max-concurrency 32
+    LLM_URL=http://localhost:18000/v1 EMB_URL=http://localhost:18000/v1 python html_date_extractor_test.py
+
+Chat completions get a canned answer in the format the request asks for: a <JSON> block
+for the extraction prompt, a bare JSON object with structured output, and one entry per
+<DOC id="..."> for packed requests.
+
+The benchmark sends fallback requests through LLMDateExtractor at several concurrency
+levels and reports throughput and latency percentiles:
+
+    python llm_stub_server.py bench --concurrency 1 4 16 64 --requests 500
+    python llm_stub_server.py bench --url http://localhost:18000/v1 --pack-size 8
+
+Without --url the stub runs in the same process as the client.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import numpy as np
+from aiohttp import web
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ANSWER = {
+    "published_date": "2025-11-14",
+    "pub_extraction_method": "json-ld",
+    "modified_date": "2025-11-15",
+    "mod_extraction_method": "json-ld"
+}
+
+BENCH_HTML = """<!DOCTYPE html>
+<html>
+<head>
+    <meta property="article:published_time" content="2025-11-14T18:00:00Z" />
+    <script type="application/ld+json">{{"@type": "Article", "datePublished": "2025-11-14", "dateModified": "2025-11-15"}}</script>
+</head>
+<body>
+    <article><h1>Sample Article {i}</h1><p>{filler}</p></article>
+</body>
+</html>
+"""
+
+
+@dataclass
+class StubConfig:
+    """Behaviour of the stub server."""
+    latency: str = "lognormal:0.8:0.5"  # fixed:S, uniform:LOW:HIGH or lognormal:MEDIAN:SIGMA (seconds)
+    prefill_ms_per_1k_tokens: float = 0.0  # Extra latency per 1000 prompt tokens (~4 characters per token)
+    decode_ms_per_doc: float = 0.0  # Extra latency per answered document (packed requests answer several)
+    error_rate: float = 0.0  # Share of requests answered with HTTP 500
+    malformed_rate: float = 0.0  # Share of chat completions answered without a JSON object
+    max_concurrency: int = 0  # Requests processed at once; the rest queue (0: unlimited)
+    embedding_dim: int = 1024
+    answer: Optional[Dict[str, Any]] = None  # Canned extraction answer (default: DEFAULT_ANSWER)
+
+
+class StubServer:
+    """aiohttp application imitating the OpenAI-compatible chat completion and embedding endpoints."""
+
+    def __init__(self, config: StubConfig, seed: Optional[int] = None):
+        self.config = config
+        self.answer = config.answer or DEFAULT_ANSWER
+        self.random = random.Random(seed)
+        self.semaphore = asyncio.Semaphore(config.max_concurrency) if config.max_concurrency > 0 else None
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        kind, *params = config.latency.split(':')
+        if kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution {config.latency!r}")
+        self._latency_kind = kind
+        self._latency_params = [float(p) for p in params]
+
+        self.app = web.Application(client_max_size=64 * 1024 ** 2)
+        self.app.router.add_post('/v1/chat/completions', self.chat_completions)
+        self.app.router.add_post('/v1/embeddings', self.embeddings)
+        self.app.router.add_get('/stats', self.stats)
+
+    def _sample_latency(self) -> float:
+        if self._latency_kind == 'fixed':
+            return self._latency_params[0]
+        if self._latency_kind == 'uniform':
+            return self.random.uniform(*self._latency_params)
+        median, sigma = self._latency_params
+        return self.random.lognormvariate(np.log(median), sigma) if median > 0 else 0.0
+
+    async def _serve(self, prompt_chars: int, n_docs: int):
+        """Wait for a slot and the simulated processing time; raises HTTPInternalServerError for injected errors."""
+        self.requests += 1
+        if self.semaphore is not None:
+            await self.semaphore.acquire()
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            latency = self._sample_latency()
+            latency += prompt_chars / 4 / 1000 * self.config.prefill_ms_per_1k_tokens / 1000
+            latency += n_docs * self.config.decode_ms_per_doc / 1000
+            await asyncio.sleep(latency)
+            if self.random.random() < self.config.error_rate:
+                self.errors += 1
+                raise web.HTTPInternalServerError(text="injected error")
+        finally:
+            self.in_flight -= 1
+            if self.semaphore is not None:
+                self.semaphore.release()
+
+    def _answer_content(self, prompt: str, structured: bool) -> str:
+        if self.random.random() < self.config.malformed_rate:
+            return "I could not find the dates in this page."
+        doc_ids = re.findall(r'<DOC id="([^"]+)">', prompt)
+        if doc_ids:
+            return json.dumps({doc_id: self.answer for doc_id in doc_ids})
+        if structured:
+            return json.dumps(self.answer)
+        return f"<JSON>\n{json.dumps(self.answer, indent=4)}\n</JSON>"
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        prompt = "\n".join(str(m.get('content', '')) for m in body.get('messages', []))
+        n_docs = max(1, prompt.count('<DOC id='))
+        await self._serve(len(prompt), n_docs)
+
+        structured = (body.get('response_format') or {}).get('type') == 'json_object'
+        content = self._answer_content(prompt, structured)
+        return web.json_response({
+            "id": f"chatcmpl-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get('model'),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+        })
+
+    async def embeddings(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        inputs = body.get('input', [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        await self._serve(sum(len(text) for text in inputs), 1)
+
+        data = []
+        for i, text in enumerate(inputs):
+            # Deterministic unit vector per input, so equal texts get equal embeddings
+            seed = int.from_bytes(hashlib.sha1(text.encode('utf-8')).digest()[:8], 'little')
+            vector = np.random.default_rng(seed).standard_normal(self.config.embedding_dim)
+            vector /= np.linalg.norm(vector)
+            data.append({"object": "embedding", "index": i, "embedding": vector.round(6).tolist()})
+        return web.json_response({
+            "object": "list",
+            "data": data,
+            "model": body.get('model'),
+            "usage": {"prompt_tokens": sum(len(text) for text in inputs) // 4}
+        })
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight
+        })
+
+    async def start(self, host: str = '127.0.0.1', port: int = 18000) -> web.AppRunner:
+        """Start serving in the running event loop; call cleanup() on the returned runner to stop."""
+        runner = web.AppRunner(self.app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+
+def _percentiles(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {"p50": round(float(p50), 3), "p95": round(float(p95), 3), "p99": round(float(p99), 3),
+            "max": round(max(latencies), 3)}
+
+
+async def run_benchmark(
+    llm_url: str,
+    concurrency: int,
+    n_requests: int,
+    pack_size: int = 1,
+    doc_chars: int = 2000,
+    llm_kwargs: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Send n_requests fallback extractions with at most `concurrency` requests in flight.
+
+    Args:
+        llm_url: Base URL of the endpoint (the stub or a real one)
+        concurrency: Maximum number of in-flight requests (what MAX_CONCURRENT_REQ bounds in the pipeline)
+        n_requests: Number of documents to extract
+        pack_size: Documents per extract_dates_packed call (1: one extract_dates call per document)
+        doc_chars: Approximate size of each document
+        llm_kwargs: Further keyword arguments for LLMDateExtractor
+
+    Returns:
+        Throughput (documents per second) and per-call latency percentiles in seconds
+    """
+    from llm_date_extractor import LLMDateExtractor
+
+    filler = ("Lorem ipsum dolor sit amet. " * (doc_chars // 28 + 1))[:doc_chars]
+    docs = [BENCH_HTML.format(i=i, filler=filler) for i in range(n_requests)]
+    batches = [docs[i:i + pack_size] for i in range(0, len(docs), pack_size)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    not_found = 0
+
+    llm_kwargs = dict(llm_kwargs or {})
+    if pack_size > 1:
+        llm_kwargs.setdefault('pack_max_docs', pack_size)
+    async with LLMDateExtractor(llm_url=llm_url, **llm_kwargs) as extractor:
+        async def one(batch: List[str]):
+            nonlocal not_found
+            async with semaphore:
+                t0 = time.perf_counter()
+                if len(batch) == 1:
+                    results = [await extractor.extract_dates(batch[0])]
+                else:
+                    results = await extractor.extract_dates_packed(batch)
+                latencies.append(time.perf_counter() - t0)
+                not_found += sum(r.published_date is None for r in results)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(batch) for batch in batches))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "pack_size": pack_size,
+        "documents": n_requests,
+        "seconds": round(elapsed, 3),
+        "docs_per_second": round(n_requests / elapsed, 2) if elapsed else 0.0,
+        "not_found": not_found,
+        **_percentiles(latencies)
+    }
+
+
+async def _bench(args: argparse.Namespace, config: StubConfig):
+    runner = None
+    llm_url = args.url
+    if llm_url is None:
+        server = StubServer(config, seed=args.seed)
+        runner = await server.start('127.0.0.1', args.port)
+        llm_url = f"http://127.0.0.1:{args.port}/v1"
+    llm_kwargs = {"structured_output": args.structured, "request_timeout": args.request_timeout}
+    if args.hedge_percentile is not None:
+        llm_kwargs["hedge_percentile"] = args.hedge_percentile
+
+    print(f"{'conc':>5} {'pack':>5} {'docs/s':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7} {'not found':>9}")
+    try:
+        for concurrency in args.concurrency:
+            report = await run_benchmark(llm_url, concurrency, args.requests, args.pack_size, args.doc_chars, llm_kwargs)
+            print(
+                f"{report['concurrency']:>5} {report['pack_size']:>5} {report['docs_per_second']:>8} "
+                f"{report['p50']:>7} {report['p95']:>7} {report['p99']:>7} {report['max']:>7} {report['not_found']:>9}"
+            )
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+
+
+async def _serve_forever(args: argparse.Namespace, config: StubConfig):
+    server = StubServer(config, seed=args.seed)
+    await server.start(args.host, args.port)
+    print(f"Stub LLM endpoint at http://{args.host}:{args.port}/v1 ({config})")
+    await asyncio.Event().wait()
+
+
+def _add_stub_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--port', type=int, default=18000)
+    parser.add_argument('--latency', default=StubConfig.latency,
+                        help="fixed:S, uniform:LOW:HIGH or lognormal:MEDIAN:SIGMA (seconds)")
+    parser.add_argument('--prefill-ms-per-1k-tokens', type=float, default=0.0)
+    parser.add_argument('--decode-ms-per-doc', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--max-concurrency', type=int, default=0, help="0: unlimited")
+    parser.add_argument('--answer', type=json.loads, help="Canned extraction answer as a JSON object")
+    parser.add_argument('--seed', type=int)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Stub LLM/embedding endpoint and LLM fallback benchmark.")
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="Run the stub server")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    _add_stub_arguments(serve_parser)
+
+    bench_parser = subparsers.add_parser('bench', help="Benchmark the LLM fallback at several concurrency levels")
+    bench_parser.add_argument('--url', help="Benchmark this endpoint instead of an in-process stub")
+    bench_parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    bench_parser.add_argument('--requests', type=int, default=200)
+    bench_parser.add_argument('--pack-size', type=int, default=1)
+    bench_parser.add_argument('--doc-chars', type=int, default=2000)
+    bench_parser.add_argument('--structured', action='store_true', help="Use structured output")
+    bench_parser.add_argument('--request-timeout', type=float, default=60.0)
+    bench_parser.add_argument('--hedge-percentile', type=float)
+    _add_stub_arguments(bench_parser)
+
+    args = arg_parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    config = StubConfig(
+        latency=args.latency,
+        prefill_ms_per_1k_tokens=args.prefill_ms_per_1k_tokens,
+        decode_ms_per_doc=args.decode_ms_per_doc,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        max_concurrency=args.max_concurrency,
+        answer=args.answer
+    )
+    if args.command == 'serve':
+        asyncio.run(_serve_forever(args, config))
+    else:
+        asyncio.run(_bench(args, config))
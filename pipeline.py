@@ -0,0 +1,577 @@
+"""
+ExtractionPipeline: Overlapped batch extraction over our content_results files.
+
+A batch run has four kinds of work with very different bottlenecks:
+1. Reading input records (I/O)
+2. Heuristic extraction with lxml/dateparser (CPU)
+3. LLM fallback for pages where the heuristics found nothing (network)
+4. Writing the output (I/O)
+
+Instead of running them one after another for every page, each stage runs
+concurrently and hands items to the next one through a bounded queue:
+
+    reader thread -> [heuristic worker pool] -> asyncio LLM stage -> writer thread
+                                  |                                     ^
+                                  +------- (no fallback needed) --------+
+
+A full queue blocks its producer (backpressure), so memory stays bounded and
+the run is limited by the slowest stage instead of the sum of all stages. The reader
+consumes the items lazily: give run() iter_content_file(path) and the input file is
+read and decoded in the reader thread, one question at a time, instead of loaded
+whole before the run starts.
+
+The heuristic workers are processes with one extractor each (worker_mode="process"),
+or threads sharing a single extractor and its caches (worker_mode="thread"), which
+avoids a copy of the extractor per process and pickling every page and result.
+Pages already waiting in the queue are extracted together, up to heuristic_chunk_size
+at a time, with HTMLDateExtractor.extract_many, so the date strings they share are
+parsed once.
+"""
+import asyncio
+import functools
+import itertools
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from boilerplate import BoilerplateMaskCache
+from checkpoint import BatchCheckpoint
+from provenance import record_provenance
+from sharding import shard_of
+from html_date_extractor import HTMLDateExtractor
+from llm_date_extractor import LLMDateExtractor, LLMExtractionError, MAX_CONCURRENT_REQ
+from shared import DateResult, ExtractionMethod
+
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the stream on a queue
+_SENTINEL = object()
+
+# What may come between the elements of a JSON array
+_JSON_SEPARATORS = re.compile(r'[\s,]*')
+_JSON_WHITESPACE = re.compile(r'\s*')
+
+
+@dataclass
+class PipelineItem:
+    """One page flowing through the pipeline."""
+    question_id: Optional[int]
+    url: str
+    html_content: str
+    success: bool = True
+    offset: int = 0  # Position in the input, used by checkpoints
+    result: Optional[DateResult] = None
+
+
+@dataclass
+class StageStats:
+    """Throughput and queue-depth statistics for a single pipeline stage."""
+    name: str
+    workers: int = 1
+    items: int = 0
+    busy_seconds: float = 0.0
+    max_queue_depth: int = 0
+    queue_depth_sum: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, busy_seconds: float, queue_depth: int = 0):
+        """Record one processed item and the depth of the stage's input queue when it was taken."""
+        with self._lock:
+            if self.started_at is None:
+                self.started_at = time.perf_counter()
+            self.items += 1
+            self.busy_seconds += busy_seconds
+            self.queue_depth_sum += queue_depth
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+
+    def as_dict(self) -> Dict[str, Any]:
+        wall = (self.finished_at or time.perf_counter()) - (self.started_at or time.perf_counter())
+        return {
+            'stage': self.name,
+            'workers': self.workers,
+            'items': self.items,
+            'busy_seconds': round(self.busy_seconds, 3),
+            # Items per second of wall time the stage was active
+            'throughput': round(self.items / wall, 2) if wall > 0 else None,
+            # Items per second one worker could sustain if it were never starved or blocked
+            'capacity_per_worker': round(self.items / self.busy_seconds, 2) if self.busy_seconds > 0 else None,
+            'avg_queue_depth': round(self.queue_depth_sum / self.items, 2) if self.items else 0,
+            'max_queue_depth': self.max_queue_depth,
+        }
+
+
+def iter_json_array(path: str, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """
+    Yield the elements of a JSON file holding one top-level array, decoding one element at a time.
+
+    Only the element being decoded and the rest of the current chunk are in memory, so large
+    input files are streamed instead of loaded whole.
+
+    Raises:
+        ValueError: If the file does not hold a JSON array
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer, pos, read_size = '', 0, chunk_size
+        started = eof = False
+        while True:
+            pos = _JSON_SEPARATORS.match(buffer, pos).end()
+            if pos < len(buffer) and not started:
+                if buffer[pos] != '[':
+                    raise ValueError(f"{path} does not hold a JSON array")
+                started = True
+                pos += 1
+                continue
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            if pos < len(buffer):
+                try:
+                    element, end = decoder.raw_decode(buffer, pos)
+                    after = _JSON_WHITESPACE.match(buffer, end).end()
+                except json.JSONDecodeError:
+                    after = len(buffer)
+                # Complete only once a ',' or ']' follows: a number cut by the chunk ("12." of "12.5") decodes too
+                if after < len(buffer) and buffer[after] in ',]':
+                    yield element
+                    pos = end
+                    read_size = chunk_size
+                    continue
+                if eof:
+                    raise ValueError(f"{path} does not hold a valid JSON array")
+                # The element continues past the buffer; grow the reads so a huge element is decoded a few times at most
+                read_size = max(read_size, len(buffer) - pos)
+            elif eof:
+                raise ValueError(f"{path} ends before its JSON array is closed")
+            chunk = f.read(read_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+
+
+def iter_content_file(path: str, max_questions: Optional[int] = None) -> Iterator[PipelineItem]:
+    """Stream the pipeline items of a questions/content_results file (the first max_questions questions)."""
+    return iter_content_results(itertools.islice(iter_json_array(path), max_questions))
+
+
+def iter_content_results(data: Iterable[Dict]) -> Iterator[PipelineItem]:
+    """Flatten our questions/content_results input into pipeline items."""
+    offset = 0
+    for question in data:
+        question_id = question.get('question', {}).get('id')
+        for d in question['content_results']:
+            yield PipelineItem(
+                question_id=question_id,
+                url=d['url'],
+                html_content=d['text'],
+                success=d['success'],
+                offset=offset
+            )
+            offset += 1
+
+
+def format_record(item: PipelineItem) -> Dict[str, Any]:
+    """Format an extracted item the way our result files store it."""
+    date_result = item.result
+    published_date_str = f"{date_result.published_date.isoformat()} (method: {date_result.published_method}, confidence: {date_result.pub_confidence})" if date_result.published_date else None
+    modified_date_str = f"{date_result.modified_date.isoformat()} (method: {date_result.modified_method}, confidence: {date_result.mod_confidence})" if date_result.modified_date else None
+    return {
+        'question_id': item.question_id,
+        'url': item.url,
+        'published_date': published_date_str,
+        'modified_date': modified_date_str,
+        'last_date_found': date_result.last_date_found.isoformat() if date_result.last_date_found else None,
+        'all_dates_found': [d.isoformat() for d in date_result.dates_found] if date_result.dates_found else None,
+        'provenance': record_provenance(date_result),
+    }
+
+
+def _not_found_result() -> DateResult:
+    return DateResult(
+        published_date=None,
+        modified_date=None,
+        published_method=ExtractionMethod.NOT_FOUND.value,
+        modified_method=ExtractionMethod.NOT_FOUND.value,
+        pub_confidence="low",
+        mod_confidence="low"
+    )
+
+
+# Each heuristic worker process owns one extractor
+_worker_extractor: Optional[HTMLDateExtractor] = None
+
+
+def _init_worker(extractor_kwargs: Dict[str, Any]):
+    global _worker_extractor
+    _worker_extractor = HTMLDateExtractor(**extractor_kwargs)
+    if _worker_extractor.boilerplate_cache is not None:
+        _worker_extractor.boilerplate_cache.save_at_exit()
+
+
+def _extract_chunk(extractor: HTMLDateExtractor, pages: List[Tuple[str, str]]) -> List[DateResult]:
+    """The heuristic results of a chunk of (html, url) pages, extracted together with extract_many."""
+    try:
+        return extractor.extract_many(
+            [html_content for html_content, _ in pages], urls=[url for _, url in pages], chunk_size=len(pages)
+        )
+    except Exception as e:
+        # Redo the pages one by one, so only the page that fails loses its result
+        logger.warning(f"Extraction of a chunk of {len(pages)} pages failed ({e}), extracting them one by one")
+    results = []
+    for html_content, url in pages:
+        try:
+            results.append(extractor.extract_from_html(html_content, use_llm_as_fallback=False, url=url))
+        except Exception as e:
+            logger.error(f"Heuristic extraction failed for {url}: {e}")
+            results.append(_not_found_result())
+    return results
+
+
+def _extract_chunk_in_worker(pages: List[Tuple[str, str]]) -> List[DateResult]:
+    return _extract_chunk(_worker_extractor, pages)
+
+
+class ExtractionPipeline:
+    """
+    Runs HTMLDateExtractor (and optionally LLMDateExtractor) over many pages with overlapped stages.
+
+    Example:
+        pipeline = ExtractionPipeline(use_llm_as_fallback=True, heuristic_workers=4)
+        records = pipeline.run(iter_content_results(data))
+        print(pipeline.stats_report())
+    """
+
+    def __init__(
+        self,
+        use_llm_as_fallback: bool = False,
+        heuristic_workers: int = 4,
+        llm_concurrency: int = MAX_CONCURRENT_REQ,
+        queue_size: int = 64,
+        sink: Optional[Callable[[PipelineItem], None]] = None,
+        extractor_kwargs: Optional[Dict[str, Any]] = None,
+        llm_kwargs: Optional[Dict[str, Any]] = None,
+        llm_pack_size: int = 1,
+        checkpoint: Optional[BatchCheckpoint] = None,
+        worker_mode: str = "process",
+        shard: Optional[Tuple[int, int]] = None,
+        heuristic_chunk_size: int = 16
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            use_llm_as_fallback: Whether pages without any heuristic date go to the LLM stage
+            heuristic_workers: Number of processes running the heuristic extraction
+            llm_concurrency: Maximum number of in-flight LLM requests
+            queue_size: Capacity of each queue between stages (backpressure bound)
+            sink: Called by the writer stage for every finished item (default: collect records)
+            extractor_kwargs: Keyword arguments for HTMLDateExtractor in each worker
+            llm_kwargs: Keyword arguments for LLMDateExtractor (timeouts, hedging, structured output)
+            llm_pack_size: Up to this many waiting pages share one packed LLM request (1: no packing)
+            checkpoint: Record progress here and skip the work it has already done.
+                Pages whose LLM fallback fails stay pending in the checkpoint instead of being written.
+            worker_mode: "process" runs the heuristics in a process pool with one extractor per process;
+                "thread" runs them in a thread pool sharing one extractor and its caches
+            shard: (i, N) to only process the pages of shard i of N (see sharding.py); the other
+                pages are skipped, and marked done in the checkpoint so offsets stay global
+            heuristic_chunk_size: A heuristic worker takes up to this many waiting pages at once and
+                extracts them together with HTMLDateExtractor.extract_many (1: one page at a time)
+        """
+        if worker_mode not in ("process", "thread"):
+            raise ValueError(f"Unknown worker_mode {worker_mode!r}, expected 'process' or 'thread'")
+        self.use_llm_as_fallback = use_llm_as_fallback
+        self.heuristic_workers = heuristic_workers
+        self.llm_concurrency = llm_concurrency
+        self.queue_size = queue_size
+        self.sink = sink
+        self.extractor_kwargs = extractor_kwargs or {'disable_logger': True}
+        self.llm_kwargs = llm_kwargs or {}
+        self.llm_pack_size = llm_pack_size
+        self.checkpoint = checkpoint
+        self.worker_mode = worker_mode
+        self.shard = shard
+        self.heuristic_chunk_size = max(1, heuristic_chunk_size)
+        self.stats: Dict[str, StageStats] = {}
+        self._shared_extractor: Optional[HTMLDateExtractor] = None
+
+    def run(self, items: Iterable[PipelineItem]) -> List[Dict[str, Any]]:
+        """
+        Run all stages to completion.
+
+        Returns:
+            The records collected by the default sink (empty if a custom sink is used)
+        """
+        self._q_in = queue.Queue(maxsize=self.queue_size)
+        self._q_llm = queue.Queue(maxsize=self.queue_size)
+        self._q_out = queue.Queue(maxsize=self.queue_size)
+        self._records: List[Dict[str, Any]] = []
+        self._workers_left = self.heuristic_workers
+        self._workers_lock = threading.Lock()
+        self.stats = {
+            'read': StageStats('read'),
+            'heuristic': StageStats('heuristic', workers=self.heuristic_workers),
+            'llm': StageStats('llm', workers=self.llm_concurrency),
+            'write': StageStats('write'),
+        }
+
+        start = time.perf_counter()
+        if self.worker_mode == "thread":
+            if self._shared_extractor is None:
+                self._shared_extractor = HTMLDateExtractor(**self.extractor_kwargs)
+            executor = ThreadPoolExecutor(max_workers=self.heuristic_workers, thread_name_prefix='heuristic')
+        else:
+            executor = ProcessPoolExecutor(
+                max_workers=self.heuristic_workers,
+                initializer=_init_worker,
+                initargs=(self.extractor_kwargs,)
+            )
+        with executor:
+            threads = [threading.Thread(target=self._read_stage, args=(items,), name='pipeline-read')]
+            threads += [
+                threading.Thread(target=self._heuristic_stage, args=(executor,), name=f'pipeline-heuristic-{i}')
+                for i in range(self.heuristic_workers)
+            ]
+            threads.append(threading.Thread(target=self._llm_stage, name='pipeline-llm'))
+            threads.append(threading.Thread(target=self._write_stage, name='pipeline-write'))
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        # The process workers saved their masks when the pool shut down
+        if self._shared_extractor is not None and self._shared_extractor.boilerplate_cache is not None:
+            self._shared_extractor.boilerplate_cache.save(compact=True)
+        elif self.extractor_kwargs.get('boilerplate_cache_path'):
+            BoilerplateMaskCache(self.extractor_kwargs['boilerplate_cache_path']).save(compact=True)
+
+        logger.info(f"Pipeline processed {self.stats['write'].items} items in {time.perf_counter() - start:.2f}s")
+        return self._records
+
+    def stats_report(self) -> List[Dict[str, Any]]:
+        """Per-stage throughput and queue-depth statistics of the last run."""
+        return [s.as_dict() for s in self.stats.values()]
+
+    # ===== Stages =====
+
+    def _read_stage(self, items: Iterable[PipelineItem]):
+        stats = self.stats['read']
+        try:
+            iterator = iter(items)
+            while True:
+                t0 = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                busy = time.perf_counter() - t0
+                if self.shard is not None and shard_of(item.question_id, item.url, self.shard[1]) != self.shard[0]:
+                    if self.checkpoint is not None:
+                        self.checkpoint.mark_skipped(item.offset)
+                    continue
+                if self.checkpoint is not None:
+                    if item.offset < self.checkpoint.input_offset or self.checkpoint.is_completed(item.offset):
+                        continue
+                    if not item.success:
+                        self.checkpoint.mark_skipped(item.offset)
+                        continue
+                    # Heuristics already ran for this page; only its LLM fallback is left
+                    item.result = self.checkpoint.pending_result(item.offset)
+                if not item.success:
+                    continue
+                self._q_in.put(item)
+                stats.record(busy, self._q_in.qsize())
+        except Exception as e:
+            logger.error(f"Reader stage failed: {e}")
+        finally:
+            for _ in range(self.heuristic_workers):
+                self._q_in.put(_SENTINEL)
+            stats.finish()
+
+    def _heuristic_stage(self, executor: Executor):
+        stats = self.stats['heuristic']
+        # Process workers use their own extractor; thread workers share one
+        if self.worker_mode == "thread":
+            extract = functools.partial(_extract_chunk, self._shared_extractor)
+        else:
+            extract = _extract_chunk_in_worker
+        try:
+            done = False
+            while not done:
+                depth = self._q_in.qsize()
+                item = self._q_in.get()
+                if item is _SENTINEL:
+                    break
+                # Take the pages that are already waiting along, without waiting for more
+                chunk = [item]
+                while len(chunk) < self.heuristic_chunk_size:
+                    try:
+                        item = self._q_in.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _SENTINEL:
+                        done = True
+                        break
+                    chunk.append(item)
+
+                # Resumed pages already have their heuristic result
+                fresh = [item.result is None for item in chunk]
+                todo = [item for item, is_fresh in zip(chunk, fresh) if is_fresh]
+                if todo:
+                    t0 = time.perf_counter()
+                    try:
+                        results = executor.submit(extract, [(item.html_content, item.url) for item in todo]).result()
+                    except Exception as e:
+                        logger.error(f"Heuristic extraction failed for {len(todo)} pages: {e}")
+                        results = [_not_found_result() for _ in todo]
+                    busy = (time.perf_counter() - t0) / len(todo)
+                    for item, result in zip(todo, results):
+                        item.result = result
+                        stats.record(busy, depth)
+
+                for item, is_fresh in zip(chunk, fresh):
+                    if self.use_llm_as_fallback and HTMLDateExtractor.needs_llm_fallback(item.result):
+                        if self.checkpoint is not None and is_fresh:
+                            self.checkpoint.add_pending(item.offset, item.question_id, item.url, item.result)
+                        self._q_llm.put(item)
+                    else:
+                        self._q_out.put(item)
+        finally:
+            # The last heuristic worker to finish closes the LLM stage
+            with self._workers_lock:
+                self._workers_left -= 1
+                last = self._workers_left == 0
+            if last:
+                stats.finish()
+                self._q_llm.put(_SENTINEL)
+
+    def _llm_stage(self):
+        # Set by _llm_loop: whether it has taken the sentinel, and the pages it took but hasn't handed to a task
+        self._llm_closed = False
+        self._llm_taken: List[PipelineItem] = []
+        try:
+            asyncio.run(self._llm_loop())
+        except Exception as e:
+            logger.error(f"LLM stage failed: {e}")
+            self._pass_llm_items_through()
+        finally:
+            self.stats['llm'].finish()
+            self._q_out.put(_SENTINEL)
+
+    def _pass_llm_items_through(self):
+        """After the LLM stage failed, keep draining its queue so the heuristic stage doesn't block on it."""
+        items: Iterable[PipelineItem] = self._llm_taken
+        if not self._llm_closed:
+            items = itertools.chain(items, iter(self._q_llm.get, _SENTINEL))
+        passed = 0
+        for item in items:
+            # With a checkpoint the page stays pending, and a resumed run retries its fallback
+            if self.checkpoint is None:
+                self._q_out.put(item)
+            passed += 1
+        logger.error(f"LLM stage failed, {passed} pages {'left pending' if self.checkpoint else 'kept their heuristic result'}")
+
+    async def _llm_loop(self):
+        loop = asyncio.get_running_loop()
+        stats = self.stats['llm']
+        semaphore = asyncio.Semaphore(self.llm_concurrency)
+        tasks = set()
+        llm_extractor: Optional[LLMDateExtractor] = None
+
+        async def fallback(batch: List[PipelineItem], depth: int):
+            t0 = time.perf_counter()
+            try:
+                if len(batch) == 1:
+                    try:
+                        llm_results = [await llm_extractor.extract_dates(
+                            html_content=batch[0].html_content,
+                            raise_on_failure=self.checkpoint is not None
+                        )]
+                    except LLMExtractionError as e:
+                        llm_results = [e]
+                else:
+                    llm_results = await llm_extractor.extract_dates_packed(
+                        [item.html_content for item in batch],
+                        return_exceptions=self.checkpoint is not None
+                    )
+            except Exception as e:
+                logger.error(f"LLM fallback failed for {len(batch)} pages: {e}")
+                llm_results = [None] * len(batch)
+            finally:
+                semaphore.release()
+                for _ in batch:
+                    stats.record((time.perf_counter() - t0) / len(batch), depth)
+
+            for item, llm_result in zip(batch, llm_results):
+                if isinstance(llm_result, LLMExtractionError):
+                    # Leave the page pending in the checkpoint so a resumed run retries the fallback
+                    logger.error(f"LLM fallback failed for {item.url}, keeping it pending: {llm_result}")
+                    continue
+                if llm_result is not None:
+                    item.result = HTMLDateExtractor.merge_llm_result(item.result, llm_result)
+                await loop.run_in_executor(None, self._q_out.put, item)
+
+        try:
+            done = False
+            while not done:
+                depth = self._q_llm.qsize()
+                item = await loop.run_in_executor(None, self._q_llm.get)
+                if item is _SENTINEL:
+                    self._llm_closed = True
+                    break
+                # Pack the pages that are already waiting, without waiting for more
+                batch = self._llm_taken = [item]
+                while len(batch) < self.llm_pack_size:
+                    try:
+                        item = self._q_llm.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _SENTINEL:
+                        self._llm_closed = done = True
+                        break
+                    batch.append(item)
+                if llm_extractor is None:
+                    llm_extractor = await LLMDateExtractor(**self.llm_kwargs).__aenter__()
+                # Stop taking new items while llm_concurrency requests are in flight
+                await semaphore.acquire()
+                task = asyncio.create_task(fallback(batch, depth))
+                self._llm_taken = []
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            # Pages handed to a task are written (or left pending) by it, also if the loop failed
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            if llm_extractor is not None:
+                await llm_extractor.__aexit__(None, None, None)
+
+    def _write_stage(self):
+        stats = self.stats['write']
+        try:
+            while True:
+                depth = self._q_out.qsize()
+                item = self._q_out.get()
+                if item is _SENTINEL:
+                    break
+                t0 = time.perf_counter()
+                try:
+                    if self.checkpoint is not None:
+                        self.checkpoint.complete(item.offset, item.question_id, item.url, format_record(item))
+                    if self.sink is not None:
+                        self.sink(item)
+                    else:
+                        self._records.append(format_record(item))
+                except Exception as e:
+                    logger.error(f"Writer stage failed for {item.url}: {e}")
+                stats.record(time.perf_counter() - t0, depth)
+        finally:
+            if self.checkpoint is not None:
+                self.checkpoint.flush()
+            stats.finish()
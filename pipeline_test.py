@@ -0,0 +1,65 @@
+'''
+Checks of the batch pipeline's input streaming (pipeline.py).
+Run with pytest, or directly: python pipeline_test.py
+'''
+import json
+import os
+import tempfile
+from pipeline import ExtractionPipeline, iter_content_file, iter_content_results, iter_json_array
+
+
+QUESTIONS = [
+    {'question': {'id': q}, 'content_results': [
+        {'url': f"https://example.com/{q}/{i}", 'success': i != 1,
+         'text': f'<html><body><div class="post-date">2024-03-{i + 1:02d}</div><p>"Story" {q}.{i} ]</p></body></html>'}
+        for i in range(4)
+    ]}
+    for q in range(5)
+]
+
+
+def _write(folder: str, data, indent=None) -> str:
+    path = os.path.join(folder, "content.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent)
+    return path
+
+
+def test_json_array_is_streamed_across_chunk_boundaries():
+    values = [12.5, -3, 1e-7, "a ] , [ string", {"nested": [1, {"b": None}]}, [], True, None, QUESTIONS[0]]
+    with tempfile.TemporaryDirectory() as folder:
+        for indent in (None, 2):
+            path = _write(folder, values, indent)
+            for chunk_size in (1, 2, 3, 7, 64, 1 << 20):
+                assert list(iter_json_array(path, chunk_size)) == values, (indent, chunk_size)
+        for text in ('', '{"a": 1}', '[1, 2', '[1, {"a": ', '[1 2]'):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            try:
+                list(iter_json_array(path, 2))
+                assert False, text
+            except ValueError:
+                pass
+
+
+def test_reader_stage_streams_the_input_file():
+    with tempfile.TemporaryDirectory() as folder:
+        path = _write(folder, QUESTIONS)
+        assert list(iter_content_file(path)) == list(iter_content_results(QUESTIONS))
+        assert [item.offset for item in iter_content_file(path, max_questions=2)] == list(range(8))
+
+        pipeline = ExtractionPipeline(
+            heuristic_workers=2, worker_mode="thread", extractor_kwargs={'disable_logger': True, 'use_htmldate': False}
+        )
+        records = pipeline.run(iter_content_file(path))
+        # Unsuccessful fetches are dropped by the reader
+        assert pipeline.stats['read'].items == 15
+        assert sorted(record['url'] for record in records) == sorted(
+            d['url'] for question in QUESTIONS for d in question['content_results'] if d['success']
+        )
+
+
+if __name__ == "__main__":
+    test_json_array_is_streamed_across_chunk_boundaries()
+    test_reader_stage_streams_the_input_file()
+    print("✅ pipeline checks passed")
@@ -0,0 +1,225 @@
+"""
+Provenance of extracted dates, and incremental re-extraction after a rule change.
+
+Every DateResult records which strategy and which rule (the meta name, CSS selector or
+JSON-LD key) produced its published and modified date, and the version (a hash) of the
+extractor's rules: PUBLISHED_META_NAMES, MODIFIED_META_NAMES, DATE_SELECTORS,
+MODIFIED_SELECTORS, DATE_PATTERNS, the prescreen budget, whether pages are parsed with
+lean_parse, and the boilerplate mask settings (None without a mask cache). Result records keep it
+under "provenance", and each run stores the rules of its version in
+data/extract_results/rules/<version>.json.
+
+After editing the rules, only pages whose outcome could change are re-extracted. A
+field could change if:
+    - a rule list walked before its date was found changed (the cascade tries JSON-LD,
+      Open Graph, <time>, meta tags, CSS selectors, htmldate in this order, and every
+      strategy before the resolving one walked its whole list without a match),
+    - the resolving rule list changed at or before the rule that matched,
+    - the prescreen (DATE_PATTERNS, DATE_LIKE_RE, MAX_CANDIDATE_LENGTH) changed and the
+      <time> or CSS selector strategies ran,
+    - or the field was not found at all and any of its rules changed.
+DATE_PATTERNS also decides dates_found and last_date_found, so changing it makes every
+HTML and plain text page stale. LEAN_PARSE changes the tree every strategy reads, and
+BOILERPLATE_MASKS the regions the date scan skips, so changing either makes every HTML
+page stale. PDFs and unsupported payloads never are.
+
+    python provenance.py plan data/extract_results/date_extractor_result.json
+    python html_date_extractor_test.py --reextract
+"""
+import argparse
+import hashlib
+import json
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from shared import DateResult, ExtractionMethod
+
+
+RULES_FOLDER = "data/extract_results/rules"
+
+# Per field: the cascade strategies in order, and the rule list each walks
+# (JSON-LD reads a fixed key and htmldate has no rules of ours)
+CASCADE_RULES = {
+    'published': [
+        (ExtractionMethod.JSON_LD.value, None),
+        (ExtractionMethod.OPEN_GRAPH.value, 'PUBLISHED_META_NAMES'),
+        (ExtractionMethod.HTML5_TIME.value, 'DATE_SELECTORS'),
+        (ExtractionMethod.META_TAGS.value, 'PUBLISHED_META_NAMES'),
+        (ExtractionMethod.CSS_SELECTORS.value, 'DATE_SELECTORS'),
+        (ExtractionMethod.HTMLDATE_LIB.value, None),
+    ],
+    'modified': [
+        (ExtractionMethod.JSON_LD.value, None),
+        (ExtractionMethod.OPEN_GRAPH.value, 'MODIFIED_META_NAMES'),
+        (ExtractionMethod.HTML5_TIME.value, 'MODIFIED_SELECTORS'),
+        (ExtractionMethod.META_TAGS.value, 'MODIFIED_META_NAMES'),
+        (ExtractionMethod.CSS_SELECTORS.value, 'MODIFIED_SELECTORS'),
+        (ExtractionMethod.HTMLDATE_LIB.value, None),
+    ],
+}
+# Rules of _prescreen_candidate, used on element text by these strategies
+PRESCREEN_RULES = ('DATE_PATTERNS', 'DATE_LIKE_RE', 'MAX_CANDIDATE_LENGTH')
+PRESCREENED_STRATEGIES = (ExtractionMethod.HTML5_TIME.value, ExtractionMethod.CSS_SELECTORS.value)
+# Routes whose results no rule affects, and the one only the date scan affects
+RULE_FREE_ROUTES = (ExtractionMethod.PDF_METADATA.value, ExtractionMethod.UNSUPPORTED_CONTENT.value)
+SCAN_ONLY_ROUTE = ExtractionMethod.TEXT_SCAN.value
+# Rules every HTML page depends on, whichever strategy found its dates
+HTML_WIDE_RULES = ('LEAN_PARSE', 'BOILERPLATE_MASKS')
+
+
+def rules_version(snapshot: Dict[str, Any]) -> str:
+    """A short stable hash of a rules snapshot."""
+    return hashlib.sha1(json.dumps(snapshot, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def save_rules_snapshot(snapshot: Dict[str, Any], folder: str = RULES_FOLDER) -> str:
+    """Store a snapshot as <folder>/<version>.json (once per version) and return its version."""
+    version = rules_version(snapshot)
+    path = os.path.join(folder, f"{version}.json")
+    if not os.path.exists(path):
+        os.makedirs(folder, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    return version
+
+
+def load_rules_snapshot(version: str, folder: str = RULES_FOLDER) -> Optional[Dict[str, Any]]:
+    path = os.path.join(folder, f"{version}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def record_provenance(result: DateResult) -> Dict[str, Any]:
+    """The "provenance" entry of a result record."""
+    return {
+        'rules': result.rules_version,
+        'published': {'method': result.published_method, 'rule': result.published_rule},
+        'modified': {'method': result.modified_method, 'rule': result.modified_rule},
+    }
+
+
+def changed_rules(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    return sorted(name for name in set(old) | set(new) if old.get(name) != new.get(name))
+
+
+def field_stale_reason(field: str, provenance: Dict[str, Any], old: Dict[str, Any], new: Dict[str, Any]) -> Optional[str]:
+    """Why the published or modified field of a result could change under the new rules (None if it cannot)."""
+    method = provenance.get('method') or ExtractionMethod.NOT_FOUND.value
+    rule = provenance.get('rule')
+    cascade = CASCADE_RULES[field]
+    resolved_at = next((i for i, (strategy, _) in enumerate(cascade) if strategy == method), None)
+    prescreen_changed = [name for name in PRESCREEN_RULES if old.get(name) != new.get(name)]
+
+    for i, (strategy, rule_list) in enumerate(cascade):
+        if resolved_at is not None and i > resolved_at:
+            break
+        if strategy in PRESCREENED_STRATEGIES and prescreen_changed:
+            return f"{field}: {strategy} prescreen changed ({', '.join(prescreen_changed)})"
+        if rule_list is None or old.get(rule_list) == new.get(rule_list):
+            continue
+        if i == resolved_at:
+            # Only the rules up to the one that matched were tried
+            if rule in (old.get(rule_list) or []):
+                k = old[rule_list].index(rule) + 1
+                if old[rule_list][:k] == (new.get(rule_list) or [])[:k]:
+                    continue
+            return f"{field}: {rule_list} changed at or before '{rule}'"
+        if resolved_at is None:
+            return f"{field}: not found, {rule_list} changed"
+        return f"{field}: {rule_list} changed ({strategy} runs before {method})"
+    return None
+
+
+def stale_reason(record: Dict[str, Any], old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Optional[str]:
+    """
+    Why a result record could change under the new rules.
+
+    Args:
+        record: A result record (with its "provenance")
+        old: The rules the record was extracted with (None if unknown)
+        new: The current rules (HTMLDateExtractor.rules_snapshot())
+
+    Returns:
+        A short reason, or None if re-extracting the page cannot change its record
+    """
+    provenance = record.get('provenance')
+    if not provenance or not provenance.get('rules'):
+        return "no provenance"
+    if old is None:
+        return f"rules {provenance['rules']} unknown"
+    published_method = provenance['published'].get('method') or ''
+    if published_method.startswith(RULE_FREE_ROUTES):
+        return None
+    if old.get('DATE_PATTERNS') != new.get('DATE_PATTERNS'):
+        return "dates_found: DATE_PATTERNS changed"
+    if published_method.startswith(SCAN_ONLY_ROUTE):
+        return None
+    html_wide_changed = [name for name in HTML_WIDE_RULES if old.get(name) != new.get(name)]
+    if html_wide_changed:
+        return f"all HTML pages: {', '.join(html_wide_changed)} changed"
+    for field in ('published', 'modified'):
+        reason = field_stale_reason(field, provenance[field], old, new)
+        if reason:
+            return reason
+    return None
+
+
+def plan_reextraction(
+    records: List[Dict[str, Any]], new: Dict[str, Any], rules_folder: str = RULES_FOLDER
+) -> List[Tuple[Dict[str, Any], str]]:
+    """The records that could change under the new rules, each with the reason."""
+    new_version = rules_version(new)
+    snapshots: Dict[str, Optional[Dict[str, Any]]] = {}
+    stale = []
+    for record in records:
+        version = (record.get('provenance') or {}).get('rules')
+        if version == new_version:
+            continue
+        if version and version not in snapshots:
+            snapshots[version] = load_rules_snapshot(version, rules_folder)
+        reason = stale_reason(record, snapshots.get(version), new)
+        if reason:
+            stale.append((record, reason))
+    return stale
+
+
+def summarize_plan(records: List[Dict[str, Any]], stale: List[Tuple[Dict[str, Any], str]]) -> str:
+    lines = [f"{len(stale)}/{len(records)} pages to re-extract"]
+    for reason, count in Counter(reason for _, reason in stale).most_common():
+        lines.append(f"  {count:>6}  {reason}")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    from html_date_extractor import HTMLDateExtractor
+
+    arg_parser = argparse.ArgumentParser(description="Show which results a change of the extractor's rules affects.")
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+    plan_parser = subparsers.add_parser('plan', help="List the pages a re-extraction would redo, by reason")
+    plan_parser.add_argument('result_file')
+    plan_parser.add_argument('--rules-folder', default=RULES_FOLDER)
+    plan_parser.add_argument('--list', action='store_true', help="Also print every stale URL")
+    plan_parser.add_argument('--lean-parse', action='store_true', help="The runs use --lean-parse")
+    plan_parser.add_argument('--boilerplate-cache', default="data/extract_results/boilerplate_masks.json",
+                             help="The boilerplate mask file of the runs ('' if they run without one)")
+    args = arg_parser.parse_args()
+
+    with open(args.result_file, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    current = HTMLDateExtractor(
+        disable_logger=True, lean_parse=args.lean_parse, boilerplate_cache_path=args.boilerplate_cache or None
+    ).rules_snapshot()
+    print(f"Current rules: {rules_version(current)}")
+    for version in sorted({(r.get('provenance') or {}).get('rules') for r in records} - {None}):
+        snapshot = load_rules_snapshot(version, args.rules_folder)
+        changes = changed_rules(snapshot, current) if snapshot is not None else ['(snapshot missing)']
+        print(f"Rules {version}: {', '.join(changes) or 'unchanged'}")
+    stale = plan_reextraction(records, current, args.rules_folder)
+    print(summarize_plan(records, stale))
+    if args.list:
+        for record, reason in stale:
+            print(f"{record['url']}\t{reason}")
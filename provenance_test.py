@@ -0,0 +1,115 @@
+'''
+Checks of the re-extraction plan (provenance.py): a rule change schedules only the fields
+and pages that depend on it.
+Run with pytest, or directly: python provenance_test.py
+'''
+import copy
+import tempfile
+from html_date_extractor import HTMLDateExtractor
+from pipeline import PipelineItem, format_record
+from provenance import plan_reextraction, rules_version, save_rules_snapshot
+from shared import ExtractionMethod
+
+
+PAGES = {
+    # Published and modified date from Open Graph
+    'og': '<html><head><meta property="article:published_time" content="2024-03-05">'
+          '<meta property="article:modified_time" content="2024-03-06"></head><body><p>Story.</p></body></html>',
+    # Published date from a DATE_SELECTORS element, no modified date
+    'css': '<html><body><div class="post-date">2024-03-07</div><p>Story.</p></body></html>',
+    'jsonld': '<html><head><script type="application/ld+json">{"@type": "NewsArticle", "datePublished": "2024-03-08"}'
+              '</script></head><body><p>Story.</p></body></html>',
+    'none': '<html><body><p>A story without any date.</p></body></html>',
+    'text': 'Minutes of the meeting, 5 March 2024.',
+}
+
+EXTRACTOR = HTMLDateExtractor(disable_logger=True, use_htmldate=False)
+
+
+def _records():
+    records = []
+    for name, page in PAGES.items():
+        result = EXTRACTOR.extract_from_html(page, url=f"https://example.com/{name}")
+        records.append(format_record(PipelineItem(question_id=1, url=name, html_content=page, result=result)))
+    pdf = {'method': ExtractionMethod.PDF_METADATA.value, 'rule': None}
+    records.append({'question_id': 1, 'url': 'pdf', 'provenance': {
+        'rules': EXTRACTOR.rules_version, 'published': pdf, 'modified': pdf
+    }})
+    return records
+
+
+def _plan(new):
+    """{url: reason} of the records extracted with EXTRACTOR's rules that are stale under the new rules."""
+    with tempfile.TemporaryDirectory() as folder:
+        save_rules_snapshot(EXTRACTOR.rules_snapshot(), folder)
+        return {record['url']: reason for record, reason in plan_reextraction(_records(), new, folder)}
+
+
+def _changed(name, edit):
+    rules = copy.deepcopy(EXTRACTOR.rules_snapshot())
+    rules[name] = edit(rules[name])
+    return rules
+
+
+def test_unchanged_rules_schedule_nothing():
+    assert _plan(EXTRACTOR.rules_snapshot()) == {}
+
+
+def test_selector_change_after_the_matched_rule():
+    # The matched selector and every one before it are unchanged: only the not found page
+    plan = _plan(_changed('DATE_SELECTORS', lambda selectors: selectors + ['.dateline']))
+    assert plan == {'none': "published: not found, DATE_SELECTORS changed"}
+
+
+def test_selector_change_before_the_matched_rule():
+    plan = _plan(_changed('DATE_SELECTORS', lambda selectors: ['.dateline'] + selectors))
+    assert sorted(plan) == ['css', 'none']
+    assert plan['css'] == "published: DATE_SELECTORS changed at or before '.post-date'"
+
+
+def test_meta_name_changes_affect_their_field_only():
+    # Open Graph runs before the selectors, so the css page is stale; the og page matched before the change
+    plan = _plan(_changed('PUBLISHED_META_NAMES', lambda names: names + ['dc.date.issued']))
+    assert sorted(plan) == ['css', 'none']
+    assert plan['css'].startswith("published: PUBLISHED_META_NAMES changed")
+
+    # Only the pages without a modified date; none of their published dates
+    plan = _plan(_changed('MODIFIED_META_NAMES', lambda names: names + ['dc.date.modified']))
+    assert sorted(plan) == ['css', 'jsonld', 'none']
+    assert plan['jsonld'] == "modified: not found, MODIFIED_META_NAMES changed"
+    plan = _plan(_changed('MODIFIED_META_NAMES', lambda names: [n for n in names if n != 'article:modified_time']))
+    assert plan['og'] == "modified: MODIFIED_META_NAMES changed at or before 'article:modified_time'"
+
+
+def test_date_patterns_affect_every_scanned_page():
+    plan = _plan(_changed('DATE_PATTERNS', lambda patterns: patterns[:-1]))
+    assert sorted(plan) == ['css', 'jsonld', 'none', 'og', 'text']
+    assert set(plan.values()) == {"dates_found: DATE_PATTERNS changed"}
+
+
+def test_lean_parse_and_boilerplate_masks_affect_every_html_page():
+    lean = HTMLDateExtractor(disable_logger=True, use_htmldate=False, lean_parse=True)
+    assert lean.rules_version != EXTRACTOR.rules_version
+    plan = _plan(lean.rules_snapshot())
+    assert sorted(plan) == ['css', 'jsonld', 'none', 'og']
+    assert plan['og'] == "all HTML pages: LEAN_PARSE changed"
+
+    with tempfile.TemporaryDirectory() as folder:
+        masked = HTMLDateExtractor(
+            disable_logger=True, use_htmldate=False, boilerplate_cache_path=f"{folder}/boilerplate_masks.json"
+        )
+    assert sorted(_plan(masked.rules_snapshot())) == ['css', 'jsonld', 'none', 'og']
+    # The mask settings are part of the version too
+    rules = masked.rules_snapshot()
+    masked.boilerplate_cache.min_pages += 1
+    assert rules_version(masked.rules_snapshot()) != rules_version(rules)
+
+
+if __name__ == "__main__":
+    test_unchanged_rules_schedule_nothing()
+    test_selector_change_after_the_matched_rule()
+    test_selector_change_before_the_matched_rule()
+    test_meta_name_changes_affect_their_field_only()
+    test_date_patterns_affect_every_scanned_page()
+    test_lean_parse_and_boilerplate_masks_affect_every_html_page()
+    print("✅ provenance checks passed")
@@ -0,0 +1,218 @@
+"""
+Sharded batch runs: split the corpus across machines and merge their results.
+
+Every page belongs to exactly one shard, chosen by a stable hash of its
+(question id, url), so shards are disjoint and the same page always lands in the
+same shard no matter which node runs it or how often it is rerun:
+
+    python html_date_extractor_test.py --shard 0/4      # on node 0
+    python html_date_extractor_test.py --shard 1/4      # on node 1, ...
+
+Nodes coordinate only through a shared filesystem. Each shard has its own directory
+under the shards folder:
+    shard-00001-of-00004/
+        progress.json, segment-*.jsonl, pending_llm.jsonl   (its BatchCheckpoint)
+        shard.json                                          (written when the shard's run ends,
+                                                             removed when it starts again)
+
+Once all shards are done, merge them into the final result file and corpus index:
+
+    python sharding.py merge data/extract_results/shards \\
+        --output data/extract_results/date_extractor_result.json --index data/extract_results/date_index
+
+The merge refuses to run while shards are missing, unfinished or still have pages
+waiting for the LLM fallback (override with --allow-partial).
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from checkpoint import PROGRESS_FILE, BatchCheckpoint, read_entries
+
+
+SHARD_MARKER_FILE = "shard.json"
+_SHARD_DIR_RE = re.compile(r'^shard-(\d+)-of-(\d+)$')
+
+
+class ShardMergeError(RuntimeError):
+    """Raised when shards cannot be merged (missing, unfinished or inconsistent shards)."""
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parse "i/N" (0-based shard i of N shards)."""
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard {spec!r}, expected i/N such as 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard {spec!r}: need 0 <= i < N")
+    return index, count
+
+
+def shard_of(question_id: Any, url: str, n_shards: int) -> int:
+    """The shard of a page: a stable hash of (question id, url), independent of the Python process."""
+    key = f"{question_id}\t{url}".encode('utf-8')
+    return int.from_bytes(hashlib.sha1(key).digest()[:8], 'big') % n_shards
+
+
+def shard_dir(shards_folder: str, index: int, n_shards: int) -> str:
+    return os.path.join(shards_folder, f"shard-{index:05d}-of-{n_shards:05d}")
+
+
+def write_shard_marker(directory: str, index: int, n_shards: int, checkpoint: BatchCheckpoint):
+    """Record that a shard's run ended; complete only if no page still waits for the LLM fallback."""
+    marker = {
+        'shard': index,
+        'n_shards': n_shards,
+        'records': len(checkpoint.completed),
+        'pending_llm': len(checkpoint.pending_llm),
+        'complete': not checkpoint.pending_llm,
+        'finished_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    tmp = os.path.join(directory, SHARD_MARKER_FILE + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(marker, f, indent=2)
+    os.replace(tmp, os.path.join(directory, SHARD_MARKER_FILE))
+
+
+def clear_shard_marker(directory: str):
+    """Mark a shard as running again: a new or resumed run invalidates the marker of the previous one."""
+    try:
+        os.remove(os.path.join(directory, SHARD_MARKER_FILE))
+    except FileNotFoundError:
+        pass
+
+
+def shard_status(shards_folder: str, n_shards: Optional[int] = None) -> Tuple[int, Dict[int, Optional[Dict]]]:
+    """
+    Find the shard directories and read their markers.
+
+    Args:
+        shards_folder: The folder holding the shard-i-of-N directories
+        n_shards: Expected number of shards (default: read from the directory names)
+
+    Returns:
+        (number of shards, {shard index: marker, or None if the shard has not finished})
+        Shards without a directory are missing from the dict.
+    """
+    found: Dict[int, str] = {}
+    counts = set()
+    for name in os.listdir(shards_folder) if os.path.isdir(shards_folder) else []:
+        match = _SHARD_DIR_RE.match(name)
+        if match:
+            found[int(match.group(1))] = os.path.join(shards_folder, name)
+            counts.add(int(match.group(2)))
+    if n_shards is not None:
+        counts.add(n_shards)
+    if not counts:
+        raise ShardMergeError(f"No shards in '{shards_folder}'")
+    if len(counts) > 1:
+        raise ShardMergeError(f"Shards of different runs in '{shards_folder}': N = {sorted(counts)}")
+    n_shards = counts.pop()
+
+    status = {}
+    for index, directory in found.items():
+        marker_path = os.path.join(directory, SHARD_MARKER_FILE)
+        if os.path.exists(marker_path):
+            with open(marker_path, 'r', encoding='utf-8') as f:
+                status[index] = json.load(f)
+        else:
+            status[index] = None
+    return n_shards, status
+
+
+def merge_shards(shards_folder: str, n_shards: Optional[int] = None, allow_partial: bool = False) -> List[Dict[str, Any]]:
+    """
+    Combine the records of all shards, in input order.
+
+    Raises:
+        ShardMergeError: If a shard is missing, unfinished or has pages waiting for the LLM
+            fallback (unless allow_partial), a finished shard's records don't match its marker,
+            or the shards hold records of the same input offset
+    """
+    n_shards, status = shard_status(shards_folder, n_shards)
+    problems = []
+    for index in range(n_shards):
+        marker = status.get(index, 'missing')
+        if marker == 'missing':
+            problems.append(f"shard {index}/{n_shards} is missing")
+        elif marker is None:
+            problems.append(f"shard {index}/{n_shards} has not finished")
+        elif not marker['complete']:
+            problems.append(f"shard {index}/{n_shards} has {marker['pending_llm']} pages waiting for the LLM fallback")
+    if problems and not allow_partial:
+        raise ShardMergeError("Cannot merge: " + "; ".join(problems))
+
+    entries = []
+    seen: Dict[int, int] = {}  # offset -> shard
+    for index in range(n_shards):
+        directory = shard_dir(shards_folder, index, n_shards)
+        marker = status.get(index)
+        if not os.path.exists(os.path.join(directory, PROGRESS_FILE)):
+            if marker is None:
+                continue  # Missing or unfinished, and allow_partial
+            raise ShardMergeError(f"shard {index}/{n_shards} is marked finished but has no {PROGRESS_FILE}")
+        shard_offsets = set()
+        for entry in read_entries(directory):
+            if shard_of(entry['question_id'], entry['url'], n_shards) != index:
+                raise ShardMergeError(f"{entry['url']} is in shard {index} but hashes to another shard")
+            # A page repeated in the input has one record per position, like in an unsharded run
+            if entry['offset'] in seen:
+                raise ShardMergeError(
+                    f"offset {entry['offset']} has records in shards {seen[entry['offset']]} and {index}; "
+                    f"were the shards run on different inputs?"
+                )
+            seen[entry['offset']] = index
+            shard_offsets.add(entry['offset'])
+            entries.append(entry)
+        if marker is not None and len(shard_offsets) != marker['records']:
+            raise ShardMergeError(
+                f"shard {index}/{n_shards} has {len(shard_offsets)} records, its marker says {marker['records']}"
+            )
+    # Offsets are positions in the shared input, so this restores the input order
+    entries.sort(key=lambda entry: entry['offset'])
+    return [entry['record'] for entry in entries]
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Check or merge the shards of a sharded batch run.")
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+
+    status_parser = subparsers.add_parser('status', help="Show which shards are done")
+    status_parser.add_argument('shards_folder')
+    status_parser.add_argument('--shards', type=int, help="Expected number of shards")
+
+    merge_parser = subparsers.add_parser('merge', help="Merge finished shards into the result file and index")
+    merge_parser.add_argument('shards_folder')
+    merge_parser.add_argument('--shards', type=int, help="Expected number of shards")
+    merge_parser.add_argument('--output', default="data/extract_results/date_extractor_result.json")
+    merge_parser.add_argument('--index', default="data/extract_results/date_index")
+    merge_parser.add_argument('--allow-partial', action='store_true',
+                              help="Merge even if shards are missing or unfinished")
+
+    args = arg_parser.parse_args()
+    if args.command == 'status':
+        n, status = shard_status(args.shards_folder, args.shards)
+        for i in range(n):
+            marker = status.get(i, 'missing')
+            if marker == 'missing' or marker is None:
+                print(f"shard {i}/{n}: {'missing' if marker == 'missing' else 'running or crashed'}")
+            else:
+                print(f"shard {i}/{n}: {marker['records']} records, {marker['pending_llm']} pending LLM, "
+                      f"finished {marker['finished_at']}")
+    else:
+        from corpus_index import CorpusIndex
+
+        try:
+            records = merge_shards(args.shards_folder, args.shards, allow_partial=args.allow_partial)
+        except ShardMergeError as e:
+            print(f"❌ {e}")
+            raise SystemExit(1)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        print(f"✅ Merged {len(records)} results into '{args.output}'")
+        CorpusIndex.from_records(records).save(args.index)
+        print(f"✅ Indexed the results into '{args.index}'")
@@ -0,0 +1,129 @@
+'''
+Checks of sharded runs (sharding.py): stable shard assignment, shard markers and the merge checks.
+Run with pytest, or directly: python sharding_test.py
+'''
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from checkpoint import BatchCheckpoint
+from pipeline import ExtractionPipeline, PipelineItem
+from sharding import (
+    ShardMergeError, clear_shard_marker, merge_shards, shard_dir, shard_of, shard_status, write_shard_marker
+)
+
+
+N_SHARDS = 3
+KEYS = [(q, f"https://example.com/{q}/{n}") for q in (101, 102, None) for n in range(8)]
+
+
+def _items():
+    pages = [
+        f'<html><body><article><div class="post-date">2024-03-{i % 28 + 1:02d}</div></article></body></html>'
+        for i in range(len(KEYS))
+    ]
+    return [PipelineItem(question_id=q, url=url, html_content=html, offset=i) for i, ((q, url), html) in enumerate(zip(KEYS, pages))]
+
+
+def _run_shard(folder: str, index: int):
+    directory = shard_dir(folder, index, N_SHARDS)
+    clear_shard_marker(directory)
+    checkpoint = BatchCheckpoint(directory)
+    ExtractionPipeline(
+        heuristic_workers=2, extractor_kwargs={'disable_logger': True, 'use_htmldate': False},
+        checkpoint=checkpoint, worker_mode="thread", shard=(index, N_SHARDS)
+    ).run(_items())
+    checkpoint.close()
+    write_shard_marker(directory, index, N_SHARDS, checkpoint)
+
+
+def _merge_error(folder: str, **kwargs) -> str:
+    try:
+        merge_shards(folder, **kwargs)
+    except ShardMergeError as e:
+        return str(e)
+    assert False, "the merge did not fail"
+
+
+def test_shard_assignment_is_stable():
+    shards = [shard_of(q, url, N_SHARDS) for q, url in KEYS]
+    assert shards == [shard_of(q, url, N_SHARDS) for q, url in KEYS]
+    assert set(shards) == set(range(N_SHARDS))
+    # Another interpreter, with another str hash seed, assigns the same shards
+    code = f"from sharding import shard_of; print([shard_of(q, url, {N_SHARDS}) for q, url in {KEYS!r}])"
+    env = {**os.environ, 'PYTHONHASHSEED': '12345'}
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            env=env, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    assert json.loads(output) == shards
+
+
+def test_merge_restores_input_order():
+    with tempfile.TemporaryDirectory() as folder:
+        for index in range(N_SHARDS):
+            _run_shard(folder, index)
+        records = merge_shards(folder)
+        assert [(record['question_id'], record['url']) for record in records] == KEYS
+        n, status = shard_status(folder)
+        assert n == N_SHARDS and sum(marker['records'] for marker in status.values()) == len(KEYS)
+
+
+def test_rerun_clears_the_marker():
+    with tempfile.TemporaryDirectory() as folder:
+        for index in range(N_SHARDS):
+            _run_shard(folder, index)
+        # A shard that starts again is unfinished until its run ends
+        clear_shard_marker(shard_dir(folder, 1, N_SHARDS))
+        assert shard_status(folder)[1][1] is None
+        assert "shard 1/3 has not finished" in _merge_error(folder)
+        _run_shard(folder, 1)
+        assert len(merge_shards(folder)) == len(KEYS)
+
+
+def test_merge_refuses_missing_and_inconsistent_shards():
+    with tempfile.TemporaryDirectory() as folder:
+        for index in (0, 2):
+            _run_shard(folder, index)
+        assert "shard 1/3 is missing" in _merge_error(folder)
+        partial = merge_shards(folder, allow_partial=True)
+        assert 0 < len(partial) < len(KEYS)
+        _run_shard(folder, 1)
+
+        # A record whose (question id, url) belongs to another shard
+        path = os.path.join(shard_dir(folder, 0, N_SHARDS), "segment-00000.jsonl")
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        stray = next(key for key in KEYS if shard_of(*key, N_SHARDS) == 1)
+        entry = json.loads(lines[0])
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines([json.dumps({**entry, 'question_id': stray[0], 'url': stray[1]}) + '\n'] + lines[1:])
+        assert "hashes to another shard" in _merge_error(folder)
+
+        # The same input offset in two shards: the shards were run on different inputs
+        with open(os.path.join(shard_dir(folder, 1, N_SHARDS), "segment-00000.jsonl"), 'r', encoding='utf-8') as f:
+            other = json.loads(f.readline())
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines([json.dumps({**entry, 'offset': other['offset']}) + '\n'] + lines[1:])
+        assert f"offset {other['offset']} has records in shards 0 and 1" in _merge_error(folder)
+
+        # A marker that doesn't match the shard's records
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        marker_path = os.path.join(shard_dir(folder, 2, N_SHARDS), "shard.json")
+        with open(marker_path, 'r', encoding='utf-8') as f:
+            marker = json.load(f)
+        with open(marker_path, 'w', encoding='utf-8') as f:
+            json.dump({**marker, 'records': marker['records'] + 1}, f)
+        assert "its marker says" in _merge_error(folder)
+
+        # Shards of runs with different N
+        os.makedirs(shard_dir(folder, 0, 4))
+        assert "different runs" in _merge_error(folder)
+
+
+if __name__ == "__main__":
+    test_shard_assignment_is_stable()
+    test_merge_restores_input_order()
+    test_rerun_clears_the_marker()
+    test_merge_refuses_missing_and_inconsistent_shards()
+    print("✅ sharding checks passed")
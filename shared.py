@@ -1,4 +1,4 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, asdict
 from enum import Enum
 from typing import Optional, List
 from datetime import date
@@ -12,6 +12,9 @@ class ExtractionMethod(Enum):
     CSS_SELECTORS = "CSS selectors"
     HTMLDATE_LIB = "htmldate library"
     LLM = "LLM"
+    PDF_METADATA = "PDF metadata"
+    TEXT_SCAN = "text scan"
+    UNSUPPORTED_CONTENT = "unsupported content"
     NOT_FOUND = "not found"
 
 
@@ -28,3 +31,24 @@ class DateResult:
     dates_found: List[date] = field(default_factory=list) # When defining a field with a mutable default value (like a list, dictionary, or set) directly, for example, my_list: list = [], all instances of the class would share the same list object. This means if you modify the list in one instance, it would affect all other instances, leading to unexpected behavior. 
     pub_confidence: str = "medium"  # high, medium, low
     mod_confidence: str = "medium"  # high, medium, low
+    published_rule: Optional[str] = None  # The selector, meta name or JSON-LD key that produced published_date
+    modified_rule: Optional[str] = None
+    rules_version: Optional[str] = None  # Hash of the extractor's rules (see provenance.py)
+
+
+def date_result_to_dict(result: DateResult) -> dict:
+    """Convert a DateResult into a JSON-serializable dict (dates as ISO strings)."""
+    d = asdict(result)
+    for key in ('published_date', 'modified_date', 'last_date_found'):
+        d[key] = d[key].isoformat() if d[key] else None
+    d['dates_found'] = [dt.isoformat() for dt in d['dates_found']]
+    return d
+
+
+def date_result_from_dict(d: dict) -> DateResult:
+    """Inverse of date_result_to_dict."""
+    d = dict(d)
+    for key in ('published_date', 'modified_date', 'last_date_found'):
+        d[key] = date.fromisoformat(d[key]) if d.get(key) else None
+    d['dates_found'] = [date.fromisoformat(dt) for dt in d.get('dates_found') or []]
+    return DateResult(**d)
@@ -0,0 +1,245 @@
+"""
+Slow-document capture and replay.
+
+A few pages take orders of magnitude longer than the median in extract_from_html.
+With capture enabled, every page whose extraction exceeds a threshold is saved to a
+quarantine directory together with its URL, per-strategy timing breakdown and the
+extractor settings it ran with:
+
+    extractor = HTMLDateExtractor(slow_capture_dir="data/slow_pages", slow_threshold_seconds=2.0)
+
+Each captured page becomes two files:
+    <id>.html   the raw HTML (<id>.bin for a byte payload, e.g. a PDF the triage routed away from HTML)
+    <id>.json   {"url": ..., "total_seconds": ..., "timings": {"parse": ..., "published/json-ld": ...},
+                 "extractor_kwargs": {"lean_parse": ..., "max_candidate_length": ..., ...}, ...}
+
+The replay tool reruns captured pages, with their URL and settings, under a profiler and
+prints where the time went, per strategy and per _parse_date call. The boilerplate masks
+are read from the same cache file, so they may have grown since the capture:
+
+    python slow_capture.py data/slow_pages                  # cProfile
+    python slow_capture.py data/slow_pages --sampler        # low-overhead stack sampling
+    python slow_capture.py data/slow_pages --case <id>      # a single captured page
+"""
+import argparse
+import cProfile
+import hashlib
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+class SlowDocumentCapture:
+    """Writes slow pages to a quarantine directory."""
+
+    def __init__(self, directory: str, threshold_seconds: float = 2.0):
+        """
+        Initialize the capture.
+
+        Args:
+            directory: The quarantine directory
+            threshold_seconds: Pages whose extraction takes at least this long are captured
+        """
+        self.directory = directory
+        self.threshold_seconds = threshold_seconds
+        os.makedirs(directory, exist_ok=True)
+
+    def capture(
+        self,
+        html_content: Union[str, bytes],
+        url: Optional[str],
+        total_seconds: float,
+        timings: Optional[Dict[str, float]],
+        extractor_kwargs: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Save a slow page.
+
+        Args:
+            html_content: The page, or the raw bytes of a payload
+            url: URL of the page (the boilerplate masks depend on it)
+            total_seconds: How long its extraction took
+            timings: Seconds per step/strategy
+            extractor_kwargs: HTMLDateExtractor arguments to replay it with (see HTMLDateExtractor.extraction_kwargs)
+
+        Returns:
+            The id of the captured case
+        """
+        payload = html_content if isinstance(html_content, bytes) else html_content.encode('utf-8', errors='replace')
+        digest = hashlib.sha1(url.encode('utf-8', errors='replace') if url else payload).hexdigest()[:12]
+        case_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{digest}"
+        payload_file = f"{case_id}.bin" if isinstance(html_content, bytes) else f"{case_id}.html"
+        with open(os.path.join(self.directory, payload_file), 'wb') as f:
+            f.write(payload)
+        with open(os.path.join(self.directory, f"{case_id}.json"), 'w', encoding='utf-8') as f:
+            json.dump({
+                'url': url,
+                'payload_file': payload_file,
+                'total_seconds': round(total_seconds, 4),
+                'html_bytes': len(payload),
+                'timings': {name: round(seconds, 4) for name, seconds in (timings or {}).items()},
+                'captured_at': datetime.now().isoformat(timespec='seconds'),
+                'extractor_kwargs': extractor_kwargs or {},
+            }, f, indent=2)
+        return case_id
+
+
+def load_cases(directory: str, case_id: Optional[str] = None) -> List[Tuple[str, Dict, Union[str, bytes]]]:
+    """Load (case id, metadata, html or byte payload) of the captured pages, slowest first."""
+    cases = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json') or (case_id and name != f"{case_id}.json"):
+            continue
+        cid = name[:-len('.json')]
+        with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        payload_file = meta.get('payload_file', f"{cid}.html")
+        if payload_file.endswith('.bin'):
+            with open(os.path.join(directory, payload_file), 'rb') as f:
+                cases.append((cid, meta, f.read()))
+        else:
+            with open(os.path.join(directory, payload_file), 'r', encoding='utf-8') as f:
+                cases.append((cid, meta, f.read()))
+    cases.sort(key=lambda case: case[1].get('total_seconds', 0), reverse=True)
+    return cases
+
+
+class _ParseDateRecorder:
+    """Wraps an extractor's _parse_date and records the duration of every call."""
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+        self.original = extractor._parse_date
+        self.calls: List[Tuple[float, str, bool]] = []  # (seconds, date string, parsed?)
+
+    def __enter__(self):
+        def timed_parse_date(date_string, *args, **kwargs):
+            start = time.perf_counter()
+            result = self.original(date_string, *args, **kwargs)
+            self.calls.append((time.perf_counter() - start, date_string, result is not None))
+            return result
+        self.extractor._parse_date = timed_parse_date
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # Drop the instance attribute so the class method is used again
+        del self.extractor._parse_date
+
+
+class _StackSampler:
+    """Samples the stack of one thread at a fixed interval; a low-overhead alternative to cProfile."""
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.ticks = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.ticks += 1
+            # Attribute each sample to every function on the stack (inclusive time)
+            seen = set()
+            while frame is not None:
+                code = frame.f_code
+                key = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+                if key not in seen:
+                    self.samples[key] += 1
+                    seen.add(key)
+                frame = frame.f_back
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+
+
+def replay(directory: str, case_id: Optional[str] = None, use_sampler: bool = False, top: int = 15):
+    """Rerun captured pages under a profiler and print where the time went."""
+    from html_date_extractor import HTMLDateExtractor
+
+    cases = load_cases(directory, case_id)
+    if not cases:
+        print(f"No captured pages in '{directory}'")
+        return
+
+    # One extractor per captured configuration
+    extractors: Dict[str, HTMLDateExtractor] = {}
+    for cid, meta, html_content in cases:
+        extractor_kwargs = meta.get('extractor_kwargs', {})
+        key = json.dumps(extractor_kwargs, sort_keys=True)
+        if key not in extractors:
+            # Without the parsed-date cache, so every case pays its real parsing cost
+            extractors[key] = HTMLDateExtractor(disable_logger=True, parsed_date_cache_size=0, **extractor_kwargs)
+            if extractors[key].boilerplate_cache is not None:
+                extractors[key].boilerplate_cache.autosave_every = 0  # Replays don't write the masks
+        extractor = extractors[key]
+        url = meta.get('url')
+
+        print("\n" + "=" * 80)
+        print(f"{cid}  {url}")
+        print(f"Captured: {meta.get('total_seconds')}s, {meta.get('html_bytes')} bytes")
+        print("=" * 80)
+
+        timings: Dict[str, float] = {}
+        with _ParseDateRecorder(extractor) as recorder:
+            if use_sampler:
+                with _StackSampler(threading.get_ident()) as sampler:
+                    start = time.perf_counter()
+                    extractor.extract_from_html(html_content, url=url, timings=timings)
+                    elapsed = time.perf_counter() - start
+            else:
+                profile = cProfile.Profile()
+                start = time.perf_counter()
+                profile.enable()
+                extractor.extract_from_html(html_content, url=url, timings=timings)
+                profile.disable()
+                elapsed = time.perf_counter() - start
+
+        print(f"\nReplay: {elapsed:.3f}s")
+        print("\n--- Time per step/strategy (replay | captured) ---")
+        for name, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+            captured = meta.get('timings', {}).get(name)
+            print(f"{seconds:9.4f}s | {captured if captured is not None else '-':>9}  {name}")
+
+        parse_total = sum(seconds for seconds, _, _ in recorder.calls)
+        print(f"\n--- _parse_date: {len(recorder.calls)} calls, {parse_total:.4f}s total, slowest {top} ---")
+        for seconds, date_string, parsed in sorted(recorder.calls, key=lambda call: call[0], reverse=True)[:top]:
+            shown = ' '.join(str(date_string).split())
+            shown = shown if len(shown) <= 80 else shown[:77] + '...'
+            print(f"{seconds:9.4f}s  {'parsed  ' if parsed else 'rejected'}  {shown!r}")
+
+        print(f"\n--- Top {top} functions ({'sampled, inclusive' if use_sampler else 'cProfile, cumulative'}) ---")
+        if use_sampler:
+            total = sampler.ticks or 1
+            for key, count in sampler.samples.most_common(top):
+                print(f"{count:6d} samples ({100 * count / total:5.1f}%)  {key}")
+        else:
+            stream = io.StringIO()
+            pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(top)
+            print(stream.getvalue())
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Replay captured slow pages under a profiler.")
+    arg_parser.add_argument('directory', help="The slow page quarantine directory")
+    arg_parser.add_argument('--case', help="Only replay this captured case id")
+    arg_parser.add_argument('--sampler', action='store_true', help="Use the stack sampler instead of cProfile")
+    arg_parser.add_argument('--top', type=int, default=15, help="Number of rows per report")
+    args = arg_parser.parse_args()
+
+    replay(args.directory, case_id=args.case, use_sampler=args.sampler, top=args.top)
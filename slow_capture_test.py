@@ -0,0 +1,38 @@
+'''
+Checks of the slow page capture (slow_capture.py), for HTML pages and the payloads the triage
+routes away from HTML.
+Run with pytest, or directly: python slow_capture_test.py
+'''
+import tempfile
+from content_triage_test import _pdf
+from html_date_extractor import HTMLDateExtractor
+from slow_capture import load_cases, replay
+
+
+def test_every_route_is_captured_and_replayed():
+    pages = {
+        "https://example.com/page": "<html><body><p>Published 2024-03-05</p></body></html>",
+        "https://example.com/notes.txt": "Minutes of the meeting held on 5 March 2024.",
+        "https://example.com/report.pdf": _pdf(),
+    }
+    with tempfile.TemporaryDirectory() as folder:
+        # Every page is "slow"
+        extractor = HTMLDateExtractor(disable_logger=True, use_htmldate=False, slow_capture_dir=folder,
+                                      slow_threshold_seconds=0)
+        for url, payload in pages.items():
+            extractor.extract_from_html(payload, url=url)
+        extractor.extract_many([_pdf()], urls=["https://example.com/other.pdf"])
+
+        cases = {meta['url']: (meta, payload) for _, meta, payload in load_cases(folder)}
+        assert sorted(cases) == sorted([*pages, "https://example.com/other.pdf"])
+        for url, payload in pages.items():
+            meta, captured = cases[url]
+            assert captured == payload, url
+            assert meta['timings'].get('triage') is not None, meta
+        assert cases["https://example.com/report.pdf"][0]['payload_file'].endswith('.bin')
+        replay(folder, top=1)
+
+
+if __name__ == "__main__":
+    test_every_route_is_captured_and_replayed()
+    print("✅ slow capture checks passed")